@@ -2,14 +2,17 @@
 Admin endpoints for database management
 """
 import os
+from typing import Optional
 from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi.responses import PlainTextResponse
 from sqlalchemy.orm import Session
 from database.connection import get_db
+from api.middleware import ProfiledRoute
  
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 @router.post("/init-sample-data")
-async def initialize_sample_data(
+def initialize_sample_data(
     secret: str = Query(..., description="Admin secret key"),
     db: Session = Depends(get_db)
 ):
@@ -45,6 +48,12 @@ async def initialize_sample_data(
         # Restore original input
         builtins.input = original_input
         
+        # Sample departments and team members bypass the API endpoints
+        from services.directory_cache import directory_cache
+        from services.cache_service import analytics_cache
+        directory_cache.invalidate(db)
+        analytics_cache.invalidate()
+        
         # Count records
         from database.models import Department, TeamMember, Email
         
@@ -70,7 +79,7 @@ async def initialize_sample_data(
 
 
 @router.get("/database-stats")
-async def get_database_stats(db: Session = Depends(get_db)):
+def get_database_stats(db: Session = Depends(get_db)):
     """
     Get current database statistics (no auth required)
     """
@@ -88,3 +97,101 @@ async def get_database_stats(db: Session = Depends(get_db)):
             status_code=500,
             detail=f"Failed to get stats: {str(e)}"
         )
+
+
+@router.post("/rebuild-metrics")
+def rebuild_metrics(
+    secret: str = Query(..., description="Admin secret key"),
+    db: Session = Depends(get_db)
+):
+    """
+    Rebuild the hourly metrics rollup tables from the emails table
+    
+    **Security:** Requires ADMIN_SECRET environment variable
+    
+    **Usage:** POST /api/admin/rebuild-metrics?secret=YOUR_SECRET_KEY
+    """
+    admin_secret = os.getenv("ADMIN_SECRET", "please-change-this-secret")
+    
+    if secret != admin_secret:
+        raise HTTPException(
+            status_code=403,
+            detail="Invalid admin secret key"
+        )
+    
+    try:
+        from services.metrics_rollup_service import rebuild_metrics_rollups
+        
+        return {
+            "success": True,
+            "buckets": rebuild_metrics_rollups(db)
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to rebuild metrics: {str(e)}"
+        )
+
+
+@router.get("/profiles")
+def list_profiles(
+    secret: str = Query(..., description="Admin secret key"),
+    route: Optional[str] = Query(None, description="Route template, e.g. /api/sla/breaches/")
+):
+    """
+    List stored request profiles (collapsed stacks), newest first
+    
+    Requests are profiled at PROFILE_SAMPLE_RATE, or on demand by sending
+    the admin secret in the X-Debug-Profile header.
+    
+    **Security:** Requires ADMIN_SECRET environment variable
+    
+    **Usage:** GET /api/admin/profiles?secret=YOUR_SECRET_KEY
+    """
+    admin_secret = os.getenv("ADMIN_SECRET", "please-change-this-secret")
+    
+    if secret != admin_secret:
+        raise HTTPException(
+            status_code=403,
+            detail="Invalid admin secret key"
+        )
+    
+    from services.profiling_service import request_profiler
+    
+    profiles = request_profiler.list_profiles(route)
+    
+    return {
+        "status": request_profiler.get_status(),
+        "count": len(profiles),
+        "profiles": profiles
+    }
+
+
+@router.get("/profiles/{name}", response_class=PlainTextResponse)
+def get_profile(
+    name: str,
+    secret: str = Query(..., description="Admin secret key")
+):
+    """
+    Download one profile in collapsed-stack format
+    
+    Feed it to flamegraph.pl or drop it on https://www.speedscope.app
+    
+    **Security:** Requires ADMIN_SECRET environment variable
+    """
+    admin_secret = os.getenv("ADMIN_SECRET", "please-change-this-secret")
+    
+    if secret != admin_secret:
+        raise HTTPException(
+            status_code=403,
+            detail="Invalid admin secret key"
+        )
+    
+    from services.profiling_service import request_profiler
+    
+    content = request_profiler.read_profile(name)
+    
+    if content is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    
+    return PlainTextResponse(content, headers={"Content-Disposition": f'attachment; filename="{name}"'})
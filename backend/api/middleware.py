@@ -0,0 +1,187 @@
+"""
+ASGI middleware shared by every route
+"""
+import hmac
+import os
+import random
+import re
+import time
+
+import anyio.to_thread
+from fastapi.routing import APIRoute
+
+from config.logging_config import correlation_id, correlation_scope, new_correlation_id
+from config.settings import settings
+from database.query_counter import count_queries, publish_query_stats
+from services.profiling_service import profiled_endpoint, request_profiler
+from services.telemetry_service import HTTP_REQUEST_SECONDS
+
+REQUEST_ID_HEADER = "X-Request-ID"
+PROFILE_HEADER = "X-Debug-Profile"
+QUERY_COUNT_HEADER = "X-DB-Query-Count"
+QUERY_TIME_HEADER = "X-DB-Query-Time-Ms"
+
+_REQUEST_ID_RE = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+
+class RequestContextMiddleware:
+    """
+    Give each HTTP request a correlation id (the caller's X-Request-ID when
+    well-formed) for its log records, and echo it in the response
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._header = REQUEST_ID_HEADER.lower().encode()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = next(
+            (value.decode("latin-1") for name, value in scope["headers"] if name == self._header),
+            ""
+        )
+        if not _REQUEST_ID_RE.match(request_id):
+            request_id = new_correlation_id("req-")
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(self._header, request_id.encode())]
+            await send(message)
+
+        with correlation_scope(request_id):
+            await self.app(scope, receive, send_with_id)
+
+
+def _route_template(scope) -> str:
+    """
+    Path template of the matched route, e.g. /api/departments/{department_id}
+
+    Routes from an included router may carry their path without the include
+    prefix, so the prefix is recovered from the request path.
+    """
+    route = scope.get("route")
+    template = getattr(route, "path_format", None) or getattr(route, "path", None)
+    if not template:
+        return "unmatched"
+
+    try:
+        matched = template.format(**scope.get("path_params", {}))
+    except (KeyError, IndexError, ValueError):
+        return template
+
+    path = scope["path"]
+    if matched != path and path.endswith(matched):
+        return path[:-len(matched)] + template
+    return template
+
+
+class MetricsMiddleware:
+    """
+    Record http_request_duration_seconds per method, route template and
+    status; unmatched paths share one label so scanners cannot blow up the
+    series count
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUEST_SECONDS.labels(
+                scope["method"], _route_template(scope), status
+            ).observe(time.perf_counter() - start)
+
+
+class ProfilingMiddleware:
+    """
+    Profile a PROFILE_SAMPLE_RATE fraction of requests, plus any request
+    whose X-Debug-Profile header carries the admin secret, and store the
+    profile under PROFILE_DIR named after the route template
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._header = PROFILE_HEADER.lower().encode()
+
+    def _requested(self, scope) -> bool:
+        value = next((value for name, value in scope["headers"] if name == self._header), None)
+        if value is None:
+            return False
+
+        admin_secret = os.getenv("ADMIN_SECRET", "please-change-this-secret")
+        return hmac.compare_digest(value, admin_secret.encode())
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not (
+            self._requested(scope) or random.random() < settings.profile_sample_rate
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        profile = request_profiler.start(scope, correlation_id.get())
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            request_profiler.stop(profile)
+            profile.route = _route_template(scope)
+            await anyio.to_thread.run_sync(request_profiler.save, profile)
+
+
+class ProfiledRoute(APIRoute):
+    """
+    APIRoute whose endpoint records the thread it runs on, so the profiler
+    samples only that thread for a profiled request
+    """
+
+    def __init__(self, path, endpoint, **kwargs):
+        super().__init__(path, profiled_endpoint(endpoint), **kwargs)
+
+
+class QueryCountMiddleware:
+    """
+    Count the SQL statements and DB time of each request, warn about N+1
+    candidates, and report the totals in X-DB-Query-* headers in debug mode
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with count_queries(scope["path"]) as stats:
+            async def send_with_stats(message):
+                if message["type"] == "http.response.start" and settings.debug_mode:
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (QUERY_COUNT_HEADER.lower().encode(), str(stats.count).encode()),
+                        (QUERY_TIME_HEADER.lower().encode(), str(stats.milliseconds).encode()),
+                    ]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_stats)
+            finally:
+                stats.name = f"{scope['method']} {_route_template(scope)}"
+                stats.report()
+                publish_query_stats(stats)
@@ -43,6 +43,7 @@ class EmailRequest(BaseModel):
     body: str
     team_member_id: Optional[int] = None
     is_client_email: bool = True
+    message_id: Optional[str] = Field(None, max_length=255)  # Makes retries idempotent
 
 class EmailReplyRequest(BaseModel):
     email_id: int
@@ -59,6 +60,7 @@ class EmailResponse(BaseModel):
     is_sla_breach: bool
     team_member_id: Optional[int]
     department_id: Optional[int]
+    message_id: Optional[str] = None
     
     class Config:
         from_attributes = True
@@ -73,6 +75,9 @@ class DepartmentMetrics(BaseModel):
     average_response_time: Optional[float]
     sla_breaches: int
     sla_compliance_rate: float
+    p50_response_time: Optional[float] = None
+    p90_response_time: Optional[float] = None
+    p99_response_time: Optional[float] = None
 
 class TeamMemberMetrics(BaseModel):
     team_member_id: int
@@ -85,6 +90,23 @@ class TeamMemberMetrics(BaseModel):
     average_response_time: Optional[float]
     sla_breaches: int
     sla_compliance_rate: float
+    p50_response_time: Optional[float] = None
+    p90_response_time: Optional[float] = None
+    p99_response_time: Optional[float] = None
+
+class ResponseTimePercentiles(BaseModel):
+    scope: str
+    scope_id: int
+    replied_emails: int
+    p50_response_time: Optional[float]
+    p90_response_time: Optional[float]
+    p99_response_time: Optional[float]
+
+class DepartmentWithMetricsResponse(DepartmentResponse):
+    metrics: Optional[DepartmentMetrics] = None  # Filled when listed with include_metrics=true
+
+class TeamMemberWithMetricsResponse(TeamMemberResponse):
+    metrics: Optional[TeamMemberMetrics] = None  # Filled when listed with include_metrics=true
 
 class SLABreachResponse(BaseModel):
     email_id: int
@@ -98,6 +120,61 @@ class SLABreachResponse(BaseModel):
     sla_threshold: float
     alert_sent: bool
 
+# Dashboard Models
+class DashboardBreach(BaseModel):
+    email_id: int
+    subject: Optional[str]
+    sender: str
+    recipient: str
+    received_at: datetime
+    response_time_hours: Optional[float]
+    status: str
+
+class DashboardSummary(BaseModel):
+    total_emails: int
+    replied_emails: int
+    pending_emails: int
+    average_response_time: Optional[float]
+    sla_breaches: int
+    confirmed_breaches: int
+    pending_breaches: int
+    sla_compliance_rate: float
+    recent_breaches: List[DashboardBreach]
+
+class ReportBucket(BaseModel):
+    bucket_start: datetime
+    total_emails: int
+    replied_emails: int
+    average_response_time: Optional[float]
+    sla_breaches: int
+    sla_compliance_rate: float
+
+class DepartmentReport(BaseModel):
+    department_id: int
+    department_name: str
+    sla_threshold_hours: float
+    total_emails: int
+    replied_emails: int
+    average_response_time: Optional[float]
+    sla_breaches: int
+    sla_compliance_rate: float
+    buckets: List[ReportBucket]
+
+class ReportTotals(BaseModel):
+    total_emails: int
+    replied_emails: int
+    average_response_time: Optional[float]
+    sla_breaches: int
+    sla_compliance_rate: float
+
+class ReportTrends(BaseModel):
+    start: datetime
+    end: datetime
+    bucket: str
+    totals: ReportTotals
+    buckets: List[ReportBucket]
+    departments: List[DepartmentReport]
+
 # Alert Models
 class AlertRequest(BaseModel):
     recipient: EmailStr
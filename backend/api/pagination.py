@@ -0,0 +1,25 @@
+"""
+Opaque keyset cursors for paginated list endpoints
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Tuple
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(received_at: datetime, row_id: int) -> str:
+    """Encode the (received_at, id) of the last row on a page"""
+    payload = json.dumps([received_at.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor produced by encode_cursor (ValueError when malformed)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        received_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(received_at), int(row_id)
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
@@ -1,45 +1,62 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+import logging
 
 from database.connection import get_db
 from database.models import Department, TeamMember, Email
 from api.models import (
-    DepartmentCreate, DepartmentResponse,
-    TeamMemberCreate, TeamMemberResponse,
+    DepartmentCreate, DepartmentResponse, DepartmentWithMetricsResponse,
+    TeamMemberCreate, TeamMemberResponse, TeamMemberWithMetricsResponse,
     EmailRequest, EmailReplyRequest, EmailResponse,
-    DepartmentMetrics, TeamMemberMetrics, SLABreachResponse,
+    DepartmentMetrics, TeamMemberMetrics, ResponseTimePercentiles, SLABreachResponse, DashboardSummary, ReportTrends,
     AlertRequest
 )
 from services.analytics_service import (
-    log_email_received,
+    log_emails_received_bulk,
+    recompute_sla_deadlines,
     log_email_reply,
     get_department_metrics,
     get_team_member_metrics,
+    get_response_time_percentiles,
     get_sla_breaches,
+    get_dashboard_summary,
+    get_report_trends,
     check_and_alert_sla_breaches
 )
 from services.email_service import send_email, send_sla_breach_alert
+from services.directory_cache import directory_cache
+from services.cache_service import analytics_cache
+from api.middleware import ProfiledRoute
+from api.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
+logger = logging.getLogger(__name__)
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Stored timestamps are naive UTC; convert offset-aware query values"""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
 
 # ============================================================================
 # DEPARTMENT ENDPOINTS
 # ============================================================================
 
 @router.post("/departments/", response_model=DepartmentResponse, status_code=status.HTTP_201_CREATED)
-async def create_department(department: DepartmentCreate, db: Session = Depends(get_db)):
+def create_department(department: DepartmentCreate, db: Session = Depends(get_db)):
     """
     Create a new department
     """
-    print(f"\n🏢 Creating new department: {department.name}")
+    logger.debug("🏢 Creating new department: %s", department.name)
     
     try:
         # Check if department already exists
         existing = db.query(Department).filter(Department.name == department.name).first()
         if existing:
-            print(f"❌ Department '{department.name}' already exists")
+            logger.debug("❌ Department '%s' already exists", department.name)
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Department '{department.name}' already exists"
@@ -52,44 +69,55 @@ async def create_department(department: DepartmentCreate, db: Session = Depends(
         db.add(db_department)
         db.commit()
         db.refresh(db_department)
+        directory_cache.invalidate(db)
+        analytics_cache.invalidate()
         
-        print(f"✅ Department created successfully (ID: {db_department.id})")
+        logger.info("✅ Department created successfully (ID: %s)", db_department.id)
         return db_department
         
     except HTTPException:
         raise
     except Exception as e:
         db.rollback()
-        print(f"❌ Error creating department: {e}")
+        logger.exception("❌ Error creating department: %s", e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
-@router.get("/departments/", response_model=List[DepartmentResponse])
-async def list_departments(db: Session = Depends(get_db)):
+@router.get("/departments/", response_model=List[DepartmentWithMetricsResponse])
+def list_departments(include_metrics: bool = False, db: Session = Depends(get_db)):
     """
-    Get all departments
+    Get all departments (with include_metrics, each row embeds its metrics)
     """
-    print(f"\n📋 Fetching all departments")
+    logger.debug("📋 Fetching all departments")
     try:
         departments = db.query(Department).all()
-        print(f"✅ Found {len(departments)} department(s)")
-        return departments
+        logger.debug("✅ Found %s department(s)", len(departments))
+        
+        if not include_metrics:
+            return departments
+        
+        # One grouped query for every row instead of a metrics request per department
+        metrics = {m['department_id']: m for m in get_department_metrics(db=db)}
+        return [
+            {**DepartmentResponse.model_validate(d).model_dump(), 'metrics': metrics.get(d.id)}
+            for d in departments
+        ]
     except Exception as e:
-        print(f"❌ Error fetching departments: {e}")
+        logger.exception("❌ Error fetching departments: %s", e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 @router.get("/departments/{department_id}", response_model=DepartmentResponse)
-async def get_department(department_id: int, db: Session = Depends(get_db)):
+def get_department(department_id: int, db: Session = Depends(get_db)):
     """
     Get a specific department
     """
-    print(f"\n🔍 Fetching department ID: {department_id}")
+    logger.debug("🔍 Fetching department ID: %s", department_id)
     
     department = db.query(Department).filter(Department.id == department_id).first()
     if not department:
-        print(f"❌ Department {department_id} not found")
+        logger.debug("❌ Department %s not found", department_id)
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Department not found")
     
-    print(f"✅ Found department: {department.name}")
+    logger.debug("✅ Found department: %s", department.name)
     return department
 
 # ============================================================================
@@ -97,17 +125,17 @@ async def get_department(department_id: int, db: Session = Depends(get_db)):
 # ============================================================================
 
 @router.post("/team-members/", response_model=TeamMemberResponse, status_code=status.HTTP_201_CREATED)
-async def create_team_member(team_member: TeamMemberCreate, db: Session = Depends(get_db)):
+def create_team_member(team_member: TeamMemberCreate, db: Session = Depends(get_db)):
     """
     Create a new team member
     """
-    print(f"\n👤 Creating new team member: {team_member.name}")
+    logger.debug("👤 Creating new team member: %s", team_member.name)
     
     try:
         # Check if email already exists
         existing = db.query(TeamMember).filter(TeamMember.email == team_member.email).first()
         if existing:
-            print(f"❌ Team member with email '{team_member.email}' already exists")
+            logger.debug("❌ Team member with email '%s' already exists", team_member.email)
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Team member with email '{team_member.email}' already exists"
@@ -116,7 +144,7 @@ async def create_team_member(team_member: TeamMemberCreate, db: Session = Depend
         # Check if department exists
         department = db.query(Department).filter(Department.id == team_member.department_id).first()
         if not department:
-            print(f"❌ Department {team_member.department_id} not found")
+            logger.debug("❌ Department %s not found", team_member.department_id)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Department {team_member.department_id} not found"
@@ -131,27 +159,31 @@ async def create_team_member(team_member: TeamMemberCreate, db: Session = Depend
         db.add(db_team_member)
         db.commit()
         db.refresh(db_team_member)
+        directory_cache.invalidate(db)
+        analytics_cache.invalidate()
         
-        print(f"✅ Team member created successfully (ID: {db_team_member.id})")
+        logger.info("✅ Team member created successfully (ID: %s)", db_team_member.id)
         return db_team_member
         
     except HTTPException:
         raise
     except Exception as e:
         db.rollback()
-        print(f"❌ Error creating team member: {e}")
+        logger.exception("❌ Error creating team member: %s", e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
-@router.get("/team-members/", response_model=List[TeamMemberResponse])
-async def list_team_members(
+@router.get("/team-members/", response_model=List[TeamMemberWithMetricsResponse])
+def list_team_members(
     department_id: Optional[int] = None,
     is_active: Optional[bool] = True,
+    include_metrics: bool = False,
     db: Session = Depends(get_db)
 ):
     """
-    Get all team members (optionally filtered by department)
+    Get all team members (optionally filtered by department; with
+    include_metrics, each row embeds its metrics)
     """
-    print(f"\n👥 Fetching team members (department_id: {department_id}, active: {is_active})")
+    logger.debug("👥 Fetching team members (department_id: %s, active: %s)", department_id, is_active)
     
     try:
         query = db.query(TeamMember)
@@ -163,26 +195,35 @@ async def list_team_members(
             query = query.filter(TeamMember.is_active == is_active)
         
         team_members = query.all()
-        print(f"✅ Found {len(team_members)} team member(s)")
-        return team_members
+        logger.debug("✅ Found %s team member(s)", len(team_members))
+        
+        if not include_metrics:
+            return team_members
+        
+        # One grouped query for every row instead of a metrics request per member
+        metrics = {m['team_member_id']: m for m in get_team_member_metrics(db=db)}
+        return [
+            {**TeamMemberResponse.model_validate(m).model_dump(), 'metrics': metrics.get(m.id)}
+            for m in team_members
+        ]
         
     except Exception as e:
-        print(f"❌ Error fetching team members: {e}")
+        logger.exception("❌ Error fetching team members: %s", e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 @router.get("/team-members/{team_member_id}", response_model=TeamMemberResponse)
-async def get_team_member(team_member_id: int, db: Session = Depends(get_db)):
+def get_team_member(team_member_id: int, db: Session = Depends(get_db)):
     """
     Get a specific team member
     """
-    print(f"\n🔍 Fetching team member ID: {team_member_id}")
+    logger.debug("🔍 Fetching team member ID: %s", team_member_id)
     
     team_member = db.query(TeamMember).filter(TeamMember.id == team_member_id).first()
     if not team_member:
-        print(f"❌ Team member {team_member_id} not found")
+        logger.debug("❌ Team member %s not found", team_member_id)
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Team member not found")
     
-    print(f"✅ Found team member: {team_member.name}")
+    logger.debug("✅ Found team member: %s", team_member.name)
     return team_member
 
 # ============================================================================
@@ -190,71 +231,88 @@ async def get_team_member(team_member_id: int, db: Session = Depends(get_db)):
 # ============================================================================
 
 @router.post("/emails/receive/", response_model=EmailResponse, status_code=status.HTTP_201_CREATED)
-async def receive_email(email_req: EmailRequest, db: Session = Depends(get_db)):
+def receive_email(email_req: EmailRequest, db: Session = Depends(get_db)):
     """
     Log a received email
     """
-    print(f"\n📨 Receiving email from {email_req.sender}")
+    logger.debug("📨 Receiving email from %s", email_req.sender)
     
     try:
-        # Verify team member exists if provided
-        if email_req.team_member_id:
-            team_member = db.query(TeamMember).filter(TeamMember.id == email_req.team_member_id).first()
-            if not team_member:
-                print(f"❌ Team member {email_req.team_member_id} not found")
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=f"Team member {email_req.team_member_id} not found"
-                )
-        
-        email = log_email_received(
-            db=db,
-            sender=email_req.sender,
-            recipient=email_req.recipient,
-            subject=email_req.subject,
-            body=email_req.body,
-            team_member_id=email_req.team_member_id,
-            is_client_email=email_req.is_client_email
-        )
-        
-        return email
+        # Bulk ingest path: member lookup, dedup and insert in one transaction
+        stored = log_emails_received_bulk(db, [{
+            "sender": email_req.sender,
+            "recipient": email_req.recipient,
+            "subject": email_req.subject,
+            "body": email_req.body,
+            "team_member_id": email_req.team_member_id,
+            "is_client_email": email_req.is_client_email,
+            "message_id": email_req.message_id
+        }])
+        
+        if stored:
+            return stored[0]
+        
+        # Idempotent retries: the same Message-ID for the same recipient is stored once
+        existing = db.query(Email).filter(
+            Email.recipient == email_req.recipient,
+            Email.message_id == email_req.message_id
+        ).first()
+        logger.debug("⚠️ Email %s already logged (ID: %s)", email_req.message_id, existing.id)
+        return existing
         
-    except HTTPException:
-        raise
+    except ValueError as e:
+        logger.debug("❌ %s", e)
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
     except Exception as e:
-        print(f"❌ Error receiving email: {e}")
+        logger.exception("❌ Error receiving email: %s", e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 @router.post("/emails/reply/", response_model=EmailResponse)
-async def reply_to_email(reply_req: EmailReplyRequest, db: Session = Depends(get_db)):
+def reply_to_email(reply_req: EmailReplyRequest, db: Session = Depends(get_db)):
     """
     Mark an email as replied
     """
-    print(f"\n💬 Marking email {reply_req.email_id} as replied")
+    logger.debug("💬 Marking email %s as replied", reply_req.email_id)
     
     try:
         email = log_email_reply(db=db, email_id=reply_req.email_id)
         return email
         
     except ValueError as e:
-        print(f"❌ {str(e)}")
+        logger.debug("❌ %s", e)
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
     except Exception as e:
-        print(f"❌ Error marking email as replied: {e}")
+        logger.exception("❌ Error marking email as replied: %s", e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 @router.get("/emails/", response_model=List[EmailResponse])
-async def list_emails(
+def list_emails(
+    response: Response,
     team_member_id: Optional[int] = None,
     department_id: Optional[int] = None,
     is_replied: Optional[bool] = None,
-    limit: int = 100,
+    is_sla_breach: Optional[bool] = None,
+    limit: int = Query(100, ge=1),
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
     """
-    Get all emails (with optional filters)
+    Get emails, newest first (with optional filters)
+    
+    Keyset paginated over (received_at, id): when more rows exist the
+    X-Next-Cursor response header holds the cursor for the next page.
+    Page sizes above settings.emails_page_max are clamped.
     """
-    print(f"\n📬 Fetching emails (filters: team={team_member_id}, dept={department_id}, replied={is_replied})")
+    logger.debug("📬 Fetching emails (filters: team=%s, dept=%s, replied=%s)", team_member_id, department_id, is_replied)
+    
+    from config.settings import settings
+    
+    limit = min(limit, settings.emails_page_max)
+    
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
     
     try:
         query = db.query(Email)
@@ -268,12 +326,30 @@ async def list_emails(
         if is_replied is not None:
             query = query.filter(Email.is_replied == is_replied)
         
-        emails = query.order_by(Email.received_at.desc()).limit(limit).all()
-        print(f"✅ Found {len(emails)} email(s)")
+        if is_sla_breach is not None:
+            query = query.filter(Email.is_sla_breach == is_sla_breach)
+        
+        if after:
+            # Seek past the last row of the previous page: cost is independent of depth
+            received_at, last_id = after
+            query = query.filter(or_(
+                Email.received_at < received_at,
+                and_(Email.received_at == received_at, Email.id < last_id)
+            ))
+        
+        emails = query.order_by(
+            Email.received_at.desc(), Email.id.desc()
+        ).limit(limit + 1).all()
+        
+        if len(emails) > limit:
+            emails = emails[:limit]
+            response.headers[NEXT_CURSOR_HEADER] = encode_cursor(emails[-1].received_at, emails[-1].id)
+        
+        logger.debug("✅ Found %s email(s)", len(emails))
         return emails
         
     except Exception as e:
-        print(f"❌ Error fetching emails: {e}")
+        logger.exception("❌ Error fetching emails: %s", e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 # ============================================================================
@@ -281,37 +357,132 @@ async def list_emails(
 # ============================================================================
 
 @router.get("/metrics/departments/", response_model=List[DepartmentMetrics])
-async def get_departments_metrics(
+def get_departments_metrics(
     department_id: Optional[int] = None,
+    ids: Optional[List[int]] = Query(None, description="Batch of department ids (repeat the parameter)"),
     db: Session = Depends(get_db)
 ):
     """
-    Get metrics for all departments or a specific department
+    Get metrics for all departments, a specific department, or a batch of ids
     """
-    print(f"\n📊 Fetching department metrics")
+    logger.debug("📊 Fetching department metrics")
     
     try:
-        metrics = get_department_metrics(db=db, department_id=department_id)
+        metrics = get_department_metrics(
+            db=db,
+            department_id=department_id,
+            department_ids=tuple(sorted(set(ids))) if ids else None
+        )
         return metrics
     except Exception as e:
-        print(f"❌ Error fetching department metrics: {e}")
+        logger.exception("❌ Error fetching department metrics: %s", e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 @router.get("/metrics/team-members/", response_model=List[TeamMemberMetrics])
-async def get_team_members_metrics(
+def get_team_members_metrics(
     team_member_id: Optional[int] = None,
+    ids: Optional[List[int]] = Query(None, description="Batch of team member ids (repeat the parameter)"),
     db: Session = Depends(get_db)
 ):
     """
-    Get metrics for all team members or a specific team member
+    Get metrics for all team members, a specific team member, or a batch of ids
     """
-    print(f"\n👥 Fetching team member metrics")
+    logger.debug("👥 Fetching team member metrics")
     
     try:
-        metrics = get_team_member_metrics(db=db, team_member_id=team_member_id)
+        metrics = get_team_member_metrics(
+            db=db,
+            team_member_id=team_member_id,
+            team_member_ids=tuple(sorted(set(ids))) if ids else None
+        )
         return metrics
     except Exception as e:
-        print(f"❌ Error fetching team member metrics: {e}")
+        logger.exception("❌ Error fetching team member metrics: %s", e)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+@router.get("/metrics/response-percentiles/", response_model=List[ResponseTimePercentiles])
+def get_response_percentiles(
+    scope: str = Query("department", pattern="^(department|team_member)$"),
+    ids: Optional[List[int]] = Query(None, description="Restrict to these department/team member ids"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Get p50/p90/p99 response times per department or team member (whole days within [start, end))
+    """
+    logger.debug("⏱️  Fetching %s response-time percentiles", scope)
+    
+    start, end = _naive_utc(start), _naive_utc(end)
+    if start is not None and end is not None and start >= end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="start must be before end")
+    
+    try:
+        return get_response_time_percentiles(
+            db=db,
+            scope=scope,
+            scope_ids=tuple(sorted(set(ids))) if ids else None,
+            start=start,
+            end=end
+        )
+    except Exception as e:
+        logger.exception("❌ Error fetching response-time percentiles: %s", e)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+@router.get("/dashboard/summary", response_model=DashboardSummary)
+def get_dashboard_summary_endpoint(
+    recent_breaches: int = Query(5, ge=0, le=50),
+    db: Session = Depends(get_db)
+):
+    """
+    Get the dashboard's headline numbers and newest SLA breaches in one small response
+    """
+    logger.debug("📈 Fetching dashboard summary")
+    
+    try:
+        return get_dashboard_summary(db=db, recent_breaches=recent_breaches)
+    except Exception as e:
+        logger.exception("❌ Error fetching dashboard summary: %s", e)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+@router.get("/reports/trends", response_model=ReportTrends)
+def get_report_trends_endpoint(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    bucket: str = Query("week", pattern="^(day|week|month)$"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get report totals per day/week/month and per department for a date range
+    
+    Defaults to the 28 days up to the end of today.
+    """
+    from config.settings import settings
+    
+    start, end = _naive_utc(start), _naive_utc(end)
+    
+    if end is None:
+        # Whole days keep the cache key stable between requests
+        end = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    if start is None:
+        start = end - timedelta(days=28)
+    
+    if start >= end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="start must be before end")
+    
+    approx_buckets = (end - start).days // {"day": 1, "week": 7, "month": 28}[bucket]
+    if approx_buckets > settings.report_max_buckets:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Range too long for {bucket} buckets (max {settings.report_max_buckets})"
+        )
+    
+    logger.debug("📈 Fetching %s report trends", bucket)
+    
+    try:
+        return get_report_trends(db=db, start=start, end=end, bucket=bucket)
+    except Exception as e:
+        logger.exception("❌ Error fetching report trends: %s", e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 # ============================================================================
@@ -319,28 +490,28 @@ async def get_team_members_metrics(
 # ============================================================================
 
 @router.get("/sla/breaches/")
-async def get_sla_breaches_endpoint(
+def get_sla_breaches_endpoint(
     include_pending: bool = True,
     db: Session = Depends(get_db)
 ):
     """
     Get all SLA breaches
     """
-    print(f"\n⚠️  Fetching SLA breaches")
+    logger.debug("⚠️  Fetching SLA breaches")
     
     try:
         breaches = get_sla_breaches(db=db, include_pending=include_pending)
         return {"sla_breaches": breaches, "total_count": len(breaches)}
     except Exception as e:
-        print(f"❌ Error fetching SLA breaches: {e}")
+        logger.exception("❌ Error fetching SLA breaches: %s", e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 @router.post("/alerts/check-sla/")
-async def check_sla_and_send_alerts(db: Session = Depends(get_db)):
+def check_sla_and_send_alerts(db: Session = Depends(get_db)):
     """
     Check for SLA breaches and send alerts
     """
-    print(f"\n🚨 Checking SLA breaches and sending alerts")
+    logger.debug("🚨 Checking SLA breaches and sending alerts")
     
     try:
         alerts = check_and_alert_sla_breaches(db=db)
@@ -357,15 +528,15 @@ async def check_sla_and_send_alerts(db: Session = Depends(get_db)):
             "alerts": alerts
         }
     except Exception as e:
-        print(f"❌ Error checking SLA breaches: {e}")
+        logger.exception("❌ Error checking SLA breaches: %s", e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 @router.post("/alerts/send/")
-async def send_alert_endpoint(alert_req: AlertRequest):
+def send_alert_endpoint(alert_req: AlertRequest):
     """
     Send a custom alert email
     """
-    print(f"\n📧 Sending custom alert to {alert_req.recipient}")
+    logger.info("📧 Sending custom alert to %s", alert_req.recipient)
     
     try:
         success = send_email(
@@ -382,14 +553,14 @@ async def send_alert_endpoint(alert_req: AlertRequest):
                 detail="Failed to send alert"
             )
     except Exception as e:
-        print(f"❌ Error sending alert: {e}")
+        logger.exception("❌ Error sending alert: %s", e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
     
 
 
 # ============================================================================
 @router.put("/departments/{department_id}", response_model=DepartmentResponse)
-async def update_department(
+def update_department(
     department_id: int, 
     department: DepartmentCreate, 
     db: Session = Depends(get_db)
@@ -397,12 +568,12 @@ async def update_department(
     """
     Update an existing department
     """
-    print(f"\n🔄 Updating department ID: {department_id}")
+    logger.debug("🔄 Updating department ID: %s", department_id)
     
     try:
         db_department = db.query(Department).filter(Department.id == department_id).first()
         if not db_department:
-            print(f"❌ Department {department_id} not found")
+            logger.debug("❌ Department %s not found", department_id)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Department not found"
@@ -420,34 +591,42 @@ async def update_department(
                     detail=f"Department '{department.name}' already exists"
                 )
         
+        threshold_changed = db_department.sla_threshold_hours != department.sla_threshold_hours
+        
         db_department.name = department.name
         db_department.sla_threshold_hours = department.sla_threshold_hours
         
         db.commit()
         db.refresh(db_department)
+        directory_cache.invalidate(db)
+        analytics_cache.invalidate()
         
-        print(f"✅ Department updated successfully")
+        # Pending emails keep their stored deadline, so move it with the threshold
+        if threshold_changed:
+            recompute_sla_deadlines(db, department_id=department_id)
+        
+        logger.info("✅ Department updated successfully")
         return db_department
         
     except HTTPException:
         raise
     except Exception as e:
         db.rollback()
-        print(f"❌ Error updating department: {e}")
+        logger.exception("❌ Error updating department: %s", e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 
 @router.delete("/departments/{department_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_department(department_id: int, db: Session = Depends(get_db)):
+def delete_department(department_id: int, db: Session = Depends(get_db)):
     """
     Delete a department
     """
-    print(f"\n🗑️  Deleting department ID: {department_id}")
+    logger.debug("🗑️  Deleting department ID: %s", department_id)
     
     try:
         db_department = db.query(Department).filter(Department.id == department_id).first()
         if not db_department:
-            print(f"❌ Department {department_id} not found")
+            logger.debug("❌ Department %s not found", department_id)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Department not found"
@@ -466,20 +645,22 @@ async def delete_department(department_id: int, db: Session = Depends(get_db)):
         
         db.delete(db_department)
         db.commit()
+        directory_cache.invalidate(db)
+        analytics_cache.invalidate()
         
-        print(f"✅ Department deleted successfully")
+        logger.info("✅ Department deleted successfully")
         return None
         
     except HTTPException:
         raise
     except Exception as e:
         db.rollback()
-        print(f"❌ Error deleting department: {e}")
+        logger.exception("❌ Error deleting department: %s", e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 
 @router.put("/team-members/{team_member_id}", response_model=TeamMemberResponse)
-async def update_team_member(
+def update_team_member(
     team_member_id: int,
     team_member: TeamMemberCreate,
     db: Session = Depends(get_db)
@@ -487,12 +668,12 @@ async def update_team_member(
     """
     Update an existing team member
     """
-    print(f"\n🔄 Updating team member ID: {team_member_id}")
+    logger.debug("🔄 Updating team member ID: %s", team_member_id)
     
     try:
         db_member = db.query(TeamMember).filter(TeamMember.id == team_member_id).first()
         if not db_member:
-            print(f"❌ Team member {team_member_id} not found")
+            logger.debug("❌ Team member %s not found", team_member_id)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Team member not found"
@@ -526,29 +707,31 @@ async def update_team_member(
         
         db.commit()
         db.refresh(db_member)
+        directory_cache.invalidate(db)
+        analytics_cache.invalidate()
         
-        print(f"✅ Team member updated successfully")
+        logger.info("✅ Team member updated successfully")
         return db_member
         
     except HTTPException:
         raise
     except Exception as e:
         db.rollback()
-        print(f"❌ Error updating team member: {e}")
+        logger.exception("❌ Error updating team member: %s", e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 
 @router.delete("/team-members/{team_member_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_team_member(team_member_id: int, db: Session = Depends(get_db)):
+def delete_team_member(team_member_id: int, db: Session = Depends(get_db)):
     """
     Delete a team member
     """
-    print(f"\n🗑️  Deleting team member ID: {team_member_id}")
+    logger.debug("🗑️  Deleting team member ID: %s", team_member_id)
     
     try:
         db_member = db.query(TeamMember).filter(TeamMember.id == team_member_id).first()
         if not db_member:
-            print(f"❌ Team member {team_member_id} not found")
+            logger.debug("❌ Team member %s not found", team_member_id)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Team member not found"
@@ -560,28 +743,31 @@ async def delete_team_member(team_member_id: int, db: Session = Depends(get_db))
             # Instead of deleting, mark as inactive
             db_member.is_active = False
             db.commit()
-            print(f"✅ Team member marked as inactive (has {emails_count} email(s))")
+            logger.info("✅ Team member marked as inactive (has %s email(s))", emails_count)
         else:
             db.delete(db_member)
             db.commit()
-            print(f"✅ Team member deleted successfully")
+            logger.info("✅ Team member deleted successfully")
+        
+        directory_cache.invalidate(db)
         
+        analytics_cache.invalidate()
         return None
         
     except HTTPException:
         raise
     except Exception as e:
         db.rollback()
-        print(f"❌ Error deleting team member: {e}")
+        logger.exception("❌ Error deleting team member: %s", e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 
 @router.get("/departments/{department_id}/metrics", response_model=DepartmentMetrics)
-async def get_single_department_metrics(department_id: int, db: Session = Depends(get_db)):
+def get_single_department_metrics(department_id: int, db: Session = Depends(get_db)):
     """
     Get metrics for a specific department
     """
-    print(f"\n📊 Fetching metrics for department ID: {department_id}")
+    logger.debug("📊 Fetching metrics for department ID: %s", department_id)
     
     try:
         metrics = get_department_metrics(db=db, department_id=department_id)
@@ -594,16 +780,16 @@ async def get_single_department_metrics(department_id: int, db: Session = Depend
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Error fetching department metrics: {e}")
+        logger.exception("❌ Error fetching department metrics: %s", e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 
 @router.get("/team-members/{team_member_id}/metrics", response_model=TeamMemberMetrics)
-async def get_single_team_member_metrics(team_member_id: int, db: Session = Depends(get_db)):
+def get_single_team_member_metrics(team_member_id: int, db: Session = Depends(get_db)):
     """
     Get metrics for a specific team member
     """
-    print(f"\n📊 Fetching metrics for team member ID: {team_member_id}")
+    logger.debug("📊 Fetching metrics for team member ID: %s", team_member_id)
     
     try:
         metrics = get_team_member_metrics(db=db, team_member_id=team_member_id)
@@ -616,16 +802,16 @@ async def get_single_team_member_metrics(team_member_id: int, db: Session = Depe
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Error fetching team member metrics: {e}")
+        logger.exception("❌ Error fetching team member metrics: %s", e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 
 @router.get("/emails/{email_id}", response_model=EmailResponse)
-async def get_email_details(email_id: int, db: Session = Depends(get_db)):
+def get_email_details(email_id: int, db: Session = Depends(get_db)):
     """
     Get details of a specific email
     """
-    print(f"\n🔍 Fetching email ID: {email_id}")
+    logger.debug("🔍 Fetching email ID: %s", email_id)
     
     try:
         email = db.query(Email).filter(Email.id == email_id).first()
@@ -638,16 +824,16 @@ async def get_email_details(email_id: int, db: Session = Depends(get_db)):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Error fetching email: {e}")
+        logger.exception("❌ Error fetching email: %s", e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 # END OF FILE
 
 @router.post("/emails/sync/gmail/")
-async def sync_gmail_emails(limit: int = 10, db: Session = Depends(get_db)):
+def sync_gmail_emails(limit: int = 10, db: Session = Depends(get_db)):
     """
     Sync top N unread emails from Gmail for all team members
     """
-    print(f"\n🚀 Starting Gmail email sync (limit: {limit})...")
+    logger.info("🚀 Starting Gmail email sync (limit: %s)...", limit)
     
     try:
         from services.email_integration_service import sync_all_team_members_gmail
@@ -659,12 +845,13 @@ async def sync_gmail_emails(limit: int = 10, db: Session = Depends(get_db)):
             "members_synced": results["total_members_synced"],
             "emails_found": results["total_emails_found"],
             "emails_processed": results["total_emails_processed"],
+            "replies_detected": results["total_replies_detected"],
             "member_results": results["member_results"],
             "errors": results["errors"]
         }
         
     except Exception as e:
-        print(f"❌ Error syncing Gmail emails: {e}")
+        logger.exception("❌ Error syncing Gmail emails: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
@@ -681,11 +868,11 @@ import time
 # ============================================================================
 
 @router.post("/auto-sync/start/")
-async def start_auto_sync():
+def start_auto_sync():
     """
     Start automatic email synchronization
     """
-    print(f"\n🚀 Starting auto-sync service...")
+    logger.info("🚀 Starting auto-sync service...")
     
     success = auto_sync_service.start()
     
@@ -702,11 +889,11 @@ async def start_auto_sync():
         }
 
 @router.post("/auto-sync/stop/")
-async def stop_auto_sync():
+def stop_auto_sync():
     """
     Stop automatic email synchronization
     """
-    print(f"\n🛑 Stopping auto-sync service...")
+    logger.info("🛑 Stopping auto-sync service...")
     
     success = auto_sync_service.stop()
     
@@ -722,7 +909,7 @@ async def stop_auto_sync():
         }
 
 @router.get("/auto-sync/status/")
-async def get_auto_sync_status():
+def get_auto_sync_status():
     """
     Get current auto-sync status
     """
@@ -737,7 +924,7 @@ async def get_auto_sync_status():
     }
 
 @router.put("/auto-sync/interval/")
-async def update_auto_sync_interval(interval_minutes: int):
+def update_auto_sync_interval(interval_minutes: int):
     """
     Update auto-sync interval (requires restart)
     """
@@ -0,0 +1,9 @@
+"""
+Data-layer benchmarks: synthetic data at realistic scale, timed analytics
+functions and endpoints, and comparison against stored baselines; Gmail
+sync throughput against a local fake IMAP server
+
+    python -m benchmarks.generate_data --emails 1M
+    python -m benchmarks.run_benchmarks --emails 1M --baseline
+    python -m benchmarks.sync_benchmark --mailboxes 20 --messages 200 --workers 1,4,8
+"""
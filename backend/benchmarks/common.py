@@ -0,0 +1,46 @@
+"""
+Helpers shared by the benchmark scripts
+
+Both scripts must point DATABASE_URL at the benchmark database before any
+application module (config.settings, database.connection) is imported.
+"""
+import os
+import re
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_SUFFIXES = {"": 1, "k": 1_000, "m": 1_000_000}
+
+
+def parse_count(value: str) -> int:
+    """'100k' -> 100000, '10M' -> 10000000"""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([kKmM]?)\s*", str(value))
+    if not match:
+        raise ValueError(f"Invalid count: {value!r} (use e.g. 100000, 100k or 1M)")
+    return int(float(match[1]) * _SUFFIXES[match[2].lower()])
+
+
+def format_count(value: int) -> str:
+    for suffix, size in (("M", 1_000_000), ("k", 1_000)):
+        if value >= size and value % size == 0:
+            return f"{value // size}{suffix}"
+    return str(value)
+
+
+def default_database_url(emails: int) -> str:
+    return f"sqlite:///{os.path.join(BENCH_DIR, 'data', f'bench_{format_count(emails)}.db')}"
+
+
+def use_database(url: str):
+    """Select the benchmark database for the application modules imported afterwards"""
+    if url.startswith("sqlite:///"):
+        os.makedirs(os.path.dirname(url[len("sqlite:///"):]) or ".", exist_ok=True)
+
+    os.environ["DATABASE_URL"] = url
+    os.environ.setdefault("DEBUG_MODE", "false")  # SQL echo would dominate the timings
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+
+def is_benchmark_database(url: str) -> bool:
+    """Destructive options are only allowed on SQLite files or databases named *bench*"""
+    return url.startswith("sqlite") or "bench" in url.rsplit("/", 1)[-1].lower()
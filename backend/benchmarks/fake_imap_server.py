@@ -0,0 +1,520 @@
+"""
+In-process IMAP stand-in for Gmail, for benchmarking and exercising the sync path
+
+Implements the subset of IMAP4rev1 the sync uses: CAPABILITY, LOGIN,
+SELECT/EXAMINE, UID SEARCH (ALL, SEEN, UNSEEN, UID set, SINCE), UID FETCH
+(UID, FLAGS, INTERNALDATE, RFC822.SIZE, BODYSTRUCTURE, BODY[.PEEK][section]
+with partial ranges), NOOP, IDLE and LOGOUT. Mailboxes are seeded with
+synthetic messages of configurable size, attachment and unread ratio, plus
+Sent-folder replies for the reply detection path. latency_ms adds a delay
+to every response to stand in for the network round trip to Gmail.
+
+    with FakeImapServer(latency_ms=20) as server:
+        server.seed(mailboxes=10, messages=200)
+        # IMAP_HOST=127.0.0.1 IMAP_PORT=<server.port> IMAP_USE_SSL=false
+
+Run standalone: python -m benchmarks.fake_imap_server --mailboxes 5 --messages 100
+"""
+import argparse
+import base64
+import os
+import queue
+import random
+import re
+import select
+import socketserver
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from typing import Dict, List, Optional
+
+SENT_FOLDER = "[Gmail]/Sent Mail"
+CAPABILITIES = "IMAP4rev1 IDLE UIDPLUS LITERAL+"
+
+_FETCH_BODY_RE = re.compile(r"BODY(\.PEEK)?\[([^\]]*)\](?:<(\d+)\.(\d+)>)?", re.IGNORECASE)
+_HEADER_FIELDS_RE = re.compile(r"^HEADER\.FIELDS\s*\(([^)]*)\)$", re.IGNORECASE)
+_LITERAL_RE = re.compile(rb"\{(\d+)(\+?)\}$")
+
+
+def _quote(value: str) -> str:
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _wrap(text: str, width: int = 76) -> str:
+    return "\r\n".join(text[i:i + width] for i in range(0, len(text), width))
+
+
+class FakeMessage:
+    """One stored message with its sections precomputed for FETCH"""
+
+    def __init__(self, uid: int, headers: List[tuple], text: str, internaldate: datetime,
+                 attachment: Optional[bytes] = None, seen: bool = False):
+        self.uid = uid
+        self.internaldate = internaldate
+        self.flags = {"\\Seen"} if seen else set()
+
+        text_bytes = (_wrap(text) + "\r\n").encode()
+        text_lines = text_bytes.count(b"\n")
+        text_structure = f'("text" "plain" ("charset" "utf-8") NIL NIL "7bit" {len(text_bytes)} {text_lines})'
+
+        if attachment is None:
+            headers = headers + [("Content-Type", "text/plain; charset=utf-8"), ("Content-Transfer-Encoding", "7bit")]
+            self.parts = {"1": text_bytes}
+            self.text = text_bytes
+            self.structure = text_structure
+        else:
+            boundary = f"=_fake_{uid}"
+            encoded = (_wrap(base64.b64encode(attachment).decode()) + "\r\n").encode()
+            headers = headers + [("Content-Type", f'multipart/mixed; boundary="{boundary}"')]
+            self.parts = {"1": text_bytes, "2": encoded}
+            self.text = (
+                f"--{boundary}\r\nContent-Type: text/plain; charset=utf-8\r\n"
+                f"Content-Transfer-Encoding: 7bit\r\n\r\n".encode() + text_bytes +
+                f"--{boundary}\r\nContent-Type: application/pdf; name=\"report-{uid}.pdf\"\r\n"
+                f"Content-Disposition: attachment; filename=\"report-{uid}.pdf\"\r\n"
+                f"Content-Transfer-Encoding: base64\r\n\r\n".encode() + encoded +
+                f"--{boundary}--\r\n".encode()
+            )
+            self.structure = (
+                f'({text_structure}("application" "pdf" ("name" "report-{uid}.pdf") NIL NIL "base64" '
+                f'{len(encoded)} NIL ("attachment" ("filename" "report-{uid}.pdf")) NIL NIL) '
+                f'"mixed" ("boundary" "{boundary}") NIL NIL NIL)'
+            )
+
+        self.header_lines = [f"{name}: {value}\r\n".encode() for name, value in [("MIME-Version", "1.0")] + headers]
+        self.header = b"".join(self.header_lines) + b"\r\n"
+        self.raw = self.header + self.text
+
+    def section(self, spec: str) -> bytes:
+        spec = spec.strip().upper()
+        if spec == "":
+            return self.raw
+        if spec == "HEADER":
+            return self.header
+        if spec == "TEXT":
+            return self.text
+
+        match = _HEADER_FIELDS_RE.match(spec)
+        if match:
+            wanted = {name.upper() for name in match[1].split()}
+            lines = [line for line in self.header_lines if line.split(b":", 1)[0].decode().upper() in wanted]
+            return b"".join(lines) + b"\r\n"
+
+        return self.parts.get(spec, b"")
+
+
+class FakeFolder:
+    def __init__(self, name: str, uid_validity: int):
+        self.name = name
+        self.uid_validity = uid_validity
+        self.messages: List[FakeMessage] = []
+        self.next_uid = 1
+
+    def add(self, **kwargs) -> FakeMessage:
+        message = FakeMessage(self.next_uid, **kwargs)
+        self.next_uid += 1
+        self.messages.append(message)
+        return message
+
+
+class FakeAccount:
+    def __init__(self, email_address: str, password: str):
+        self.email_address = email_address
+        self.password = password
+        self.folders: Dict[str, FakeFolder] = {
+            "INBOX": FakeFolder("INBOX", random.randint(1, 2 ** 31)),
+            SENT_FOLDER: FakeFolder(SENT_FOLDER, random.randint(1, 2 ** 31)),
+        }
+
+
+class _Connection(socketserver.StreamRequestHandler):
+    """One client connection; commands are handled strictly in order"""
+
+    server: "_ThreadingServer"
+
+    def setup(self):
+        super().setup()
+        self.account: Optional[FakeAccount] = None
+        self.folder: Optional[FakeFolder] = None
+        self.readonly = True
+        self.notifications: "queue.Queue[int]" = queue.Queue()
+        self.fake = self.server.fake
+        self.fake._count("connections")
+
+    def send(self, data: bytes):
+        self.wfile.write(data)
+        self.fake._count("bytes_sent", len(data))
+
+    def line(self, text: str):
+        self.send(text.encode() + b"\r\n")
+
+    def read_command(self) -> Optional[bytes]:
+        """One command line with any literals inlined"""
+        data = b""
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return None
+            line = line.rstrip(b"\r\n")
+            match = _LITERAL_RE.search(line)
+            if not match:
+                return data + line
+            if not match[2]:
+                self.line("+ Ready for literal data")
+            literal = self.rfile.read(int(match[1]))
+            data += line[:match.start()] + b'"' + literal.replace(b"\\", b"\\\\").replace(b'"', b'\\"') + b'"'
+
+    def handle(self):
+        self.line(f"* OK [CAPABILITY {CAPABILITIES}] Fake IMAP server ready")
+
+        while True:
+            command = self.read_command()
+            if command is None:
+                return
+
+            tag, _, rest = command.decode("utf-8", errors="replace").partition(" ")
+            name, _, args = rest.partition(" ")
+            name = name.upper()
+            if name == "UID":
+                sub, _, args = args.partition(" ")
+                name = f"UID {sub.upper()}"
+
+            self.fake._count("commands")
+            self.fake._count(f"command:{name}")
+
+            if self.fake.latency_ms:
+                time.sleep(self.fake.latency_ms / 1000)
+
+            try:
+                handler = getattr(self, "do_" + name.replace(" ", "_"), None)
+                if handler is None:
+                    self.line(f"{tag} BAD Unknown command {name}")
+                    continue
+                if handler(tag, args) is False:
+                    return
+            except Exception as e:
+                self.line(f"{tag} BAD {type(e).__name__}: {e}")
+
+    # ------------------------------------------------------------------
+    # Commands
+    # ------------------------------------------------------------------
+
+    def _args(self, args: str) -> List[str]:
+        return [m[1] if m[1] is not None else m[2] for m in re.finditer(r'"((?:[^"\\]|\\.)*)"|(\S+)', args)]
+
+    def do_CAPABILITY(self, tag, args):
+        self.line(f"* CAPABILITY {CAPABILITIES}")
+        self.line(f"{tag} OK CAPABILITY completed")
+
+    def do_NOOP(self, tag, args):
+        self.line(f"{tag} OK NOOP completed")
+
+    def do_LOGOUT(self, tag, args):
+        self.line("* BYE Logging out")
+        self.line(f"{tag} OK LOGOUT completed")
+        return False
+
+    def do_LOGIN(self, tag, args):
+        user, password = [re.sub(r'\\(.)', r'\1', a) for a in self._args(args)[:2]]
+        account = self.fake.accounts.get(user.lower())
+        if account is None or account.password != password:
+            self.line(f"{tag} NO [AUTHENTICATIONFAILED] Invalid credentials")
+            return
+        self.account = account
+        self.line(f"{tag} OK [CAPABILITY {CAPABILITIES}] {user} authenticated")
+
+    def _select(self, tag, args, readonly: bool):
+        if self.account is None:
+            self.line(f"{tag} NO Not authenticated")
+            return
+
+        name = re.sub(r'\\(.)', r'\1', self._args(args)[0])
+        folder = self.account.folders.get("INBOX" if name.upper() == "INBOX" else name)
+        if folder is None:
+            self.folder = None
+            self.line(f"{tag} NO [NONEXISTENT] Unknown mailbox {name}")
+            return
+
+        self.folder, self.readonly = folder, readonly
+        self.line("* FLAGS (\\Answered \\Flagged \\Deleted \\Seen \\Draft)")
+        self.line(f"* {len(folder.messages)} EXISTS")
+        self.line("* 0 RECENT")
+        self.line(f"* OK [UIDVALIDITY {folder.uid_validity}] UIDs valid")
+        self.line(f"* OK [UIDNEXT {folder.next_uid}] Predicted next UID")
+        self.line(f"{tag} OK [{'READ-ONLY' if readonly else 'READ-WRITE'}] {name} selected")
+
+    def do_SELECT(self, tag, args):
+        self._select(tag, args, readonly=False)
+
+    def do_EXAMINE(self, tag, args):
+        self._select(tag, args, readonly=True)
+
+    def _uid_set(self, spec: str) -> set:
+        """UIDs matched by a sequence set such as 1:3,7,9:* (* is the highest UID)"""
+        highest = self.folder.messages[-1].uid if self.folder.messages else 0
+        uids = set()
+        for item in spec.split(","):
+            low, _, high = item.partition(":")
+            low = highest if low == "*" else int(low)
+            high = low if not high else (highest if high == "*" else int(high))
+            low, high = min(low, high), max(low, high)
+            uids.update(m.uid for m in self.folder.messages if low <= m.uid <= high)
+        return uids
+
+    def do_UID_SEARCH(self, tag, args):
+        if self.folder is None:
+            self.line(f"{tag} NO No mailbox selected")
+            return
+
+        tokens = self._args(args)
+        matches = {m.uid for m in self.folder.messages}
+        i = 0
+        while i < len(tokens):
+            token = tokens[i].upper()
+            if token == "ALL":
+                pass
+            elif token == "UNSEEN":
+                matches &= {m.uid for m in self.folder.messages if "\\Seen" not in m.flags}
+            elif token == "SEEN":
+                matches &= {m.uid for m in self.folder.messages if "\\Seen" in m.flags}
+            elif token == "UID":
+                i += 1
+                matches &= self._uid_set(tokens[i])
+            elif token == "SINCE":
+                i += 1
+                since = datetime.strptime(tokens[i], "%d-%b-%Y").date()
+                matches &= {m.uid for m in self.folder.messages if m.internaldate.date() >= since}
+            else:
+                self.line(f"{tag} BAD Unsupported search key {token}")
+                return
+            i += 1
+
+        self.line("* SEARCH" + "".join(f" {uid}" for uid in sorted(matches)))
+        self.line(f"{tag} OK SEARCH completed")
+
+    def do_UID_FETCH(self, tag, args):
+        if self.folder is None:
+            self.line(f"{tag} NO No mailbox selected")
+            return
+
+        spec, _, items = args.partition(" ")
+        items = items.strip()
+        if items.startswith("(") and items.endswith(")"):
+            items = items[1:-1]
+
+        wanted = self._uid_set(spec)
+        bodies = list(_FETCH_BODY_RE.finditer(items))
+        simple = set(_FETCH_BODY_RE.sub(" ", items).upper().split())
+
+        for seq, message in enumerate(self.folder.messages, 1):
+            if message.uid not in wanted:
+                continue
+
+            out = [f"UID {message.uid}".encode()]
+            if "FLAGS" in simple:
+                out.append(f"FLAGS ({' '.join(sorted(message.flags))})".encode())
+            if "INTERNALDATE" in simple:
+                out.append(f'INTERNALDATE "{message.internaldate:%d-%b-%Y %H:%M:%S +0000}"'.encode())
+            if "RFC822.SIZE" in simple:
+                out.append(f"RFC822.SIZE {len(message.raw)}".encode())
+            if "BODYSTRUCTURE" in simple:
+                out.append(f"BODYSTRUCTURE {message.structure}".encode())
+
+            for body in bodies:
+                data = message.section(body[2])
+                name = f"BODY[{body[2]}]"
+                if body[3] is not None:
+                    start = int(body[3])
+                    data = data[start:start + int(body[4])]
+                    name += f"<{start}>"
+                out.append(name.encode() + b" {%d}\r\n" % len(data) + data)
+
+                if not body[1] and not self.readonly:
+                    message.flags.add("\\Seen")
+
+            self.send(f"* {seq} FETCH (".encode() + b" ".join(out) + b")\r\n")
+
+        self.line(f"{tag} OK FETCH completed")
+
+    def do_IDLE(self, tag, args):
+        self.line("+ idling")
+        self.fake._register_idle(self)
+        try:
+            while True:
+                try:
+                    exists = self.notifications.get_nowait()
+                    self.line(f"* {exists} EXISTS")
+                except queue.Empty:
+                    pass
+
+                readable, _, _ = select.select([self.connection], [], [], 0.05)
+                if readable:
+                    line = self.rfile.readline()
+                    if not line:
+                        return False
+                    if line.strip().upper() == b"DONE":
+                        break
+        finally:
+            self.fake._unregister_idle(self)
+        self.line(f"{tag} OK IDLE terminated")
+
+
+class _ThreadingServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class FakeImapServer:
+    """Threaded fake IMAP server on a local port (0 = pick a free one)"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0.0):
+        self.accounts: Dict[str, FakeAccount] = {}
+        self.latency_ms = latency_ms
+        self.stats: Dict[str, int] = {}
+        self._stats_lock = threading.Lock()
+        self._idle: Dict[str, List[_Connection]] = {}
+
+        self._server = _ThreadingServer((host, port), _Connection)
+        self._server.fake = self
+        self.host, self.port = self._server.server_address[:2]
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "FakeImapServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True, name="fake-imap")
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _count(self, key: str, amount: int = 1):
+        with self._stats_lock:
+            self.stats[key] = self.stats.get(key, 0) + amount
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self.stats = {}
+
+    def _register_idle(self, connection: _Connection):
+        with self._stats_lock:
+            self._idle.setdefault(connection.account.email_address, []).append(connection)
+
+    def _unregister_idle(self, connection: _Connection):
+        with self._stats_lock:
+            self._idle.get(connection.account.email_address, []).remove(connection)
+
+    # ------------------------------------------------------------------
+    # Mailbox content
+    # ------------------------------------------------------------------
+
+    def add_account(self, email_address: str, password: str) -> FakeAccount:
+        account = FakeAccount(email_address, password)
+        self.accounts[email_address.lower()] = account
+        return account
+
+    def deliver(self, email_address: str, sender: str, subject: str, text: str,
+                attachment: Optional[bytes] = None) -> FakeMessage:
+        """Append a new unread INBOX message and notify IDLE connections of the mailbox"""
+        account = self.accounts[email_address.lower()]
+        inbox = account.folders["INBOX"]
+        now = datetime.now(timezone.utc)
+        message = inbox.add(
+            headers=[("From", sender), ("To", email_address), ("Subject", subject),
+                     ("Date", format_datetime(now)), ("Message-ID", f"<fake.{inbox.next_uid}.{os.getpid()}@fake.imap>")],
+            text=text, internaldate=now.replace(tzinfo=None), attachment=attachment
+        )
+
+        with self._stats_lock:
+            waiting = list(self._idle.get(account.email_address, []))
+        for connection in waiting:
+            connection.notifications.put(len(inbox.messages))
+        return message
+
+    def seed(self, mailboxes: int = 10, messages: int = 100, body_bytes: int = 2000,
+             attachment_bytes: int = 50_000, attachment_ratio: float = 0.2, unread_ratio: float = 0.6,
+             reply_ratio: float = 0.5, days: int = 7, domain: str = "gmail.com", password: str = "app-password",
+             seed: int = 42) -> List[FakeAccount]:
+        """
+        Create mailboxes bench.<n>@<domain>, each with `messages` INBOX
+        messages over the last `days` days, and Sent replies to reply_ratio of them
+        """
+        rng = random.Random(seed)
+        now = datetime.utcnow().replace(microsecond=0)
+        words = "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor".split()
+        attachment = bytes(rng.getrandbits(8) for _ in range(attachment_bytes)) if attachment_bytes else None
+        accounts = []
+
+        for n in range(1, mailboxes + 1):
+            account = self.add_account(f"bench.{n}@{domain}", password)
+            inbox, sent = account.folders["INBOX"], account.folders[SENT_FOLDER]
+            replies = []
+
+            for i in range(messages):
+                received = now - timedelta(seconds=rng.randrange(days * 86400))
+                text = " ".join(rng.choice(words) for _ in range(body_bytes // 6 + 1))[:body_bytes]
+                message_id = f"<client.{n}.{i}@customer.example>"
+
+                inbox.add(
+                    headers=[("From", f"Client {i} <client{i}@customer.example>"), ("To", account.email_address),
+                             ("Subject", f"Request {i} for mailbox {n}"),
+                             ("Date", format_datetime(received.replace(tzinfo=timezone.utc))),
+                             ("Message-ID", message_id)],
+                    text=text, internaldate=received, seen=rng.random() >= unread_ratio,
+                    attachment=attachment if rng.random() < attachment_ratio else None
+                )
+
+                replied = received + timedelta(hours=rng.lognormvariate(0, 1))
+                if rng.random() < reply_ratio and replied < now:
+                    replies.append((replied, message_id, i))
+
+            # Sent UIDs follow send order, like a real mailbox
+            for replied, message_id, i in sorted(replies):
+                sent.add(
+                    headers=[("From", account.email_address), ("To", f"client{i}@customer.example"),
+                             ("Subject", f"Re: Request {i} for mailbox {n}"),
+                             ("Date", format_datetime(replied.replace(tzinfo=timezone.utc))),
+                             ("Message-ID", f"<reply.{n}.{i}@{domain}>"),
+                             ("In-Reply-To", message_id), ("References", message_id)],
+                    text="Thanks, we are on it.", internaldate=replied, seen=True
+                )
+
+            accounts.append(account)
+
+        inbox_bytes = sum(len(m.raw) for a in accounts for m in a.folders["INBOX"].messages)
+        self._count("seeded_inbox_bytes", inbox_bytes)
+        return accounts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a seeded fake IMAP server")
+    parser.add_argument("--port", type=int, default=1143)
+    parser.add_argument("--mailboxes", type=int, default=5)
+    parser.add_argument("--messages", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    server = FakeImapServer(port=args.port, latency_ms=args.latency_ms)
+    accounts = server.seed(mailboxes=args.mailboxes, messages=args.messages)
+
+    print(f"📮 Fake IMAP on {server.host}:{server.port} with {len(accounts)} mailbox(es) x {args.messages} message(s)")
+    print(f"   IMAP_HOST={server.host} IMAP_PORT={server.port} IMAP_USE_SSL=false")
+    print(f"   Login: {accounts[0].email_address} / {accounts[0].password} (... bench.{len(accounts)})")
+
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
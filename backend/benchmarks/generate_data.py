@@ -0,0 +1,174 @@
+"""
+Generate a synthetic benchmark database: departments, team members and
+emails spread over the last N days, with realistic reply/SLA ratios
+
+    python -m benchmarks.generate_data --emails 1M
+    python -m benchmarks.generate_data --emails 10M --database-url mysql+pymysql://.../email_bench
+
+Rows are bulk inserted in chunks and the metrics rollups are rebuilt at the
+end, so the database looks like one the ingest path has been filling. The
+same --seed always produces the same data.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import default_database_url, format_count, is_benchmark_database, parse_count, use_database
+
+CHUNK_ROWS = 20_000
+
+SLA_THRESHOLDS = (2.0, 4.0, 4.0, 6.0, 8.0, 24.0)
+REPLY_RATE = 0.85
+
+
+def _response_hours(rng: random.Random, threshold: float) -> float:
+    """Log-normal reply times centred below the SLA, with a long tail past it"""
+    return rng.lognormvariate(0, 1.1) * threshold * 0.45
+
+
+def generate(db, emails: int, departments: int = 8, members_per_department: int = 12,
+             days: int = 180, seed: int = 42, body_bytes: int = 200) -> dict:
+    """Insert the synthetic data and rebuild the rollups; returns row counts"""
+    from sqlalchemy import insert
+    from database.models import Department, Email, TeamMember
+    from services.metrics_rollup_service import rebuild_metrics_rollups
+
+    rng = random.Random(seed)
+    now = datetime.utcnow().replace(microsecond=0)
+
+    print(f"📝 Creating {departments} departments x {members_per_department} team members...")
+
+    db.execute(insert(Department), [
+        {"name": f"Bench Department {d + 1}", "sla_threshold_hours": SLA_THRESHOLDS[d % len(SLA_THRESHOLDS)],
+         "created_at": now - timedelta(days=days)}
+        for d in range(departments)
+    ])
+    db.flush()
+    department_rows = db.query(Department.id, Department.sla_threshold_hours).order_by(Department.id).all()
+
+    db.execute(insert(TeamMember), [
+        {"name": f"Bench Member {d.id}-{m + 1}", "email": f"bench.{d.id}.{m + 1}@example.com",
+         "department_id": d.id, "is_active": True, "created_at": now - timedelta(days=days)}
+        for d in department_rows for m in range(members_per_department)
+    ])
+    db.flush()
+    thresholds = dict(department_rows)
+    members = [
+        (member.id, member.email, member.department_id, thresholds[member.department_id])
+        for member in db.query(TeamMember.id, TeamMember.email, TeamMember.department_id).order_by(TeamMember.id)
+    ]
+
+    print(f"📧 Inserting {emails:,} emails over {days} days...")
+
+    body = ("Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * (body_bytes // 56 + 1))[:body_bytes]
+    span_seconds = days * 86400
+    started = time.perf_counter()
+    inserted = 0
+
+    while inserted < emails:
+        rows = []
+        for i in range(inserted, min(inserted + CHUNK_ROWS, emails)):
+            member_id, member_email, department_id, threshold = members[rng.randrange(len(members))]
+            received_at = now - timedelta(seconds=rng.randrange(span_seconds))
+            deadline = received_at + timedelta(hours=threshold)
+
+            row = {
+                "sender": f"client{rng.randrange(50_000)}@customer.example",
+                "recipient": member_email,
+                "subject": f"Benchmark request #{i}",
+                "body": body,
+                "message_id": f"<bench.{i}@customer.example>",
+                "team_member_id": member_id,
+                "department_id": department_id,
+                "received_at": received_at,
+                "sla_deadline_at": deadline,
+                "is_client_email": True,
+                "replied_at": None,
+                "response_time_hours": None,
+                "is_replied": False,
+                "is_sla_breach": False,
+                "alert_sent": False,
+                "alert_sent_at": None,
+                "created_at": received_at,
+                "updated_at": received_at
+            }
+
+            hours = _response_hours(rng, threshold)
+            replied_at = received_at + timedelta(hours=hours)
+
+            if rng.random() < REPLY_RATE and replied_at <= now:
+                row.update(replied_at=replied_at, response_time_hours=hours,
+                           is_replied=True, is_sla_breach=hours > threshold)
+            elif deadline < now - timedelta(hours=1):
+                # Overdue for a while: the SLA checker has already alerted on it
+                row.update(alert_sent=True, alert_sent_at=deadline)
+
+            rows.append(row)
+
+        db.connection().execute(Email.__table__.insert(), rows)
+        db.commit()
+        inserted += len(rows)
+
+        rate = inserted / max(time.perf_counter() - started, 1e-9)
+        print(f"  ✅ {inserted:,}/{emails:,} ({rate:,.0f} rows/s)", end="\r", flush=True)
+
+    print()
+    print("🧮 Rebuilding metrics rollups...")
+    written = rebuild_metrics_rollups(db)
+
+    return {"departments": len(department_rows), "team_members": len(members), "emails": inserted, **written}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic benchmark database")
+    parser.add_argument("--emails", default="100k", help="Number of emails, e.g. 100k, 1M, 10M")
+    parser.add_argument("--departments", type=int, default=8)
+    parser.add_argument("--members-per-department", type=int, default=12)
+    parser.add_argument("--days", type=int, default=180, help="Emails are spread over this many days")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--body-bytes", type=int, default=200)
+    parser.add_argument("--database-url", help="Defaults to benchmarks/data/bench_<emails>.db (SQLite)")
+    parser.add_argument("--reset", action="store_true", help="Drop and recreate all tables first")
+    args = parser.parse_args(argv)
+
+    emails = parse_count(args.emails)
+    url = args.database_url or default_database_url(emails)
+
+    if args.reset and not is_benchmark_database(url):
+        parser.error("--reset only runs on SQLite or on a database whose name contains 'bench'")
+
+    use_database(url)
+
+    from database.connection import SessionLocal, drop_all_tables, init_db
+    from database.models import Email
+
+    if args.reset:
+        drop_all_tables()
+    init_db()
+
+    db = SessionLocal()
+    try:
+        if db.query(Email.id).first():
+            print("⚠️  The benchmark database already contains emails; use --reset to regenerate it")
+            return 1
+
+        started = time.perf_counter()
+        counts = generate(db, emails, args.departments, args.members_per_department,
+                          args.days, args.seed, args.body_bytes)
+
+        print("=" * 60)
+        print(f"✅ Generated {format_count(emails)} emails in {time.perf_counter() - started:.1f}s: {counts}")
+        print("=" * 60)
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,287 @@
+"""
+Time the analytics functions and read endpoints against a benchmark
+database and compare the results with a stored baseline
+
+    python -m benchmarks.run_benchmarks --emails 1M                  # run and compare
+    python -m benchmarks.run_benchmarks --emails 1M --save-baseline  # record a new baseline
+
+Each case is run once to warm up and then --repeats times with the
+analytics cache cleared, so every run measures the uncached path. Latency
+(median, p95), peak Python memory (tracemalloc, separate run) and the SQL
+query count are reported. Regressions beyond --tolerance fail with exit
+code 1; baselines live in benchmarks/baselines/<dialect>-<emails>.json.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import BENCH_DIR, default_database_url, format_count, parse_count, use_database
+
+# Latency changes smaller than this are noise, whatever the percentage
+NOISE_FLOOR_MS = 2.0
+
+
+class Case:
+    """One benchmarked call; setup runs before every repetition, untimed"""
+
+    def __init__(self, name: str, run: Callable[[], object], setup: Optional[Callable[[], None]] = None):
+        self.name = name
+        self.run = run
+        self.setup = setup or (lambda: None)
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def measure(case: Case, repeats: int) -> Dict:
+    from database.query_counter import observe_queries
+
+    case.setup()
+    case.run()  # Warm-up: imports, connection pool, SQLite page cache
+
+    timings = []
+    queries = 0
+    for _ in range(repeats):
+        case.setup()
+        with observe_queries(case.name) as stats:
+            started = time.perf_counter()
+            case.run()
+            timings.append((time.perf_counter() - started) * 1000)
+        queries = stats.count
+
+    # Separate run: tracemalloc slows allocation-heavy code several times over
+    case.setup()
+    tracemalloc.start()
+    try:
+        case.run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "median_ms": round(statistics.median(timings), 2),
+        "p95_ms": round(_percentile(timings, 0.95), 2),
+        "min_ms": round(min(timings), 2),
+        "peak_memory_kb": round(peak / 1024, 1),
+        "queries": queries
+    }
+
+
+def build_cases(db, client) -> List[Case]:
+    from sqlalchemy import delete, update
+    from database.models import Alert, Department, Email, TeamMember
+    from services import analytics_service
+    from services.cache_service import analytics_cache
+
+    department_ids = tuple(sorted(row.id for row in db.query(Department.id)))
+    member_ids = tuple(sorted(row.id for row in db.query(TeamMember.id)))
+
+    def cold():
+        analytics_cache.invalidate()
+
+    alerted: List[int] = []
+
+    def reset_alerts():
+        """Undo the previous check_and_alert_sla_breaches run so each one finds the same breaches"""
+        cold()
+        for start in range(0, len(alerted), 1000):
+            chunk = alerted[start:start + 1000]
+            db.execute(delete(Alert).where(Alert.email_id.in_(chunk)))
+            db.execute(update(Email).where(Email.id.in_(chunk)).values(alert_sent=False, alert_sent_at=None))
+        db.commit()
+        alerted.clear()
+
+    def check_and_alert():
+        alerted.extend(alert["email_id"] for alert in analytics_service.check_and_alert_sla_breaches(db))
+
+    cases = [
+        Case("get_department_metrics", lambda: analytics_service.get_department_metrics(db), cold),
+        Case("get_department_metrics[batch]",
+             lambda: analytics_service.get_department_metrics(db, department_ids=department_ids), cold),
+        Case("get_team_member_metrics", lambda: analytics_service.get_team_member_metrics(db), cold),
+        Case("get_team_member_metrics[batch]",
+             lambda: analytics_service.get_team_member_metrics(db, team_member_ids=member_ids), cold),
+        Case("get_sla_breaches", lambda: analytics_service.get_sla_breaches(db), cold),
+        Case("check_and_alert_sla_breaches", check_and_alert, reset_alerts),
+        Case("get_dashboard_summary", lambda: analytics_service.get_dashboard_summary(db), cold),
+    ]
+
+    if client is None:
+        return cases
+
+    def get(url: str, **params):
+        def run():
+            response = client.get(url, params=params)
+            if response.status_code != 200:
+                raise RuntimeError(f"GET {url} returned {response.status_code}: {response.text[:200]}")
+            return response
+        return run
+
+    def deep_page():
+        """GET /emails/ ten pages deep by following the keyset cursor"""
+        cursor = None
+        for _ in range(10):
+            response = get("/api/emails/", limit=100, **({"cursor": cursor} if cursor else {}))()
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+
+    cases += [
+        Case("GET /api/emails/", get("/api/emails/", limit=100), cold),
+        Case("GET /api/emails/ [pending, department]",
+             get("/api/emails/", limit=100, is_replied=False, department_id=department_ids[0]), cold),
+        Case("GET /api/emails/ [10 pages]", deep_page, cold),
+        Case("GET /api/metrics/departments/", get("/api/metrics/departments/"), cold),
+        Case("GET /api/metrics/team-members/", get("/api/metrics/team-members/"), cold),
+        Case("GET /api/departments/?include_metrics", get("/api/departments/", include_metrics=True), cold),
+        Case("GET /api/sla/breaches/", get("/api/sla/breaches/"), cold),
+        Case("GET /api/dashboard/summary", get("/api/dashboard/summary"), cold),
+        Case("GET /api/reports/trends", get("/api/reports/trends", bucket="week"), cold),
+    ]
+    return cases
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Human-readable regressions of results against baseline"""
+    regressions = []
+
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+
+        latency_limit = max(previous["median_ms"] * (1 + tolerance), previous["median_ms"] + NOISE_FLOOR_MS)
+        if current["median_ms"] > latency_limit:
+            regressions.append(f"{name}: median {previous['median_ms']} -> {current['median_ms']} ms")
+
+        if current["queries"] > previous["queries"]:
+            regressions.append(f"{name}: queries {previous['queries']} -> {current['queries']}")
+
+        if current["peak_memory_kb"] > previous["peak_memory_kb"] * (1 + tolerance) + 256:
+            regressions.append(
+                f"{name}: peak memory {previous['peak_memory_kb']} -> {current['peak_memory_kb']} KB"
+            )
+
+    return regressions
+
+
+def print_table(results: Dict, baseline: Dict):
+    print(f"\n{'case':<42} {'median ms':>10} {'p95 ms':>9} {'peak KB':>10} {'queries':>8}   vs baseline")
+    print("-" * 100)
+
+    for name, r in results.items():
+        previous = baseline.get(name)
+        delta = ""
+        if previous and previous["median_ms"]:
+            delta = f"{(r['median_ms'] / previous['median_ms'] - 1) * 100:+.0f}% time"
+            if r["queries"] != previous["queries"]:
+                delta += f", {r['queries'] - previous['queries']:+d} queries"
+
+        print(f"{name:<42} {r['median_ms']:>10} {r['p95_ms']:>9} {r['peak_memory_kb']:>10} {r['queries']:>8}   {delta}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark analytics functions and endpoints")
+    parser.add_argument("--emails", default="100k", help="Scale of the benchmark database, e.g. 100k, 1M, 10M")
+    parser.add_argument("--database-url", help="Defaults to benchmarks/data/bench_<emails>.db (SQLite)")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--only", help="Run only cases whose name contains this text")
+    parser.add_argument("--no-endpoints", action="store_true", help="Skip the HTTP endpoint cases")
+    parser.add_argument("--baseline", help="Baseline file (default benchmarks/baselines/<dialect>-<emails>.json)")
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown (0.25 = 25%%)")
+    parser.add_argument("--output", help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    emails = parse_count(args.emails)
+    url = args.database_url or default_database_url(emails)
+    use_database(url)
+
+    from database.connection import SessionLocal, engine
+    from database.models import Email
+
+    db = SessionLocal()
+    try:
+        email_count = db.query(Email.id).count()
+        if not email_count:
+            print(f"❌ No emails in {url}; run: python -m benchmarks.generate_data --emails {args.emails}")
+            return 1
+
+        client = None
+        if not args.no_endpoints:
+            try:
+                from fastapi.testclient import TestClient
+                from main import app
+                client = TestClient(app)  # Not entered: the scheduler and auto-sync stay off
+            except ImportError as e:
+                print(f"⚠️  Skipping endpoint cases ({e})")
+
+        cases = [c for c in build_cases(db, client) if not args.only or args.only in c.name]
+
+        print(f"⏱️  {len(cases)} case(s) on {engine.dialect.name} with {email_count:,} emails, {args.repeats} repeats")
+
+        results = {}
+        for case in cases:
+            print(f"  ▶ {case.name}", flush=True)
+            results[case.name] = measure(case, args.repeats)
+    finally:
+        db.close()
+
+    baseline_path = args.baseline or os.path.join(
+        BENCH_DIR, "baselines", f"{engine.dialect.name}-{format_count(emails)}.json"
+    )
+    baseline = {}
+    if os.path.exists(baseline_path) and not args.save_baseline:
+        with open(baseline_path, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+
+    print_table(results, baseline)
+
+    report = {
+        "meta": {
+            "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+            "dialect": engine.dialect.name,
+            "emails": email_count,
+            "repeats": args.repeats,
+            "python": platform.python_version(),
+            "machine": platform.machine()
+        },
+        "results": results
+    }
+
+    for path in filter(None, (args.output, baseline_path if args.save_baseline else None)):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Results written to {path}")
+
+    if not baseline:
+        if not args.save_baseline:
+            print(f"\nℹ️  No baseline at {baseline_path}; record one with --save-baseline")
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) against {baseline_path}:")
+        for line in regressions:
+            print(f"   - {line}")
+        return 1
+
+    print(f"\n✅ No regressions against {baseline_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
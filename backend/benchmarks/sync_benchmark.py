@@ -0,0 +1,166 @@
+"""
+Measure Gmail sync throughput against the local fake IMAP server
+
+    python -m benchmarks.sync_benchmark --mailboxes 20 --messages 200 --latency-ms 20 --workers 1,4,8
+
+Seeds N mailboxes x M messages, creates matching team members in a
+throwaway SQLite database and runs sync_all_team_members_gmail once per
+worker count. --workers 1 is the serial path; larger counts use the
+concurrent mailbox pool. Each run starts from empty tables and closed IMAP
+sessions, so every run does the same work. Reported per run: messages
+stored, replies detected, end-to-end sync time, messages per second, IMAP
+wire bytes per message and IMAP commands issued.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import use_database
+from benchmarks.fake_imap_server import FakeImapServer
+
+
+def _reset(db):
+    """Forget everything the previous run stored, keeping departments and team members"""
+    from database.models import Alert, Email, MailboxCheckpoint
+    from services.imap_session_service import imap_session_manager
+    from services.metrics_rollup_service import rebuild_metrics_rollups
+
+    db.query(Alert).delete()
+    db.query(Email).delete()
+    db.query(MailboxCheckpoint).delete()
+    db.commit()
+    rebuild_metrics_rollups(db)
+
+    # New connections every run: connect + login is part of the cost being measured
+    imap_session_manager.close_all()
+
+
+def run_sync(db, server: FakeImapServer, workers: int, limit: int) -> dict:
+    from services.email_integration_service import sync_all_team_members_gmail
+
+    _reset(db)
+    server.reset_stats()
+
+    started = time.perf_counter()
+    result = sync_all_team_members_gmail(db, limit=limit, max_workers=workers)
+    elapsed = time.perf_counter() - started
+
+    stored = result["total_emails_processed"]
+    wire_bytes = server.stats.get("bytes_sent", 0)
+
+    return {
+        "workers": workers,
+        "mailboxes": result["total_members_synced"],
+        "messages": stored,
+        "replies_detected": result["total_replies_detected"],
+        "errors": len(result["errors"]) + sum(len(m["errors"]) for m in result["member_results"]),
+        "seconds": round(elapsed, 3),
+        "messages_per_second": round(stored / elapsed, 1) if elapsed else 0.0,
+        "bytes_per_message": round(wire_bytes / stored) if stored else 0,
+        "imap_commands": server.stats.get("commands", 0),
+        "imap_connections": server.stats.get("connections", 0)
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Gmail sync against a local fake IMAP server")
+    parser.add_argument("--mailboxes", type=int, default=10)
+    parser.add_argument("--messages", type=int, default=200, help="INBOX messages per mailbox")
+    parser.add_argument("--body-bytes", type=int, default=2000)
+    parser.add_argument("--attachment-bytes", type=int, default=50_000)
+    parser.add_argument("--attachment-ratio", type=float, default=0.2)
+    parser.add_argument("--unread-ratio", type=float, default=0.6, help="Only unread messages are synced on bootstrap")
+    parser.add_argument("--reply-ratio", type=float, default=0.5, help="Share of messages with a reply in Sent")
+    parser.add_argument("--days", type=int, default=1,
+                        help="Messages are spread over this many days; the first Sent scan only looks back one day")
+    parser.add_argument("--latency-ms", type=float, default=10.0, help="Delay per IMAP command (network round trip)")
+    parser.add_argument("--workers", default="1,4,8", help="Comma-separated worker counts; 1 = serial")
+    parser.add_argument("--database-url", help="Defaults to a temporary SQLite file")
+    parser.add_argument("--output", help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    worker_counts = [int(w) for w in args.workers.split(",")]
+
+    server = FakeImapServer(latency_ms=args.latency_ms).start()
+    accounts = server.seed(
+        mailboxes=args.mailboxes, messages=args.messages, body_bytes=args.body_bytes,
+        attachment_bytes=args.attachment_bytes, attachment_ratio=args.attachment_ratio,
+        unread_ratio=args.unread_ratio, reply_ratio=args.reply_ratio, days=args.days
+    )
+    message_bytes = server.stats["seeded_inbox_bytes"] / max(1, args.mailboxes * args.messages)
+
+    # Must be set before the application modules read their settings
+    workdir = tempfile.mkdtemp(prefix="sync_bench_")
+    use_database(args.database_url or f"sqlite:///{os.path.join(workdir, 'sync_bench.db')}")
+    os.environ.update(IMAP_HOST=server.host, IMAP_PORT=str(server.port), IMAP_USE_SSL="false")
+
+    from database.connection import SessionLocal, init_db
+    from database.models import Department, TeamMember
+
+    init_db()
+    db = SessionLocal()
+
+    try:
+        department = Department(name="Sync Benchmark", sla_threshold_hours=4.0)
+        db.add(department)
+        db.flush()
+        db.add_all([
+            TeamMember(name=f"Sync Bench {n}", email=account.email_address, app_password=account.password,
+                       department_id=department.id, is_active=True)
+            for n, account in enumerate(accounts, 1)
+        ])
+        db.commit()
+
+        print(f"📮 Fake IMAP on {server.host}:{server.port}: {args.mailboxes} mailbox(es) x {args.messages} "
+              f"message(s), {message_bytes / 1024:.1f} KB average, {args.latency_ms:g} ms per command")
+
+        results = []
+        for workers in worker_counts:
+            print(f"  ▶ {workers} worker(s)", flush=True)
+            results.append(run_sync(db, server, workers, limit=args.messages))
+    finally:
+        db.close()
+        server.stop()
+
+    print(f"\n{'workers':>7} {'messages':>9} {'replies':>8} {'seconds':>8} {'msgs/s':>8} "
+          f"{'bytes/msg':>10} {'commands':>9} {'errors':>7}   speedup")
+    print("-" * 86)
+
+    serial = results[0]["seconds"]
+    for r in results:
+        speedup = f"{serial / r['seconds']:.1f}x" if r["seconds"] else ""
+        print(f"{r['workers']:>7} {r['messages']:>9} {r['replies_detected']:>8} {r['seconds']:>8} "
+              f"{r['messages_per_second']:>8} {r['bytes_per_message']:>10} {r['imap_commands']:>9} "
+              f"{r['errors']:>7}   {speedup}")
+
+    if args.output:
+        report = {
+            "meta": {
+                "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+                "mailboxes": args.mailboxes,
+                "messages_per_mailbox": args.messages,
+                "average_message_bytes": round(message_bytes),
+                "latency_ms": args.latency_ms,
+                "python": platform.python_version(),
+                "machine": platform.machine()
+            },
+            "results": results
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Results written to {args.output}")
+
+    return 1 if any(r["errors"] for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""
+Logging setup: levels per module, text or JSON output, correlation ids
+for requests and sync runs, and sampling for per-row events
+
+Hot paths log through the standard library with %-style arguments
+(logger.debug("Stored %s", email_id)), so nothing is formatted unless the
+level is enabled; per-row events additionally go through log_sampled().
+"""
+import contextvars
+import itertools
+import json
+import logging
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from config.settings import settings
+
+# Id of the request or sync run the current code is working for
+correlation_id: contextvars.ContextVar[str] = contextvars.ContextVar("correlation_id", default="-")
+
+_STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "correlation_id"}
+
+
+def new_correlation_id(prefix: str = "") -> str:
+    return f"{prefix}{uuid.uuid4().hex[:12]}"
+
+
+@contextmanager
+def correlation_scope(value: Optional[str] = None, prefix: str = ""):
+    """Tag every log record in the block (and threads it starts via context copies) with one id"""
+    token = correlation_id.set(value or new_correlation_id(prefix))
+    try:
+        yield correlation_id.get()
+    finally:
+        correlation_id.reset(token)
+
+
+class CorrelationFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.correlation_id = correlation_id.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; extra= fields are included as keys"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "correlation_id": getattr(record, "correlation_id", "-"),
+        }
+        entry.update({k: v for k, v in vars(record).items() if k not in _STANDARD_ATTRS})
+
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+# Per call site counters for log_sampled()
+_sample_counters: Dict[str, itertools.count] = {}
+
+
+def log_sampled(logger: logging.Logger, level: int, key: str, msg: str, *args, **kwargs):
+    """
+    Log 1 in LOG_SAMPLE_EVERY calls for a per-row event identified by key
+
+    The level check comes first, so a disabled level costs one comparison.
+    """
+    if not logger.isEnabledFor(level):
+        return
+
+    counter = _sample_counters.get(key)
+    if counter is None:
+        counter = _sample_counters.setdefault(key, itertools.count())
+
+    if next(counter) % max(settings.log_sample_every, 1) == 0:
+        logger.log(level, msg, *args, **kwargs)
+
+
+def _parse_levels(spec: str) -> Dict[str, str]:
+    """'services.analytics_service=DEBUG,sqlalchemy.engine=WARNING' -> {name: level}"""
+    levels = {}
+    for item in spec.split(","):
+        name, _, level = item.partition("=")
+        if name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging():
+    """Configure the root handler once at startup (idempotent)"""
+    root = logging.getLogger()
+
+    handler = next((h for h in root.handlers if getattr(h, "_app_handler", False)), None)
+    if handler is None:
+        for existing in list(root.handlers):
+            root.removeHandler(existing)
+        handler = logging.StreamHandler()
+        handler._app_handler = True
+        handler.addFilter(CorrelationFilter())
+        root.addHandler(handler)
+
+    if settings.log_format.lower() == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter(
+            "%(asctime)s - %(levelname)s - %(name)s [%(correlation_id)s] - %(message)s"
+        ))
+
+    root.setLevel(settings.log_level.upper())
+
+    for name, level in _parse_levels(settings.log_levels).items():
+        logging.getLogger(name).setLevel(level)
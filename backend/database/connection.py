@@ -1,28 +1,51 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect, text
 from sqlalchemy.orm import sessionmaker, Session
 from database.models import Base
 from config.settings import settings
+from database.query_counter import record_query
+from services.telemetry_service import DB_QUERY_SECONDS, statement_type
 import logging
+import time
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Create database engine
 print(f"🔗 Connecting to database: {settings.database_url.split('@')[1] if '@' in settings.database_url else 'database'}")
 
+# Route handlers run in a thread pool (API_THREADPOOL_SIZE), so the pool
+# bounds how many of them can hold a connection at once
+pool_options = {} if settings.database_url.startswith("sqlite") else {
+    "pool_size": settings.db_pool_size,
+    "max_overflow": settings.db_max_overflow,
+    "pool_timeout": settings.db_pool_timeout,
+}
+
 try:
     engine = create_engine(
         settings.database_url,
         echo=settings.debug_mode,  # Set to True to see SQL queries
         pool_pre_ping=True,  # Verify connections before using
         pool_recycle=3600,  # Recycle connections after 1 hour
+        **pool_options
     )
     print("✅ Database engine created successfully")
 except Exception as e:
     print(f"❌ Error creating database engine: {e}")
     raise
 
+@event.listens_for(engine, "before_cursor_execute")
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = time.perf_counter()
+
+
+@event.listens_for(engine, "after_cursor_execute")
+def _record_query_time(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_query_started", None)
+    if started is not None:
+        elapsed = time.perf_counter() - started
+        DB_QUERY_SECONDS.labels(statement_type(statement)).observe(elapsed)
+        record_query(statement, elapsed)
+
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -32,12 +55,12 @@ def get_db():
     Usage in FastAPI endpoints: db: Session = Depends(get_db)
     """
     db = SessionLocal()
-    print("📊 Database session created")
+    logger.debug("📊 Database session created")
     try:
         yield db
     finally:
         db.close()
-        print("📊 Database session closed")
+        logger.debug("📊 Database session closed")
 
 def init_db():
     """
@@ -46,6 +69,7 @@ def init_db():
     try:
         print("🔧 Creating database tables...")
         Base.metadata.create_all(bind=engine)
+        migrate_db()
         print("✅ Database tables created successfully")
         
         # Print all created tables
@@ -57,6 +81,34 @@ def init_db():
         print(f"❌ Error creating database tables: {e}")
         raise
 
+def migrate_db():
+    """
+    Add columns and indexes introduced after a table was first created
+    (create_all only creates tables that do not exist yet)
+    """
+    inspector = inspect(engine)
+    quote = engine.dialect.identifier_preparer.quote
+    
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            
+            existing_columns = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing_columns:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    print(f"  ➕ Adding column {table.name}.{column.name}")
+                    conn.execute(text(
+                        f"ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column.name)} {column_type}"
+                    ))
+            
+            existing_indexes = {i["name"] for i in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    print(f"  ➕ Adding index {index.name}")
+                    index.create(conn)
+
 def drop_all_tables():
     """
     Drop all tables - use with caution!
@@ -0,0 +1,142 @@
+"""
+Small helpers for SQL that differs between the supported database backends
+(MySQL in production, SQLite for local runs, PostgreSQL where available)
+"""
+from datetime import datetime
+from typing import Dict, List
+
+from sqlalchemy import delete, false, func, insert, select, text
+from sqlalchemy.orm import Session
+
+
+def dialect_name(db: Session) -> str:
+    return db.get_bind().dialect.name
+
+
+TIME_BUCKETS = ("hour", "day", "week", "month")
+
+# MySQL DATE_FORMAT and SQLite strftime share these directives
+_BUCKET_FORMATS = {
+    "hour": "%Y-%m-%d %H:00:00",
+    "day": "%Y-%m-%d 00:00:00",
+    "month": "%Y-%m-01 00:00:00",
+}
+
+
+def time_bucket(db: Session, column, bucket: str):
+    """
+    SQL expression truncating a DATETIME column to the start of its
+    hour, day, ISO week (Monday) or month
+    """
+    if bucket not in TIME_BUCKETS:
+        raise ValueError(f"Unsupported time bucket: {bucket}")
+    
+    name = dialect_name(db)
+    
+    if name == "mysql":
+        if bucket == "week":
+            # SUBDATE(col, n) steps back n days; WEEKDAY() is 0 on Monday
+            return func.date_format(func.subdate(column, func.weekday(column)), _BUCKET_FORMATS["day"])
+        return func.date_format(column, _BUCKET_FORMATS[bucket])
+    
+    if name == "sqlite":
+        if bucket == "week":
+            # Forward to Sunday (or stay), then back to that week's Monday
+            return func.strftime(_BUCKET_FORMATS["day"], column, "weekday 0", "-6 days")
+        return func.strftime(_BUCKET_FORMATS[bucket], column)
+    
+    return func.date_trunc(bucket, column)
+
+
+def hour_bucket(db: Session, column):
+    """SQL expression truncating a DATETIME column to the start of its hour"""
+    return time_bucket(db, column, "hour")
+
+
+def as_datetime(value) -> datetime:
+    """Normalize a bucket value (datetime, or string on MySQL/SQLite) to datetime"""
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None)
+    return datetime.strptime(str(value)[:19], "%Y-%m-%d %H:%M:%S")
+
+
+UPSERT_CHUNK_ROWS = 500
+
+
+def _upsert_statement(db: Session, table, key_columns: List[str], counters: List[str], rows: List[Dict]):
+    name = dialect_name(db)
+    
+    if name == "mysql":
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+        
+        stmt = mysql_insert(table).values(rows)
+        return stmt.on_duplicate_key_update({c: table.c[c] + stmt.inserted[c] for c in counters})
+    
+    if name in ("sqlite", "postgresql"):
+        if name == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        
+        stmt = dialect_insert(table).values(rows)
+        return stmt.on_conflict_do_update(
+            index_elements=key_columns,
+            set_={c: table.c[c] + stmt.excluded[c] for c in counters}
+        )
+    
+    return None
+
+
+def upsert_increment(db: Session, model, key_columns: List[str], rows: List[Dict]):
+    """
+    Insert rows, or add their counter columns to the existing row with the
+    same unique key (one statement per chunk of rows)
+    
+    rows must be pre-aggregated so each key appears once.
+    """
+    if not rows:
+        return
+    
+    table = model.__table__
+    counters = [name for name in rows[0] if name not in key_columns]
+    
+    for start in range(0, len(rows), UPSERT_CHUNK_ROWS):
+        chunk = rows[start:start + UPSERT_CHUNK_ROWS]
+        stmt = _upsert_statement(db, table, key_columns, counters, chunk)
+        
+        if stmt is not None:
+            db.execute(stmt)
+            continue
+        
+        # Portable fallback: update first, insert what did not exist
+        missing = []
+        for row in chunk:
+            updated = db.query(model).filter(
+                *[table.c[k] == row[k] for k in key_columns]
+            ).update({table.c[c]: table.c[c] + row[c] for c in counters}, synchronize_session=False)
+            if not updated:
+                missing.append(row)
+        if missing:
+            db.execute(insert(table), missing)
+
+
+def lock_tables_for_rebuild(db: Session, models: List):
+    """
+    Block concurrent writes to the given tables until the current
+    transaction ends, waiting for writers that already touched them
+
+    Call before reading the source rows of a rebuild, so no increment can
+    commit between the read and the rewrite of the tables.
+    """
+    name = dialect_name(db)
+    
+    if name == "postgresql":
+        tables = ", ".join(model.__table__.name for model in models)
+        db.execute(text(f"LOCK TABLE {tables} IN SHARE ROW EXCLUSIVE MODE"))
+    elif name == "mysql":
+        # Next-key locks from a locking full scan also block inserts of new rows
+        for model in models:
+            db.execute(select(func.count()).select_from(model.__table__).with_for_update())
+    else:
+        # SQLite: any write statement takes the database-wide write lock
+        db.execute(delete(models[0].__table__).where(false()))
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean, Text
+from sqlalchemy import Column, Integer, BigInteger, String, Float, DateTime, ForeignKey, Boolean, Text, UniqueConstraint, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -42,6 +42,7 @@ class Email(Base):
     recipient = Column(String(255), nullable=False, index=True)
     subject = Column(String(500))
     body = Column(Text)
+    message_id = Column(String(255), nullable=True)  # RFC 5322 Message-ID (or provider id), used for dedup
     
     # Tracking Details
     team_member_id = Column(Integer, ForeignKey("team_members.id"))
@@ -51,6 +52,7 @@ class Email(Base):
     received_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
     replied_at = Column(DateTime, nullable=True)
     response_time_hours = Column(Float, nullable=True)  # Time to respond in hours
+    sla_deadline_at = Column(DateTime, nullable=True)  # received_at + department SLA threshold
     
     # Status
     is_replied = Column(Boolean, default=False)
@@ -67,6 +69,19 @@ class Email(Base):
     # Relationships
     team_member = relationship("TeamMember", back_populates="emails")
     department = relationship("Department", back_populates="emails")
+    
+    __table_args__ = (
+        # One row per (mailbox, message): a mail sent to two team members is kept for both
+        Index("uq_emails_recipient_message_id", "recipient", "message_id", unique=True),
+        # is_replied filters ordered by received_at (email listing, pending scans)
+        Index("ix_emails_replied_received", "is_replied", "received_at"),
+        # Keyset pagination of GET /emails/ per filter; InnoDB and SQLite append
+        # the primary key to secondary indexes, so these cover (..., received_at, id)
+        Index("ix_emails_member_received", "team_member_id", "received_at"),
+        Index("ix_emails_department_received", "department_id", "received_at"),
+        # Deadline-driven SLA checks: range scans over pending, unalerted deadlines
+        Index("ix_emails_pending_deadline", "is_replied", "alert_sent", "sla_deadline_at"),
+    )
 
 class Alert(Base):
     __tablename__ = "alerts"
@@ -78,4 +93,95 @@ class Alert(Base):
     sent_to = Column(String(255))
     sent_at = Column(DateTime, default=datetime.utcnow)
     is_acknowledged = Column(Boolean, default=False)
-    acknowledged_at = Column(DateTime, nullable=True)
\ No newline at end of file
+    acknowledged_at = Column(DateTime, nullable=True)
+
+class MailboxCheckpoint(Base):
+    __tablename__ = "mailbox_checkpoints"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    team_member_id = Column(Integer, ForeignKey("team_members.id"), nullable=False)
+    mailbox = Column(String(255), nullable=False, default="INBOX")
+    
+    # IMAP UID checkpoint: only UIDs above last_seen_uid are fetched while
+    # the server's UIDVALIDITY is unchanged
+    uid_validity = Column(BigInteger, nullable=False)
+    last_seen_uid = Column(BigInteger, nullable=False, default=0)
+    
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        UniqueConstraint("team_member_id", "mailbox", name="uq_mailbox_checkpoints_member_mailbox"),
+    )
+
+class CacheVersion(Base):
+    __tablename__ = "cache_versions"
+    
+    # Bumped on every write to the cached data so each worker process can
+    # detect that its in-memory copy is stale
+    name = Column(String(50), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class DepartmentMetricsHourly(Base):
+    __tablename__ = "department_metrics_hourly"
+    
+    # Incremental rollup of emails by department and hour of receipt,
+    # maintained by the ingest and reply paths (see metrics_rollup_service)
+    id = Column(Integer, primary_key=True, index=True)
+    department_id = Column(Integer, ForeignKey("departments.id"), nullable=False)
+    bucket_start = Column(DateTime, nullable=False)
+    
+    received_count = Column(Integer, nullable=False, default=0)
+    replied_count = Column(Integer, nullable=False, default=0)
+    breach_count = Column(Integer, nullable=False, default=0)
+    response_hours_sum = Column(Float, nullable=False, default=0.0)
+    response_count = Column(Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        UniqueConstraint("department_id", "bucket_start", name="uq_department_metrics_hourly_bucket"),
+    )
+
+class TeamMemberMetricsHourly(Base):
+    __tablename__ = "team_member_metrics_hourly"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    team_member_id = Column(Integer, ForeignKey("team_members.id"), nullable=False)
+    bucket_start = Column(DateTime, nullable=False)
+    
+    received_count = Column(Integer, nullable=False, default=0)
+    replied_count = Column(Integer, nullable=False, default=0)
+    breach_count = Column(Integer, nullable=False, default=0)
+    response_hours_sum = Column(Float, nullable=False, default=0.0)
+    response_count = Column(Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        UniqueConstraint("team_member_id", "bucket_start", name="uq_team_member_metrics_hourly_bucket"),
+    )
+
+class DepartmentResponseHistogram(Base):
+    __tablename__ = "department_response_histogram_daily"
+    
+    # Log-bucketed response-time counts by department and day of receipt;
+    # bins merge by summing counts (see response_histogram_service)
+    id = Column(Integer, primary_key=True, index=True)
+    department_id = Column(Integer, ForeignKey("departments.id"), nullable=False)
+    bucket_start = Column(DateTime, nullable=False)
+    bin = Column(Integer, nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        UniqueConstraint("department_id", "bucket_start", "bin", name="uq_department_response_histogram_bin"),
+    )
+
+class TeamMemberResponseHistogram(Base):
+    __tablename__ = "team_member_response_histogram_daily"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    team_member_id = Column(Integer, ForeignKey("team_members.id"), nullable=False)
+    bucket_start = Column(DateTime, nullable=False)
+    bin = Column(Integer, nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        UniqueConstraint("team_member_id", "bucket_start", "bin", name="uq_team_member_response_histogram_bin"),
+    )
@@ -0,0 +1,152 @@
+"""
+Per-request and per-job SQL query accounting
+
+Every statement executed through the engine is counted against the
+QueryStats of the current context (set by QueryCountMiddleware for
+requests and by query_scope() for background jobs). The same statement
+text repeating many times in one scope is the signature of an N+1 loop
+and is logged as a warning.
+"""
+import contextvars
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    """Query count, total DB time and per-statement counts for one scope"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: Dict[str, int] = {}
+        self._lock = threading.Lock()  # Sync workers of one job share its stats
+
+    def record(self, statement: str, seconds: float, times: int = 1):
+        with self._lock:
+            self.count += times
+            self.seconds += seconds
+            self.statements[statement] = self.statements.get(statement, 0) + times
+
+    def merge(self, other: "QueryStats"):
+        for statement, n in other.statements.items():
+            self.record(statement, 0.0, n)
+        self.record_time(other.seconds)
+
+    def record_time(self, seconds: float):
+        with self._lock:
+            self.seconds += seconds
+
+    @property
+    def milliseconds(self) -> float:
+        return round(self.seconds * 1000, 2)
+
+    def repeated(self, threshold: Optional[int] = None) -> Dict[str, int]:
+        """Statements executed at least threshold times (N+1 candidates)"""
+        threshold = threshold or settings.query_repeat_threshold
+        return {statement: n for statement, n in self.statements.items() if n >= threshold}
+
+    def report(self):
+        """Log the totals at DEBUG and any N+1 candidates at WARNING"""
+        logger.debug("🗄️ %s: %d quer(ies), %.1f ms", self.name, self.count, self.seconds * 1000)
+
+        for statement, n in self.repeated().items():
+            logger.warning("⚠️ Possible N+1 in %s: statement ran %d times: %.200s",
+                           self.name, n, " ".join(statement.split()))
+
+
+# Stats of the request or job the current code is running for
+_current_stats: contextvars.ContextVar[Optional[QueryStats]] = contextvars.ContextVar(
+    "query_stats", default=None
+)
+
+
+# Open observe_queries() blocks; finished requests are added to each of them
+_budgets: List[QueryStats] = []
+_budgets_lock = threading.Lock()
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _current_stats.get()
+
+
+def publish_query_stats(stats: QueryStats):
+    """
+    Add a finished request's stats to every open observe_queries() block
+    """
+    if _budgets:
+        with _budgets_lock:
+            for budget in _budgets:
+                budget.merge(stats)
+
+
+def record_query(statement: str, seconds: float):
+    """Called by the engine event listener for every executed statement"""
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, seconds)
+
+
+@contextmanager
+def count_queries(name: str = "block"):
+    """Count the queries run inside the block (and threads started via context copies)"""
+    stats = QueryStats(name)
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+@contextmanager
+def query_scope(name: str):
+    """count_queries() for a background job, reporting totals and N+1 candidates at the end"""
+    with count_queries(name) as stats:
+        try:
+            yield stats
+        finally:
+            stats.report()
+
+
+@contextmanager
+def observe_queries(name: str = "block"):
+    """
+    count_queries() that also includes HTTP requests finishing while the
+    block is open (requests run in the server's context, e.g. under TestClient)
+    """
+    with count_queries(name) as stats:
+        with _budgets_lock:
+            _budgets.append(stats)
+        try:
+            yield stats
+        finally:
+            with _budgets_lock:
+                _budgets.remove(stats)
+
+
+@contextmanager
+def assert_query_budget(max_queries: int, name: str = "block"):
+    """
+    Fail with AssertionError when the block runs more than max_queries
+    statements, e.g. to pin the query count of an endpoint:
+
+        with assert_query_budget(3):
+            client.get("/api/sla/breaches/")
+    """
+    with observe_queries(name) as stats:
+        yield stats
+
+    if stats.count > max_queries:
+        statements = "\n".join(
+            f"  {n}x {' '.join(statement.split())[:200]}"
+            for statement, n in sorted(stats.statements.items(), key=lambda item: -item[1])
+        )
+        raise AssertionError(
+            f"{name} ran {stats.count} queries, budget is {max_queries}:\n{statements}"
+        )
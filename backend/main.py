@@ -1,18 +1,28 @@
 from fastapi import FastAPI
+from fastapi.responses import Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import logging
+import anyio.to_thread
 
 from api.routes import router
+from api.pagination import NEXT_CURSOR_HEADER
+from api.middleware import (
+    QUERY_COUNT_HEADER, QUERY_TIME_HEADER, REQUEST_ID_HEADER,
+    MetricsMiddleware, ProfilingMiddleware, QueryCountMiddleware, RequestContextMiddleware
+)
 from config.settings import settings
+from config.logging_config import setup_logging
 from database.connection import init_db
 from services.auto_sync_service import auto_sync_service
+from services.scheduler_service import rollup_scheduler, sla_scheduler
+from services.cache_service import analytics_cache
+from services.directory_cache import directory_cache
+from services.profiling_service import request_profiler
+from services.telemetry_service import CONTENT_TYPE as METRICS_CONTENT_TYPE, registry as metrics_registry
 from api import admin
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Configure logging (levels, format and correlation ids come from settings)
+setup_logging()
 logger = logging.getLogger(__name__)
 
 
@@ -28,6 +38,12 @@ async def lifespan(app: FastAPI):
     print("🚀 Starting Email Monitoring System")
     print("="*60)
     
+    # Route handlers are plain functions run in AnyIO's worker threads, so
+    # blocking database and IMAP calls never stall the event loop
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = settings.api_threadpool_size
+    print(f"🧵 Request thread pool: {settings.api_threadpool_size} thread(s)")
+    
     try:
         # Initialize database
         print("📊 Initializing database...")
@@ -37,6 +53,39 @@ async def lifespan(app: FastAPI):
         print(f"❌ Failed to initialize database: {e}")
         raise
     
+    # Backfill SLA deadlines and metrics rollups for data stored before they existed
+    try:
+        from database.connection import SessionLocal
+        from services.analytics_service import recompute_sla_deadlines
+        from services.metrics_rollup_service import ensure_metrics_rollups
+        
+        db = SessionLocal()
+        try:
+            recompute_sla_deadlines(db, only_missing=True)
+            ensure_metrics_rollups(db)
+        finally:
+            db.close()
+    except Exception as e:
+        print(f"⚠️  Failed to backfill derived data: {e}")
+    
+    # SLA scheduler startup
+    if settings.enable_sla_scheduler:
+        try:
+            sla_scheduler.start()
+        except Exception as e:
+            print(f"⚠️  Failed to start SLA scheduler: {e}")
+    else:
+        print(f"\n⏰ SLA scheduler is DISABLED in settings (ENABLE_SLA_SCHEDULER)")
+    
+    # Rollup reconciliation runs whether or not the SLA scheduler is enabled
+    if settings.metrics_rollup_rebuild_hours > 0:
+        try:
+            rollup_scheduler.start()
+        except Exception as e:
+            print(f"⚠️  Failed to start metrics rollup rebuild: {e}")
+    else:
+        print(f"\n🧮 Metrics rollup rebuild is DISABLED in settings (METRICS_ROLLUP_REBUILD_HOURS=0)")
+    
     # Auto-sync startup
     if settings.enable_auto_sync:
         print(f"\n📧 Auto-sync is ENABLED in settings")
@@ -67,6 +116,15 @@ async def lifespan(app: FastAPI):
         auto_sync_service.stop()
         print("✅ Auto-sync stopped")
     
+    # Stop SLA scheduler
+    if sla_scheduler.is_running:
+        print("⏸️  Stopping SLA scheduler...")
+        sla_scheduler.stop()
+        print("✅ SLA scheduler stopped")
+    
+    if rollup_scheduler.is_running:
+        rollup_scheduler.stop()
+    
     print("👋 Shutdown complete")
     print("="*60 + "\n")
 
@@ -98,8 +156,22 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Pagination cursor, log correlation id, per-request query stats (debug mode)
+    expose_headers=[NEXT_CURSOR_HEADER, REQUEST_ID_HEADER, QUERY_COUNT_HEADER, QUERY_TIME_HEADER],
 )
 
+# Request latency histograms for GET /metrics
+app.add_middleware(MetricsMiddleware)
+
+# SQL query count and DB time per request; N+1 warnings, X-DB-Query-* headers in debug mode
+app.add_middleware(QueryCountMiddleware)
+
+# Sampled or X-Debug-Profile requests get a stack profile (inside the request id scope)
+app.add_middleware(ProfilingMiddleware)
+
+# Correlation id per request for log records (added last, so it runs first)
+app.add_middleware(RequestContextMiddleware)
+
 
 # Include API router
 app.include_router(router, prefix="/api", tags=["Email Monitoring"])
@@ -122,13 +194,16 @@ async def root():
         },
         "documentation": {
             "swagger": "/docs",
-            "redoc": "/redoc"
+            "redoc": "/redoc",
+            "prometheus": "/metrics"
         },
         "endpoints": {
             "departments": "/api/departments/",
             "team_members": "/api/team-members/",
             "emails": "/api/emails/",
             "metrics": "/api/metrics/",
+            "dashboard": "/api/dashboard/summary",
+            "reports": "/api/reports/trends",
             "sla_breaches": "/api/sla/breaches/",
             "alerts": "/api/alerts/",
             "auto_sync_control": "/api/auto-sync/"
@@ -155,6 +230,17 @@ async def health_check():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """
+    Prometheus scrape endpoint (text exposition format 0.0.4)
+    """
+    if not settings.enable_metrics_endpoint:
+        return Response(status_code=404)
+    
+    return Response(metrics_registry.render(), media_type=METRICS_CONTENT_TYPE)
+
+
 @app.get("/status")
 async def system_status():
     """
@@ -179,6 +265,13 @@ async def system_status():
             "interval_minutes": auto_sync_status["interval_minutes"],
             "enabled_in_settings": settings.enable_auto_sync
         },
+        "sla_scheduler": sla_scheduler.get_status(),
+        "rollup_scheduler": rollup_scheduler.get_status(),
+        "profiling": request_profiler.get_status(),
+        "cache": {
+            "analytics": analytics_cache.get_status(),
+            "directory": directory_cache.get_status()
+        },
         "database": {
             "type": "MySQL",
             "status": "connected"
@@ -202,6 +202,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from database.connection import SessionLocal, init_db
 from database.models import Department, TeamMember, Email, Alert
+from services.metrics_rollup_service import rebuild_metrics_rollups
 from datetime import datetime, timedelta
 import random
 
@@ -451,6 +452,7 @@ Best regards,
                 team_member_id=team_member.id,
                 department_id=department.id,
                 received_at=received_at,
+                sla_deadline_at=received_at + timedelta(hours=department.sla_threshold_hours),
                 is_client_email=True,
                 is_replied=False,
                 is_sla_breach=False,
@@ -491,6 +493,9 @@ Best regards,
         db.commit()
         print(f"  ✅ Total: {emails_created} sample emails created")
         
+        # Sample emails bypass the ingest path, so recompute the metrics rollups
+        rebuild_metrics_rollups(db)
+        
         # Print detailed summary
         print("\n" + "="*60)
         print("📊 DATABASE SUMMARY:")
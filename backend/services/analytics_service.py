@@ -1,12 +1,210 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
-from database.models import Email, TeamMember, Department, Alert
+from sqlalchemy import func, and_, or_, insert, update, Integer
+from sqlalchemy.exc import IntegrityError
+from database.models import Email, TeamMember, Department, Alert, DepartmentMetricsHourly, TeamMemberMetricsHourly
+from database.dialect import as_datetime, time_bucket
+from services.directory_cache import directory_cache
+from services.cache_service import analytics_cache, cached
+from config.logging_config import log_sampled
+from services.metrics_rollup_service import record_emails_received, record_emails_replied, rollup_totals
+from services.response_histogram_service import response_time_percentiles
+from services.telemetry_service import SLA_ALERTS, SLA_CHECK_SECONDS, SLA_PENDING_EMAILS
+from config.settings import settings
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Sequence
+from email.utils import make_msgid
 import logging
 
 logger = logging.getLogger(__name__)
 
+def _message_key_filters(keys: set) -> List:
+    """
+    WHERE clauses matching (recipient, message_id) pairs through the
+    uq_emails_recipient_message_id index: one recipient = ? AND
+    message_id IN (...) clause per recipient, chunked to stay within driver limits
+    """
+    by_recipient: Dict[str, List[str]] = {}
+    for recipient, message_id in keys:
+        by_recipient.setdefault(recipient, []).append(message_id)
+    
+    return [
+        and_(Email.recipient == recipient, Email.message_id.in_(message_ids[start:start + 500]))
+        for recipient, message_ids in sorted(by_recipient.items())
+        for start in range(0, len(message_ids), 500)
+    ]
+
+def _existing_message_keys(db: Session, keys: set) -> set:
+    """
+    Return the (recipient, message_id) pairs that are already stored (indexed lookups)
+    """
+    existing = set()
+    
+    for clause in _message_key_filters(keys):
+        rows = db.query(Email.recipient, Email.message_id).filter(clause).all()
+        existing.update((row.recipient, row.message_id) for row in rows)
+    
+    return existing
+
+def _sla_deadline(db: Session, received_at: datetime, department_id: Optional[int]) -> datetime:
+    """When an unreplied email breaches its department's SLA"""
+    return received_at + timedelta(hours=directory_cache.get_sla_threshold(db, department_id))
+
+def _notify_sla_scheduler(deadline: Optional[datetime]):
+    """Let the deadline-driven SLA scheduler wake earlier for a new deadline"""
+    from services.scheduler_service import sla_scheduler
+    
+    if deadline is not None:
+        sla_scheduler.notify_deadline(deadline)
+
+def recompute_sla_deadlines(
+    db: Session,
+    department_id: Optional[int] = None,
+    only_missing: bool = False,
+    commit: bool = True
+) -> int:
+    """
+    Recompute sla_deadline_at for pending emails
+    
+    Called after a department's threshold changes (department_id) and at
+    startup to backfill rows stored before the column existed
+    (only_missing). Returns the number of emails updated.
+    """
+    query = db.query(Email.id, Email.received_at, Email.department_id).filter(
+        Email.is_replied == False
+    )
+    
+    if department_id is not None:
+        query = query.filter(Email.department_id == department_id)
+    if only_missing:
+        query = query.filter(Email.sla_deadline_at.is_(None))
+    
+    rows = [
+        {"id": row.id, "sla_deadline_at": _sla_deadline(db, row.received_at, row.department_id)}
+        for row in query.all()
+    ]
+    
+    if rows:
+        # One executemany UPDATE by primary key
+        db.execute(update(Email), rows)
+        logger.info("⏱️  Recomputed SLA deadline for %s pending email(s)", len(rows))
+    
+    if commit:
+        db.commit()
+    
+    if rows:
+        analytics_cache.invalidate()
+        _notify_sla_scheduler(min(row["sla_deadline_at"] for row in rows))
+    
+    return len(rows)
+
+def log_emails_received_bulk(
+    db: Session,
+    emails: List[Dict],
+    require_team_member: bool = False,
+    commit: bool = True
+) -> List[Email]:
+    """
+    Log a batch of received emails with one dedup query, one executemany
+    INSERT and one commit (team members come from the directory cache)
+    
+    Each item has sender, recipient, subject and body, and optionally
+    team_member_id, is_client_email, message_id and received_at. Items
+    without team_member_id are assigned to the active team member owning the
+    recipient address (and dropped when require_team_member is set).
+    Duplicate (recipient, message_id) pairs, in the batch or already stored,
+    are skipped. Returns the newly stored emails.
+    """
+    if not emails:
+        return []
+    
+    logger.debug("📧 Logging %s received email(s)", len(emails))
+    
+    try:
+        # Resolve team members from the in-process directory (no per-email queries)
+        missing = sorted(
+            e["team_member_id"] for e in emails
+            if e.get("team_member_id") and not directory_cache.get_member(db, e["team_member_id"])
+        )
+        if missing:
+            raise ValueError(f"Team member {missing[0]} not found")
+        
+        rows = []
+        for item in emails:
+            if item.get("team_member_id"):
+                member = directory_cache.get_member(db, item["team_member_id"])
+            else:
+                member = directory_cache.get_active_member_by_email(db, item["recipient"])
+            
+            if member is None and require_team_member:
+                log_sampled(logger, logging.WARNING, "analytics.unknown_recipient",
+                            "❌ No active team member found for: %s", item['recipient'])
+                continue
+            
+            received_at = item.get("received_at") or datetime.utcnow()
+            department_id = member.department_id if member else None
+            
+            rows.append({
+                "sender": item["sender"],
+                "recipient": item["recipient"],
+                "subject": item["subject"],
+                "body": item["body"],
+                # Every row gets a Message-ID so it can be deduplicated and read back
+                "message_id": item.get("message_id") or make_msgid(domain="email-monitoring"),
+                "team_member_id": member.id if member else None,
+                "department_id": department_id,
+                "received_at": received_at,
+                "sla_deadline_at": _sla_deadline(db, received_at, department_id),
+                "is_client_email": item.get("is_client_email", True),
+                "is_replied": False
+            })
+        
+        # At-least-once safe: a concurrent writer may win the unique index, so retry once
+        for attempt in range(2):
+            keys = {(r["recipient"], r["message_id"]) for r in rows}
+            existing = _existing_message_keys(db, keys)
+            
+            seen = set()
+            new_rows = []
+            for row in rows:
+                key = (row["recipient"], row["message_id"])
+                if key in existing or key in seen:
+                    continue
+                seen.add(key)
+                new_rows.append(row)
+            
+            if not new_rows:
+                logger.debug("⚠️ All %s email(s) already stored, nothing to log", len(rows))
+                return []
+            
+            try:
+                db.execute(insert(Email), new_rows)
+                record_emails_received(db, new_rows)
+                if commit:
+                    db.commit()
+                else:
+                    db.flush()
+                break
+            except IntegrityError:
+                db.rollback()
+                if attempt:
+                    raise
+        
+        stored = []
+        for clause in _message_key_filters(seen):
+            stored.extend(db.query(Email).filter(clause).all())
+        
+        logger.debug("✅ Logged %s email(s), skipped %s", len(stored), len(emails) - len(stored))
+        
+        if stored:
+            analytics_cache.invalidate()
+            _notify_sla_scheduler(min(email.sla_deadline_at for email in stored))
+        return stored
+        
+    except Exception as e:
+        db.rollback()
+        logger.error("Error logging emails: %s", e)
+        raise
+
 def log_email_received(
     db: Session,
     sender: str,
@@ -14,128 +212,211 @@ def log_email_received(
     subject: str,
     body: str,
     team_member_id: Optional[int] = None,
-    is_client_email: bool = True
+    is_client_email: bool = True,
+    message_id: Optional[str] = None
 ) -> Email:
     """
     Log a received email in the database
+    
+    Single-email form of log_emails_received_bulk; a repeated Message-ID
+    returns the already stored email.
     """
-    print(f"\n📧 Logging new email:")
-    print(f"  From: {sender}")
-    print(f"  To: {recipient}")
-    print(f"  Subject: {subject}")
+    stored = log_emails_received_bulk(db, [{
+        "sender": sender,
+        "recipient": recipient,
+        "subject": subject,
+        "body": body,
+        "team_member_id": team_member_id,
+        "is_client_email": is_client_email,
+        "message_id": message_id
+    }])
     
-    try:
-        # Get department from team member if provided
-        department_id = None
-        if team_member_id:
-            team_member = db.query(TeamMember).filter(TeamMember.id == team_member_id).first()
-            if team_member:
-                department_id = team_member.department_id
-                print(f"  Assigned to: {team_member.name} ({team_member.department.name})")
-        
-        email = Email(
-            sender=sender,
-            recipient=recipient,
-            subject=subject,
-            body=body,
-            team_member_id=team_member_id,
-            department_id=department_id,
-            received_at=datetime.utcnow(),
-            is_client_email=is_client_email,
-            is_replied=False
-        )
-        
-        db.add(email)
+    if stored:
+        return stored[0]
+    
+    return db.query(Email).filter(
+        Email.recipient == recipient,
+        Email.message_id == message_id
+    ).first()
+
+def _reply_values(db: Session, received_at: datetime, department_id: Optional[int],
+                  replied_at: datetime) -> Dict:
+    """
+    Reply columns for an email: response time in hours and the SLA verdict
+    """
+    # A reply can predate the ingest time when a mailbox is synced late
+    response_time = max(0.0, (replied_at - received_at).total_seconds() / 3600)  # hours
+    sla_threshold = directory_cache.get_sla_threshold(db, department_id)
+    
+    return {
+        "is_replied": True,
+        "replied_at": replied_at,
+        "response_time_hours": response_time,
+        "is_sla_breach": response_time > sla_threshold
+    }
+
+def mark_emails_replied_bulk(
+    db: Session,
+    recipient: str,
+    replies: Dict[str, datetime],
+    commit: bool = True
+) -> int:
+    """
+    Mark pending emails to one recipient as replied, keyed by Message-ID
+    
+    replies maps an inbound Message-ID to the time the reply was sent.
+    Pending emails are looked up through the (recipient, message_id) index
+    and updated in one executemany UPDATE by primary key. Returns the
+    number of emails marked replied.
+    """
+    if not replies:
+        return 0
+    
+    pending = []
+    keys = list(replies)
+    
+    # Chunk the IN list so very large Sent folder scans stay within driver limits
+    for start in range(0, len(keys), 500):
+        pending.extend(db.query(
+            Email.id, Email.message_id, Email.received_at, Email.department_id, Email.team_member_id
+        ).filter(
+            Email.recipient == recipient,
+            Email.message_id.in_(keys[start:start + 500]),
+            Email.is_replied == False
+        ).all())
+    
+    if not pending:
+        return 0
+    
+    rows = [
+        {"id": row.id, **_reply_values(db, row.received_at, row.department_id, replies[row.message_id])}
+        for row in pending
+    ]
+    
+    db.execute(update(Email), rows)
+    
+    by_id = {row.id: row for row in pending}
+    record_emails_replied(db, [
+        {
+            "received_at": by_id[row["id"]].received_at,
+            "department_id": by_id[row["id"]].department_id,
+            "team_member_id": by_id[row["id"]].team_member_id,
+            **row
+        }
+        for row in rows
+    ])
+    
+    if commit:
         db.commit()
-        db.refresh(email)
-        
-        print(f"✅ Email logged successfully (ID: {email.id})")
-        return email
-        
-    except Exception as e:
-        db.rollback()
-        print(f"❌ Error logging email: {e}")
-        logger.error(f"Error logging email: {e}")
-        raise
+    analytics_cache.invalidate()
+    
+    logger.debug("📨 Marked %s email(s) to %s as replied", len(rows), recipient)
+    return len(rows)
 
 def log_email_reply(db: Session, email_id: int) -> Email:
     """
     Mark an email as replied and calculate response time
     """
-    print(f"\n📩 Marking email {email_id} as replied")
+    logger.debug("📩 Marking email %s as replied", email_id)
     
     try:
         email = db.query(Email).filter(Email.id == email_id).first()
         
         if not email:
-            print(f"❌ Email {email_id} not found")
+            logger.debug("❌ Email %s not found", email_id)
             raise ValueError(f"Email {email_id} not found")
         
         if email.is_replied:
-            print(f"⚠️  Email {email_id} already marked as replied")
+            logger.debug("⚠️  Email %s already marked as replied", email_id)
             return email
         
-        # Calculate response time
-        replied_at = datetime.utcnow()
-        response_time = (replied_at - email.received_at).total_seconds() / 3600  # hours
+        # Calculate response time and check SLA breach
+        values = _reply_values(db, email.received_at, email.department_id, datetime.utcnow())
         
         email.is_replied = True
-        email.replied_at = replied_at
-        email.response_time_hours = response_time
+        email.replied_at = values["replied_at"]
+        email.response_time_hours = values["response_time_hours"]
+        email.is_sla_breach = values["is_sla_breach"]
         
-        # Check SLA breach
-        sla_threshold = 4.0  # default
-        if email.department_id:
-            department = db.query(Department).filter(Department.id == email.department_id).first()
-            if department:
-                sla_threshold = department.sla_threshold_hours
+        record_emails_replied(db, [{
+            "received_at": email.received_at,
+            "department_id": email.department_id,
+            "team_member_id": email.team_member_id,
+            **values
+        }])
         
-        email.is_sla_breach = response_time > sla_threshold
+        sla_threshold = directory_cache.get_sla_threshold(db, email.department_id)
         
         db.commit()
         db.refresh(email)
+        analytics_cache.invalidate()
         
-        print(f"✅ Email replied:")
-        print(f"  Response time: {response_time:.2f} hours")
-        print(f"  SLA threshold: {sla_threshold:.2f} hours")
-        print(f"  SLA breach: {'YES ⚠️' if email.is_sla_breach else 'NO ✅'}")
+        logger.debug("✅ Email %s replied: %.2f hrs (SLA %.2f hrs, breach: %s)",
+                     email_id, email.response_time_hours, sla_threshold, email.is_sla_breach)
         
         return email
         
     except Exception as e:
         db.rollback()
-        print(f"❌ Error marking email as replied: {e}")
-        logger.error(f"Error marking email as replied: {e}")
+        logger.error("Error marking email as replied: %s", e)
         raise
 
-def get_department_metrics(db: Session, department_id: Optional[int] = None) -> List[Dict]:
+def _average_response_time(totals) -> Optional[float]:
+    """Average response time in hours from rollup sums"""
+    if not totals.response_count:
+        return None
+    return totals.response_hours_sum / totals.response_count
+
+def _percentile_fields(sketch: Optional[Dict]) -> Dict:
+    """p50/p90/p99 response times from a merged histogram (None without replies)"""
+    values = sketch['percentiles'] if sketch else {}
+    return {
+        'p50_response_time': values.get(0.5),
+        'p90_response_time': values.get(0.9),
+        'p99_response_time': values.get(0.99)
+    }
+
+@cached(analytics_cache)
+def get_department_metrics(db: Session, department_id: Optional[int] = None,
+                           department_ids: Optional[Sequence[int]] = None) -> List[Dict]:
     """
-    Get metrics for departments
+    Get metrics for departments (all, one, or a batch of ids) in one grouped query
+    
+    Pass department_ids as a tuple: arguments are part of the cache key.
     """
-    print(f"\n📊 Calculating department metrics...")
+    logger.debug("📊 Calculating department metrics...")
+    
+    if department_id:
+        department_ids = (department_id,)
     
     try:
+        # Totals come from the hourly rollup (O(buckets)), not the emails table
+        totals = rollup_totals(db, DepartmentMetricsHourly, 'department_id', scope_ids=department_ids)
+        
         query = db.query(
             Department.id.label('department_id'),
             Department.name.label('department_name'),
             Department.sla_threshold_hours,
-            func.count(Email.id).label('total_emails'),
-            func.sum(func.cast(Email.is_replied, Integer)).label('replied_emails'),
-            func.avg(Email.response_time_hours).label('avg_response_time'),
-            func.sum(func.cast(Email.is_sla_breach, Integer)).label('sla_breaches')
-        ).outerjoin(Email, Department.id == Email.department_id).group_by(Department.id)
+            totals.c.received_count,
+            totals.c.replied_count,
+            totals.c.breach_count,
+            totals.c.response_hours_sum,
+            totals.c.response_count
+        ).outerjoin(totals, totals.c.department_id == Department.id)
         
-        if department_id:
-            query = query.filter(Department.id == department_id)
+        if department_ids is not None:
+            query = query.filter(Department.id.in_(list(department_ids)))
         
         results = query.all()
+        percentiles = response_time_percentiles(db, 'department', department_ids)
         
         metrics = []
         for result in results:
-            total = result.total_emails or 0
-            replied = result.replied_emails or 0
+            total = result.received_count or 0
+            replied = result.replied_count or 0
             pending = total - replied
-            sla_breaches = result.sla_breaches or 0
+            sla_breaches = result.breach_count or 0
+            avg_response_time = _average_response_time(result)
             
             compliance_rate = ((total - sla_breaches) / total * 100) if total > 0 else 100.0
             
@@ -145,57 +426,68 @@ def get_department_metrics(db: Session, department_id: Optional[int] = None) ->
                 'total_emails': total,
                 'replied_emails': replied,
                 'pending_emails': pending,
-                'average_response_time': round(result.avg_response_time, 2) if result.avg_response_time else None,
+                'average_response_time': round(avg_response_time, 2) if avg_response_time else None,
                 'sla_breaches': sla_breaches,
                 'sla_compliance_rate': round(compliance_rate, 2),
-                'sla_threshold_hours': result.sla_threshold_hours
+                'sla_threshold_hours': result.sla_threshold_hours,
+                **_percentile_fields(percentiles.get(result.department_id))
             }
             metrics.append(metric)
             
-            print(f"\n  {result.department_name}:")
-            print(f"    Total: {total}, Replied: {replied}, Pending: {pending}")
-            print(f"    Avg Response: {metric['average_response_time']} hrs")
-            print(f"    SLA Compliance: {compliance_rate:.2f}%")
+            log_sampled(logger, logging.DEBUG, "analytics.department_metrics",
+                        "  %s: total %d, replied %d, pending %d, avg %s hrs, compliance %.2f%%",
+                        result.department_name, total, replied, pending,
+                        metric['average_response_time'], compliance_rate)
         
         return metrics
         
     except Exception as e:
-        print(f"❌ Error calculating department metrics: {e}")
-        logger.error(f"Error calculating department metrics: {e}")
+        logger.error("Error calculating department metrics: %s", e)
         raise
 
-def get_team_member_metrics(db: Session, team_member_id: Optional[int] = None) -> List[Dict]:
+@cached(analytics_cache)
+def get_team_member_metrics(db: Session, team_member_id: Optional[int] = None,
+                            team_member_ids: Optional[Sequence[int]] = None) -> List[Dict]:
     """
-    Get metrics for team members
+    Get metrics for team members (all, one, or a batch of ids) in one grouped query
+    
+    Pass team_member_ids as a tuple: arguments are part of the cache key.
     """
-    print(f"\n👥 Calculating team member metrics...")
+    logger.debug("👥 Calculating team member metrics...")
+    
+    if team_member_id:
+        team_member_ids = (team_member_id,)
     
     try:
+        totals = rollup_totals(db, TeamMemberMetricsHourly, 'team_member_id', scope_ids=team_member_ids)
+        
         query = db.query(
             TeamMember.id.label('team_member_id'),
             TeamMember.name.label('team_member_name'),
             TeamMember.email.label('team_member_email'),
             Department.name.label('department_name'),
-            func.count(Email.id).label('total_emails'),
-            func.sum(func.cast(Email.is_replied, Integer)).label('replied_emails'),
-            func.avg(Email.response_time_hours).label('avg_response_time'),
-            func.sum(func.cast(Email.is_sla_breach, Integer)).label('sla_breaches')
+            totals.c.received_count,
+            totals.c.replied_count,
+            totals.c.breach_count,
+            totals.c.response_hours_sum,
+            totals.c.response_count
         ).join(Department, TeamMember.department_id == Department.id
-        ).outerjoin(Email, TeamMember.id == Email.team_member_id
-        ).filter(TeamMember.is_active == True
-        ).group_by(TeamMember.id)
+        ).outerjoin(totals, totals.c.team_member_id == TeamMember.id
+        ).filter(TeamMember.is_active == True)
         
-        if team_member_id:
-            query = query.filter(TeamMember.id == team_member_id)
+        if team_member_ids is not None:
+            query = query.filter(TeamMember.id.in_(list(team_member_ids)))
         
         results = query.all()
+        percentiles = response_time_percentiles(db, 'team_member', team_member_ids)
         
         metrics = []
         for result in results:
-            total = result.total_emails or 0
-            replied = result.replied_emails or 0
+            total = result.received_count or 0
+            replied = result.replied_count or 0
             pending = total - replied
-            sla_breaches = result.sla_breaches or 0
+            sla_breaches = result.breach_count or 0
+            avg_response_time = _average_response_time(result)
             
             compliance_rate = ((total - sla_breaches) / total * 100) if total > 0 else 100.0
             
@@ -207,157 +499,481 @@ def get_team_member_metrics(db: Session, team_member_id: Optional[int] = None) -
                 'total_emails': total,
                 'replied_emails': replied,
                 'pending_emails': pending,
-                'average_response_time': round(result.avg_response_time, 2) if result.avg_response_time else None,
+                'average_response_time': round(avg_response_time, 2) if avg_response_time else None,
                 'sla_breaches': sla_breaches,
-                'sla_compliance_rate': round(compliance_rate, 2)
+                'sla_compliance_rate': round(compliance_rate, 2),
+                **_percentile_fields(percentiles.get(result.team_member_id))
             }
             metrics.append(metric)
             
-            print(f"\n  {result.team_member_name} ({result.department_name}):")
-            print(f"    Total: {total}, Replied: {replied}, Pending: {pending}")
-            print(f"    Avg Response: {metric['average_response_time']} hrs")
-            print(f"    SLA Compliance: {compliance_rate:.2f}%")
+            log_sampled(logger, logging.DEBUG, "analytics.team_member_metrics",
+                        "  %s (%s): total %d, replied %d, pending %d, avg %s hrs, compliance %.2f%%",
+                        result.team_member_name, result.department_name, total, replied, pending,
+                        metric['average_response_time'], compliance_rate)
         
         return metrics
         
     except Exception as e:
-        print(f"❌ Error calculating team member metrics: {e}")
-        logger.error(f"Error calculating team member metrics: {e}")
+        logger.error("Error calculating team member metrics: %s", e)
+        raise
+
+@cached(analytics_cache)
+def get_response_time_percentiles(
+    db: Session,
+    scope: str = 'department',
+    scope_ids: Optional[Sequence[int]] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None
+) -> List[Dict]:
+    """
+    p50/p90/p99 response times per department or team member over a date range
+    
+    Merges the stored daily histograms instead of sorting raw response times.
+    Pass scope_ids as a tuple: arguments are part of the cache key.
+    """
+    logger.debug("⏱️  Calculating %s response-time percentiles...", scope)
+    
+    try:
+        sketches = response_time_percentiles(db, scope, scope_ids, start, end)
+        
+        return [
+            {
+                'scope': scope,
+                'scope_id': scope_id,
+                'replied_emails': sketch['count'],
+                **_percentile_fields(sketch)
+            }
+            for scope_id, sketch in sorted(sketches.items())
+        ]
+        
+    except Exception as e:
+        logger.error("Error calculating response-time percentiles: %s", e)
+        raise
+
+# ============================================================================
+# DASHBOARD SUMMARY
+# ============================================================================
+
+@cached(analytics_cache)
+def get_dashboard_summary(db: Session, recent_breaches: int = 5) -> Dict:
+    """
+    Headline numbers for the dashboard
+    
+    Totals come from the department rollup plus one indexed aggregate over
+    emails without a department; pending breaches are counted on the
+    deadline index, so cost follows the number of rollup buckets, not emails.
+    """
+    logger.debug("📈 Calculating dashboard summary...")
+    
+    try:
+        now = datetime.utcnow()
+        
+        rollup = db.query(
+            func.sum(DepartmentMetricsHourly.received_count),
+            func.sum(DepartmentMetricsHourly.replied_count),
+            func.sum(DepartmentMetricsHourly.breach_count),
+            func.sum(DepartmentMetricsHourly.response_hours_sum),
+            func.sum(DepartmentMetricsHourly.response_count)
+        ).one()
+        
+        unassigned = db.query(
+            func.count(Email.id),
+            func.sum(func.cast(Email.is_replied, Integer)),
+            func.sum(func.cast(Email.is_sla_breach, Integer)),
+            func.sum(Email.response_time_hours),
+            func.count(Email.response_time_hours)
+        ).filter(Email.department_id.is_(None)).one()
+        
+        total, replied, confirmed, hours_sum, hours_count = (
+            (a or 0) + (b or 0) for a, b in zip(rollup, unassigned)
+        )
+        
+        pending_breaches = db.query(func.count(Email.id)).filter(
+            _pending_breach_filter(now)
+        ).scalar() or 0
+        
+        sla_breaches = confirmed + pending_breaches
+        compliance_rate = ((total - sla_breaches) / total * 100) if total > 0 else 100.0
+        
+        # Newest breaches (confirmed or pending) for the dashboard table
+        recent = _breach_query(db).filter(
+            or_(Email.is_sla_breach == True, _pending_breach_filter(now))
+        ).order_by(Email.received_at.desc(), Email.id.desc()).limit(recent_breaches).all()
+        
+        summary = {
+            'total_emails': int(total),
+            'replied_emails': int(replied),
+            'pending_emails': int(total - replied),
+            'average_response_time': round(hours_sum / hours_count, 2) if hours_count else None,
+            'sla_breaches': int(sla_breaches),
+            'confirmed_breaches': int(confirmed),
+            'pending_breaches': int(pending_breaches),
+            'sla_compliance_rate': round(max(compliance_rate, 0.0), 2),
+            'recent_breaches': [
+                {
+                    'email_id': row.id,
+                    'subject': row.subject,
+                    'sender': row.sender,
+                    'recipient': row.recipient,
+                    'received_at': row.received_at,
+                    'response_time_hours': row.response_time_hours,
+                    'status': 'BREACHED' if row.replied_at else 'PENDING_BREACH'
+                }
+                for row in recent
+            ]
+        }
+        
+        logger.debug("Total: %s, Breaches: %s", summary['total_emails'], summary['sla_breaches'])
+        return summary
+        
+    except Exception as e:
+        logger.error("Error calculating dashboard summary: %s", e)
         raise
 
+# ============================================================================
+# REPORTS
+# ============================================================================
+
+REPORT_BUCKETS = ("day", "week", "month")
+
+def _bucket_floor(value: datetime, bucket: str) -> datetime:
+    """Start of the day, ISO week (Monday) or month containing value"""
+    day = value.replace(hour=0, minute=0, second=0, microsecond=0)
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+def _next_bucket(value: datetime, bucket: str) -> datetime:
+    if bucket == "week":
+        return value + timedelta(days=7)
+    if bucket == "month":
+        return value.replace(year=value.year + value.month // 12, month=value.month % 12 + 1)
+    return value + timedelta(days=1)
+
+def _report_row(received=0, replied=0, breaches=0, hours_sum=0.0, hours_count=0) -> Dict:
+    received = int(received or 0)
+    breaches = int(breaches or 0)
+    compliance_rate = ((received - breaches) / received * 100) if received > 0 else 100.0
+    
+    return {
+        'total_emails': received,
+        'replied_emails': int(replied or 0),
+        'average_response_time': round(hours_sum / hours_count, 2) if hours_count else None,
+        'sla_breaches': breaches,
+        'sla_compliance_rate': round(max(compliance_rate, 0.0), 2)
+    }
+
+@cached(analytics_cache)
+def get_report_trends(db: Session, start: datetime, end: datetime, bucket: str = "week") -> Dict:
+    """
+    Per-bucket and per-department report totals for [start, end)
+    
+    start is aligned down to its bucket so the first point covers a whole
+    day/week/month. Counts come from a GROUP BY over the hourly department
+    rollup plus one over emails without a department; breaches are the
+    confirmed ones (replied after the SLA), as in the department metrics.
+    """
+    if bucket not in REPORT_BUCKETS:
+        raise ValueError(f"Unsupported report bucket: {bucket}")
+    
+    logger.debug("📈 Building %s report from %s to %s...", bucket, start, end)
+    
+    try:
+        start = _bucket_floor(start, bucket)
+        
+        # (bucket_start, department_id) -> [received, replied, breaches, hours_sum, hours_count]
+        cells: Dict[tuple, List] = {}
+        
+        rollup_bucket = time_bucket(db, DepartmentMetricsHourly.bucket_start, bucket)
+        rollup_rows = db.query(
+            rollup_bucket.label("bucket"),
+            DepartmentMetricsHourly.department_id,
+            func.sum(DepartmentMetricsHourly.received_count),
+            func.sum(DepartmentMetricsHourly.replied_count),
+            func.sum(DepartmentMetricsHourly.breach_count),
+            func.sum(DepartmentMetricsHourly.response_hours_sum),
+            func.sum(DepartmentMetricsHourly.response_count)
+        ).filter(
+            DepartmentMetricsHourly.bucket_start >= start,
+            DepartmentMetricsHourly.bucket_start < end
+        ).group_by(rollup_bucket, DepartmentMetricsHourly.department_id).all()
+        
+        email_bucket = time_bucket(db, Email.received_at, bucket)
+        unassigned_rows = db.query(
+            email_bucket.label("bucket"),
+            Email.department_id,
+            func.count(Email.id),
+            func.sum(func.cast(Email.is_replied, Integer)),
+            func.sum(func.cast(Email.is_sla_breach, Integer)),
+            func.sum(Email.response_time_hours),
+            func.count(Email.response_time_hours)
+        ).filter(
+            Email.department_id.is_(None),
+            Email.received_at >= start,
+            Email.received_at < end
+        ).group_by(email_bucket, Email.department_id).all()
+        
+        for row in list(rollup_rows) + list(unassigned_rows):
+            key = (as_datetime(row[0]), row[1])
+            cell = cells.setdefault(key, [0, 0, 0, 0.0, 0])
+            for i, value in enumerate(row[2:]):
+                cell[i] += value or 0
+        
+        bucket_starts = []
+        current = start
+        while current < end:
+            bucket_starts.append(current)
+            current = _next_bucket(current, bucket)
+        
+        def _sum(keys) -> List:
+            totals = [0, 0, 0, 0.0, 0]
+            for key in keys:
+                for i, value in enumerate(cells.get(key, ())):
+                    totals[i] += value
+            return totals
+        
+        scopes = {department_id for _, department_id in cells}
+        
+        buckets = [
+            {'bucket_start': bucket_start, **_report_row(*_sum((bucket_start, scope) for scope in scopes))}
+            for bucket_start in bucket_starts
+        ]
+        
+        departments = []
+        for department in sorted(directory_cache.get_departments(db), key=lambda d: d.name):
+            keys = [(bucket_start, department.id) for bucket_start in bucket_starts]
+            departments.append({
+                'department_id': department.id,
+                'department_name': department.name,
+                'sla_threshold_hours': department.sla_threshold_hours,
+                **_report_row(*_sum(keys)),
+                'buckets': [
+                    {'bucket_start': key[0], **_report_row(*cells.get(key, ()))}
+                    for key in keys
+                ]
+            })
+        
+        report = {
+            'start': start,
+            'end': end,
+            'bucket': bucket,
+            'totals': _report_row(*_sum(cells)),
+            'buckets': buckets,
+            'departments': departments
+        }
+        
+        logger.debug("%s %s buckets, %s emails", len(buckets), bucket, report['totals']['total_emails'])
+        return report
+        
+    except Exception as e:
+        logger.error("Error building report: %s", e)
+        raise
+
+# ============================================================================
+# SLA BREACHES
+# ============================================================================
+
+def _breach_query(db: Session):
+    """
+    Projected breach columns with team member and department names joined in
+    """
+    return db.query(
+        Email.id,
+        Email.subject,
+        Email.sender,
+        Email.recipient,
+        Email.department_id,
+        Email.received_at,
+        Email.replied_at,
+        Email.response_time_hours,
+        Email.alert_sent,
+        TeamMember.name.label("team_member_name"),
+        Department.name.label("department_name")
+    ).outerjoin(
+        TeamMember, Email.team_member_id == TeamMember.id
+    ).outerjoin(
+        Department, Email.department_id == Department.id
+    )
+
+def _pending_breach_filter(now: datetime):
+    """
+    SQL predicate for unreplied emails past their stored SLA deadline
+    """
+    return and_(Email.is_replied == False, Email.sla_deadline_at < now)
+
+def get_next_sla_deadline(db: Session, now: Optional[datetime] = None) -> Optional[datetime]:
+    """
+    Earliest upcoming deadline among pending, unalerted emails (index range scan)
+    """
+    return db.query(func.min(Email.sla_deadline_at)).filter(
+        Email.is_replied == False,
+        Email.alert_sent == False,
+        Email.sla_deadline_at >= (now or datetime.utcnow())
+    ).scalar()
+
+@cached(analytics_cache)
 def get_sla_breaches(db: Session, include_pending: bool = True) -> List[Dict]:
     """
     Get all SLA breaches (including potential breaches for unreplied emails)
     """
-    print(f"\n⚠️  Checking SLA breaches...")
+    logger.debug("⚠️  Checking SLA breaches...")
     
     try:
         breaches = []
+        now = datetime.utcnow()
         
         # Get confirmed breaches (replied but exceeded SLA)
-        confirmed_breaches = db.query(Email).filter(
+        confirmed_breaches = _breach_query(db).filter(
             Email.is_sla_breach == True
         ).all()
         
-        for email in confirmed_breaches:
-            breach_info = {
-                'email_id': email.id,
-                'subject': email.subject,
-                'sender': email.sender,
-                'recipient': email.recipient,
-                'team_member_name': email.team_member.name if email.team_member else None,
-                'department_name': email.department.name if email.department else None,
-                'received_at': email.received_at,
-                'replied_at': email.replied_at,
-                'response_time_hours': email.response_time_hours,
-                'sla_threshold': email.department.sla_threshold_hours if email.department else 4.0,
+        for row in confirmed_breaches:
+            breaches.append({
+                'email_id': row.id,
+                'subject': row.subject,
+                'sender': row.sender,
+                'recipient': row.recipient,
+                'team_member_name': row.team_member_name,
+                'department_name': row.department_name,
+                'received_at': row.received_at,
+                'replied_at': row.replied_at,
+                'response_time_hours': row.response_time_hours,
+                'sla_threshold': directory_cache.get_sla_threshold(db, row.department_id),
                 'status': 'BREACHED',
-                'alert_sent': email.alert_sent
-            }
-            breaches.append(breach_info)
+                'alert_sent': row.alert_sent
+            })
         
-        # Get pending breaches (not replied and time elapsed > SLA)
+        # Get pending breaches (not replied and time elapsed > SLA), filtered in SQL
         if include_pending:
-            pending_emails = db.query(Email).filter(
-                Email.is_replied == False
+            pending_breaches = _breach_query(db).filter(
+                _pending_breach_filter(now)
             ).all()
             
-            for email in pending_emails:
-                hours_elapsed = (datetime.utcnow() - email.received_at).total_seconds() / 3600
-                sla_threshold = email.department.sla_threshold_hours if email.department else 4.0
-                
-                if hours_elapsed > sla_threshold:
-                    breach_info = {
-                        'email_id': email.id,
-                        'subject': email.subject,
-                        'sender': email.sender,
-                        'recipient': email.recipient,
-                        'team_member_name': email.team_member.name if email.team_member else None,
-                        'department_name': email.department.name if email.department else None,
-                        'received_at': email.received_at,
-                        'replied_at': None,
-                        'hours_elapsed': round(hours_elapsed, 2),
-                        'sla_threshold': sla_threshold,
-                        'status': 'PENDING_BREACH',
-                        'alert_sent': email.alert_sent
-                    }
-                    breaches.append(breach_info)
-        
-        print(f"  Found {len(breaches)} SLA breach(es)")
+            for row in pending_breaches:
+                hours_elapsed = (now - row.received_at).total_seconds() / 3600
+                breaches.append({
+                    'email_id': row.id,
+                    'subject': row.subject,
+                    'sender': row.sender,
+                    'recipient': row.recipient,
+                    'team_member_name': row.team_member_name,
+                    'department_name': row.department_name,
+                    'received_at': row.received_at,
+                    'replied_at': None,
+                    'hours_elapsed': round(hours_elapsed, 2),
+                    'sla_threshold': directory_cache.get_sla_threshold(db, row.department_id),
+                    'status': 'PENDING_BREACH',
+                    'alert_sent': row.alert_sent
+                })
+        
+        logger.debug("Found %s SLA breach(es)", len(breaches))
         
         return breaches
         
     except Exception as e:
-        print(f"❌ Error getting SLA breaches: {e}")
-        logger.error(f"Error getting SLA breaches: {e}")
+        logger.error("Error getting SLA breaches: %s", e)
         raise
 
-from sqlalchemy import Integer
-
 def check_and_alert_sla_breaches(db: Session) -> List[Dict]:
     """
     Check for SLA breaches and send alerts
+    
+    Breaching emails are selected in one query; alerts are bulk inserted
+    and the emails are flagged with set-based UPDATEs.
     """
-    print(f"\n🚨 Checking for SLA breaches requiring alerts...")
+    with SLA_CHECK_SECONDS.time():
+        return _check_and_alert_sla_breaches(db)
+
+def _pending_email_count(db: Session) -> int:
+    """
+    Unreplied emails from the department rollup, plus the few without a
+    department on the department index (no scan of the pending emails)
+    """
+    received, replied = db.query(
+        func.sum(DepartmentMetricsHourly.received_count),
+        func.sum(DepartmentMetricsHourly.replied_count)
+    ).one()
+    
+    unassigned = db.query(func.count(Email.id)).filter(
+        Email.department_id.is_(None),
+        Email.is_replied == False
+    ).scalar()
+    
+    return int((received or 0) - (replied or 0) + (unassigned or 0))
+
+def _check_and_alert_sla_breaches(db: Session) -> List[Dict]:
+    logger.debug("🚨 Checking for SLA breaches requiring alerts...")
     
     try:
         alerts_sent = []
+        alert_rows = []
+        now = datetime.utcnow()
+        
+        # Backlog gauge: every unreplied email, breached or not
+        SLA_PENDING_EMAILS.set(_pending_email_count(db))
         
         # Find unreplied emails that exceeded SLA and haven't been alerted
-        pending_emails = db.query(Email).filter(
-            and_(
-                Email.is_replied == False,
-                Email.alert_sent == False
-            )
+        pending_breaches = _breach_query(db).filter(
+            _pending_breach_filter(now),
+            Email.alert_sent == False
         ).all()
         
-        for email in pending_emails:
-            hours_elapsed = (datetime.utcnow() - email.received_at).total_seconds() / 3600
-            sla_threshold = email.department.sla_threshold_hours if email.department else 4.0
+        for row in pending_breaches:
+            hours_elapsed = (now - row.received_at).total_seconds() / 3600
+            sla_threshold = directory_cache.get_sla_threshold(db, row.department_id)
             
-            if hours_elapsed > sla_threshold:
-                print(f"\n  ⚠️  SLA breach detected:")
-                print(f"    Email ID: {email.id}")
-                print(f"    Subject: {email.subject}")
-                print(f"    Elapsed: {hours_elapsed:.2f} hrs")
-                print(f"    SLA: {sla_threshold:.2f} hrs")
-                
-                # Send alert (placeholder - implement actual email sending)
-                alert_info = {
-                    'email_id': email.id,
-                    'subject': email.subject,
-                    'hours_elapsed': round(hours_elapsed, 2),
-                    'sla_threshold': sla_threshold,
-                    'team_member': email.team_member.name if email.team_member else 'Unassigned',
-                    'department': email.department.name if email.department else 'Unassigned'
-                }
-                
-                # Mark alert as sent
-                email.alert_sent = True
-                email.alert_sent_at = datetime.utcnow()
-                
-                # Log alert in database
-                alert = Alert(
-                    email_id=email.id,
-                    alert_type='SLA_BREACH',
-                    message=f"Email '{email.subject}' has exceeded SLA by {hours_elapsed - sla_threshold:.2f} hours",
-                    sent_to='admin@company.com'  # Get from config
+            if len(alerts_sent) < 10:
+                logger.debug("⚠️  SLA breach: email %s %r (%.2f hrs, SLA %.2f hrs)",
+                             row.id, row.subject, hours_elapsed, sla_threshold)
+            
+            alerts_sent.append({
+                'email_id': row.id,
+                'subject': row.subject,
+                'hours_elapsed': round(hours_elapsed, 2),
+                'sla_threshold': sla_threshold,
+                'team_member': row.team_member_name or 'Unassigned',
+                'department': row.department_name or 'Unassigned'
+            })
+            
+            alert_rows.append({
+                'email_id': row.id,
+                'alert_type': 'SLA_BREACH',
+                'message': f"Email '{row.subject}' has exceeded SLA by {hours_elapsed - sla_threshold:.2f} hours",
+                'sent_to': settings.alert_email,
+                'sent_at': now
+            })
+        
+        if len(alerts_sent) > 10:
+            logger.debug("... and %s more", len(alerts_sent) - 10)
+        
+        if alert_rows:
+            # Log alerts in database (executemany)
+            db.execute(insert(Alert), alert_rows)
+            
+            # Mark alerts as sent, chunked to keep the IN list bounded
+            email_ids = [row['email_id'] for row in alert_rows]
+            for start in range(0, len(email_ids), 1000):
+                db.query(Email).filter(
+                    Email.id.in_(email_ids[start:start + 1000])
+                ).update(
+                    {Email.alert_sent: True, Email.alert_sent_at: now},
+                    synchronize_session=False
                 )
-                db.add(alert)
-                
-                alerts_sent.append(alert_info)
         
         db.commit()
+        SLA_ALERTS.inc(len(alert_rows))
         
         if alerts_sent:
-            print(f"\n✅ Sent {len(alerts_sent)} alert(s)")
+            analytics_cache.invalidate()
+            logger.info("✅ Sent %s alert(s)", len(alerts_sent))
         else:
-            print(f"\n✅ No new alerts needed")
+            logger.debug("✅ No new alerts needed")
         
         return alerts_sent
         
     except Exception as e:
         db.rollback()
-        print(f"❌ Error checking SLA breaches: {e}")
-        logger.error(f"Error checking SLA breaches: {e}")
-        raise
\ No newline at end of file
+        logger.error("Error checking SLA breaches: %s", e)
+        raise
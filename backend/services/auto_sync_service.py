@@ -1,8 +1,12 @@
+import logging
 import threading
 import time
-from datetime import datetime
 from database.connection import SessionLocal
 from config.settings import settings
+from config.logging_config import correlation_scope
+from services.imap_session_service import imap_session_manager, imap_idle_service
+
+logger = logging.getLogger(__name__)
 
 class AutoSyncService:
     def __init__(self):
@@ -30,6 +34,8 @@ class AutoSyncService:
             return False
         
         self.is_running = False
+        imap_idle_service.stop_all()
+        imap_session_manager.close_all()
         print("🛑 Auto email sync stopped")
         return True
     
@@ -38,38 +44,51 @@ class AutoSyncService:
         return {
             "is_running": self.is_running,
             "interval_minutes": settings.auto_sync_interval_minutes,
-            "next_sync_in_seconds": self.interval_seconds if self.is_running else None
+            "next_sync_in_seconds": self.interval_seconds if self.is_running else None,
+            "imap_idle_enabled": settings.enable_imap_idle,
+            **imap_idle_service.get_status(),
+            **imap_session_manager.get_status()
         }
     
+    def _on_new_mail(self, team_member_id: int):
+        """IDLE push callback: sync just the mailbox that received mail"""
+        if not self.is_running:
+            return
+        
+        from services.email_integration_service import _sync_member_worker
+        
+        with correlation_scope(prefix="push-"):
+            result = _sync_member_worker(team_member_id, limit=10)
+            logger.debug("⚡ Push sync for %s: %d new email(s)", result['team_member'], result['emails_processed'])
+    
     def _sync_loop(self):
         """Background loop that syncs emails periodically"""
         while self.is_running:
             try:
                 db = SessionLocal()
                 
-                print(f"\n{'='*60}")
-                print(f"⏰ Auto-sync triggered at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-                print(f"{'='*60}")
+                logger.debug("⏰ Auto-sync triggered")
                 
                 from services.email_integration_service import sync_all_team_members_gmail
                 
+                # Keep one IDLE watcher per mailbox; the timed pass below is a catch-up
+                if settings.enable_imap_idle:
+                    imap_idle_service.refresh(db, self._on_new_mail)
+                
                 results = sync_all_team_members_gmail(db, limit=10)
                 
-                print(f"\n✅ Auto-sync completed:")
-                print(f"   Members synced: {results['total_members_synced']}")
-                print(f"   Emails found: {results['total_emails_found']}")
-                print(f"   Emails processed: {results['total_emails_processed']}")
+                logger.debug("✅ Auto-sync completed: %d member(s), %d email(s) found, %d processed",
+                             results['total_members_synced'], results['total_emails_found'],
+                             results['total_emails_processed'])
                 
                 db.close()
                 
             except Exception as e:
-                print(f"❌ Auto-sync error: {e}")
-                import traceback
-                traceback.print_exc()
+                logger.exception("❌ Auto-sync error: %s", e)
             
             # Wait for next sync
             if self.is_running:
-                print(f"\n💤 Sleeping for {settings.auto_sync_interval_minutes} minute(s)...")
+                logger.debug("💤 Sleeping for %s minute(s)...", settings.auto_sync_interval_minutes)
                 time.sleep(self.interval_seconds)
 
 # Global auto-sync instance
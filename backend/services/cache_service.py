@@ -0,0 +1,128 @@
+"""
+In-process TTL cache with single-flight computation for read-heavy endpoints
+"""
+import functools
+import inspect
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from config.settings import settings
+
+
+class _Flight:
+    """One in-progress computation that concurrent callers wait on"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class TTLCache:
+    """
+    Values expire after ttl_seconds or on invalidate(); concurrent misses
+    for the same key share a single computation
+    """
+
+    def __init__(self, name: str, ttl_seconds: float):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[Hashable, tuple] = {}
+        self._inflight: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+        self.invalidations = 0
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.hits += 1
+                return entry[1]
+
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._inflight[key] = flight
+                generation = self._generation
+                self.misses += 1
+            else:
+                self.waits += 1
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = compute()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+                # A write that invalidated the cache mid-computation wins: don't store
+                if flight.error is None and generation == self._generation:
+                    now = time.monotonic()
+                    # Keys can carry request parameters (report ranges): drop expired ones
+                    for stale in [k for k, (expires, _) in self._entries.items() if expires <= now]:
+                        del self._entries[stale]
+                    self._entries[key] = (now + self.ttl_seconds, flight.value)
+            flight.event.set()
+
+        return flight.value
+
+    def invalidate(self):
+        """Drop every entry (called after writes to the underlying data)"""
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+            self.invalidations += 1
+
+    def get_status(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses + self.waits
+            return {
+                "entries": len(self._entries),
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "single_flight_waits": self.waits,
+                "invalidations": self.invalidations,
+                "hit_rate": round((self.hits + self.waits) / lookups, 4) if lookups else None
+            }
+
+
+def cached(cache: TTLCache):
+    """
+    Cache a function(db, ...) by its name and non-session arguments
+
+    Cached values are shared between callers and must not be mutated.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = (func.__name__,) + tuple(
+                (name, value) for name, value in bound.arguments.items() if name != "db"
+            )
+            return cache.get_or_compute(key, lambda: func(*args, **kwargs))
+
+        wrapper.uncached = func
+        return wrapper
+
+    return decorator
+
+
+# Global cache for analytics (metrics and SLA breach listings)
+analytics_cache = TTLCache("analytics", settings.analytics_cache_ttl_seconds)
@@ -0,0 +1,153 @@
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from config.settings import settings
+from database.models import CacheVersion, Department, TeamMember
+
+DIRECTORY_CACHE_NAME = "directory"
+
+
+class DirectoryMember(NamedTuple):
+    id: int
+    name: str
+    email: str
+    department_id: Optional[int]
+    is_active: bool
+
+
+class DirectoryDepartment(NamedTuple):
+    id: int
+    name: str
+    sla_threshold_hours: float
+
+
+class DirectoryCache:
+    """
+    In-process cache of team members and departments for hot lookup paths
+
+    Writes call invalidate(), which bumps a version row in cache_versions;
+    every process re-reads that row at most every
+    settings.directory_cache_check_seconds and reloads when it changed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._members_by_id: Dict[int, DirectoryMember] = {}
+        self._members_by_email: Dict[str, DirectoryMember] = {}
+        self._departments: Dict[int, DirectoryDepartment] = {}
+        self._version: Optional[int] = None
+        self._checked_at = 0.0
+        self.reloads = 0
+
+    # ------------------------------------------------------------------
+    # Freshness
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _read_version(db: Session) -> int:
+        version = db.query(CacheVersion.version).filter(
+            CacheVersion.name == DIRECTORY_CACHE_NAME
+        ).scalar()
+        return version or 0
+
+    def _ensure_fresh(self, db: Session):
+        now = time.monotonic()
+        if self._version is not None and now - self._checked_at < settings.directory_cache_check_seconds:
+            return
+
+        with self._lock:
+            if self._version is not None and now - self._checked_at < settings.directory_cache_check_seconds:
+                return
+
+            version = self._read_version(db)
+            if version != self._version:
+                self._load(db, version)
+            self._checked_at = now
+
+    def _load(self, db: Session, version: int):
+        members = [
+            DirectoryMember(m.id, m.name, m.email, m.department_id, bool(m.is_active))
+            for m in db.query(
+                TeamMember.id, TeamMember.name, TeamMember.email,
+                TeamMember.department_id, TeamMember.is_active
+            ).all()
+        ]
+        departments = [
+            DirectoryDepartment(d.id, d.name, d.sla_threshold_hours)
+            for d in db.query(Department.id, Department.name, Department.sla_threshold_hours).all()
+        ]
+
+        # Swap whole maps so concurrent readers never see a partial reload
+        self._members_by_id = {m.id: m for m in members}
+        self._members_by_email = {m.email.lower(): m for m in members if m.is_active}
+        self._departments = {d.id: d for d in departments}
+        self._version = version
+        self.reloads += 1
+
+    def invalidate(self, db: Optional[Session] = None):
+        """
+        Drop the local copy and, given a session, bump the shared version so
+        other workers reload too
+        """
+        if db is not None:
+            updated = db.query(CacheVersion).filter(
+                CacheVersion.name == DIRECTORY_CACHE_NAME
+            ).update({CacheVersion.version: CacheVersion.version + 1}, synchronize_session=False)
+
+            if not updated:
+                db.add(CacheVersion(name=DIRECTORY_CACHE_NAME, version=1))
+            try:
+                db.commit()
+            except IntegrityError:
+                # Another worker created the row first; bump it instead
+                db.rollback()
+                db.query(CacheVersion).filter(
+                    CacheVersion.name == DIRECTORY_CACHE_NAME
+                ).update({CacheVersion.version: CacheVersion.version + 1}, synchronize_session=False)
+                db.commit()
+
+        with self._lock:
+            self._version = None
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def get_member(self, db: Session, team_member_id: int) -> Optional[DirectoryMember]:
+        self._ensure_fresh(db)
+        return self._members_by_id.get(team_member_id)
+
+    def get_active_member_by_email(self, db: Session, email_address: str) -> Optional[DirectoryMember]:
+        self._ensure_fresh(db)
+        return self._members_by_email.get((email_address or "").lower())
+
+    def get_department(self, db: Session, department_id: Optional[int]) -> Optional[DirectoryDepartment]:
+        self._ensure_fresh(db)
+        return self._departments.get(department_id)
+
+    def get_departments(self, db: Session) -> List[DirectoryDepartment]:
+        self._ensure_fresh(db)
+        return list(self._departments.values())
+
+    def get_sla_threshold(self, db: Session, department_id: Optional[int]) -> float:
+        """SLA threshold in hours for a department (default when unassigned)"""
+        department = self.get_department(db, department_id)
+        if department and department.sla_threshold_hours is not None:
+            return department.sla_threshold_hours
+        return settings.default_sla_threshold
+
+    def get_status(self) -> Dict:
+        return {
+            "version": self._version,
+            "reloads": self.reloads,
+            "team_members": len(self._members_by_id),
+            "departments": len(self._departments)
+        }
+
+
+# Global directory cache instance
+directory_cache = DirectoryCache()
@@ -1,11 +1,33 @@
 import imaplib
-import email
 from email.header import decode_header
-from datetime import datetime
+from email.parser import BytesHeaderParser
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timedelta, timezone
 from typing import List, Dict, Optional
+from sqlalchemy import func
 from sqlalchemy.orm import Session
+import contextvars
+import logging
 import re
-import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config.logging_config import correlation_scope, log_sampled, new_correlation_id
+from database.query_counter import query_scope
+from services.cache_service import analytics_cache
+from services.imap_session_service import imap_session_manager
+from services.imap_parser import parse_fetch_response, uid_set, find_text_part, decode_partial_body
+from services.mime_text import BODY_PREVIEW_CHARS, extract_body_text, html_to_text
+from services.telemetry_service import (
+    IMAP_BYTES_FETCHED, IMAP_MESSAGES_FETCHED, IMAP_OPERATION_SECONDS,
+    SYNC_BYTES, SYNC_ERRORS, SYNC_MESSAGES, SYNC_RUN_SECONDS
+)
+
+logger = logging.getLogger(__name__)
+
+# Bytes fetched by the mailbox sync running in this context (None outside a sync)
+_sync_fetched_bytes: contextvars.ContextVar[Optional[List[int]]] = contextvars.ContextVar(
+    "sync_fetched_bytes", default=None
+)
 
 # ============================================================================
 # GMAIL INTEGRATION (IMAP)
@@ -14,108 +36,329 @@ import time
 def connect_to_gmail_imap(email_address: str, app_password: str):
     """
     Connect to Gmail via IMAP
+    
+    The server comes from settings.imap_host/imap_port, so the sync can be
+    pointed at a local IMAP server (see benchmarks/fake_imap_server.py).
     """
+    from config.settings import settings
+    
     try:
-        print(f"🔐 Connecting to Gmail IMAP for: {email_address}")
+        logger.debug("🔐 Connecting to Gmail IMAP for: %s", email_address)
+        
+        imap_class = imaplib.IMAP4_SSL if settings.imap_use_ssl else imaplib.IMAP4
         
-        imap = imaplib.IMAP4_SSL("imap.gmail.com", 993)
-        imap.login(email_address, app_password)
+        with IMAP_OPERATION_SECONDS.labels("connect", "-").time():
+            imap = imap_class(settings.imap_host, settings.imap_port)
+            imap.login(email_address, app_password)
         
-        print(f"✅ Successfully connected to Gmail")
+        logger.debug("✅ Successfully connected to Gmail")
         return imap
         
     except imaplib.IMAP4.error as e:
-        print(f"❌ IMAP authentication failed: {e}")
-        print(f"💡 Make sure you're using an App Password, not your regular password")
+        logger.error("❌ IMAP authentication failed for %s: %s "
+                     "(use an App Password, not the regular password)", email_address, e)
         raise
     except Exception as e:
-        print(f"❌ Failed to connect to Gmail: {e}")
+        logger.error("❌ Failed to connect to Gmail for %s: %s", email_address, e)
         raise
 
-def fetch_gmail_unread_emails(imap, limit: int = 10) -> List[Dict]:
+def _search_uids(imap, *criteria, mailbox: str = "INBOX") -> List[int]:
+    """Run UID SEARCH and return the matching UIDs in ascending order"""
+    with IMAP_OPERATION_SECONDS.labels("search", mailbox).time():
+        status, data = imap.uid('SEARCH', None, *criteria)
+    
+    if status != 'OK':
+        raise imaplib.IMAP4.error(f"UID SEARCH {' '.join(criteria)} failed")
+    
+    return sorted(int(uid) for uid in (data[0] or b'').split())
+
+def _uid_fetch(imap, uids: List[int], items: str, mailbox: str, messages: bool = False):
     """
-    Fetch top N unread emails from Gmail inbox
+    UID FETCH with latency and byte accounting per mailbox folder
+    
+    messages=True counts the response as one fetched message per UID (the
+    header FETCH), so body FETCHes for the same messages are not counted twice.
     """
-    try:
-        # Select inbox
-        imap.select("INBOX")
+    with IMAP_OPERATION_SECONDS.labels("fetch", mailbox).time():
+        status, data = imap.uid('FETCH', uid_set(uids), items)
+    
+    if status == 'OK':
+        size = sum(len(part[1]) for part in data if isinstance(part, tuple) and isinstance(part[1], bytes))
+        IMAP_BYTES_FETCHED.labels(mailbox).inc(size)
+        if messages:
+            IMAP_MESSAGES_FETCHED.labels(mailbox).inc(len(uids))
+        
+        sync_bytes = _sync_fetched_bytes.get()
+        if sync_bytes is not None:
+            sync_bytes[0] += size
+    
+    return status, data
+
+def _select_new_uids(imap, mailbox: str, last_seen_uid: int, uid_validity: Optional[int],
+                     limit: int, bootstrap_criteria: tuple):
+    """
+    Select a mailbox read-only and return (uids, uidvalidity, last_uid) past the checkpoint
+    
+    Without a valid checkpoint the oldest N messages matching
+    bootstrap_criteria are returned. When they are all the matches, the
+    checkpoint jumps to the newest UID in the mailbox; otherwise it stops at
+    the last UID returned, so later syncs drain the rest of the backlog.
+    """
+    # Read-only select: nothing in the user's mailbox is modified by a sync
+    with IMAP_OPERATION_SECONDS.labels("select", mailbox).time():
+        status, _ = imap.select(_quote_mailbox(mailbox), readonly=True)
+    
+    if status != 'OK':
+        raise imaplib.IMAP4.error(f"Failed to select {mailbox}")
+    
+    _, validity_data = imap.response('UIDVALIDITY')
+    current_validity = int(validity_data[0]) if validity_data and validity_data[0] else 0
+    
+    if uid_validity is None or uid_validity != current_validity or last_seen_uid <= 0:
+        logger.info("🧭 No valid checkpoint for %s, bootstrapping from %s", mailbox, bootstrap_criteria)
         
-        # Search for unread emails
-        status, messages = imap.search(None, 'UNSEEN')
+        matching = _search_uids(imap, *bootstrap_criteria, mailbox=mailbox)
+        uids = matching[:limit]
+        
+        if len(matching) > limit:
+            # More backlog than one sync takes: continue after the last UID fetched
+            last_uid = uids[-1]
+        else:
+            newest = _search_uids(imap, 'UID', '*', mailbox=mailbox)
+            last_uid = newest[-1] if newest else 0
+    else:
+        # "n:*" always matches the newest message, even when its UID < n
+        uids = [uid for uid in _search_uids(imap, 'UID', f'{last_seen_uid + 1}:*', mailbox=mailbox) if uid > last_seen_uid]
+        
+        # Oldest first so the checkpoint only ever moves forward
+        uids = uids[:limit]
+        last_uid = uids[-1] if uids else last_seen_uid
+    
+    return uids, current_validity, last_uid
+
+def _quote_mailbox(mailbox: str) -> str:
+    """Quote mailbox names containing spaces or brackets, e.g. [Gmail]/Sent Mail"""
+    if mailbox.startswith('"') or not re.search(r'[\s\[\]"]', mailbox):
+        return mailbox
+    return '"' + mailbox.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+def fetch_gmail_new_emails(
+    imap,
+    last_seen_uid: int = 0,
+    uid_validity: Optional[int] = None,
+    limit: int = 10,
+    mailbox: str = "INBOX"
+) -> Dict:
+    """
+    Fetch emails that arrived after the stored checkpoint (UID > last_seen_uid)
+    
+    Without a valid checkpoint (first sync, or UIDVALIDITY changed) the
+    oldest unread emails are fetched first; once the unread backlog fits in
+    one sync the checkpoint is set to the newest UID in the mailbox. Returns
+    the parsed emails together with the UIDVALIDITY and the last UID that is
+    safe to checkpoint.
+    """
+    uids, current_validity, last_uid = _select_new_uids(
+        imap, mailbox, last_seen_uid, uid_validity, limit, ('UNSEEN',)
+    )
+    
+    result = {"emails": [], "uid_validity": current_validity, "last_uid": last_uid}
+    
+    if not uids:
+        logger.debug("📭 No new emails found in %s", mailbox)
+        return result
+    
+    logger.debug("📬 Found %d new email(s) in %s", len(uids), mailbox)
+    
+    result["emails"] = fetch_messages_batched(imap, uids, mailbox=mailbox)
+    
+    # Mails without a Message-ID get a stable per-mailbox key so retries still dedup
+    for email_data in result["emails"]:
+        if not email_data["message_id"]:
+            email_data["message_id"] = f"<uid.{current_validity}.{email_data['uid']}@{mailbox.lower()}>"
+    
+    logger.debug("✅ Fetched %d email(s)", len(result["emails"]))
+    return result
+
+def fetch_messages_batched(imap, uids: List[int], body_bytes: Optional[int] = None,
+                           mailbox: str = "INBOX") -> List[Dict]:
+    """
+    Fetch headers and a bounded text preview for many messages in few round trips
+    
+    One UID FETCH pulls BODYSTRUCTURE and headers for the whole set; a second
+    FETCH per distinct section pulls only the first N bytes of the text part.
+    BODY.PEEK never sets \\Seen, and attachments are never downloaded.
+    """
+    from config.settings import settings
+    
+    body_bytes = body_bytes or settings.imap_partial_body_bytes
+    
+    status, data = _uid_fetch(imap, uids, '(UID BODYSTRUCTURE BODY.PEEK[HEADER])', mailbox, messages=True)
+    
+    if status != 'OK':
+        raise imaplib.IMAP4.error("Batched header FETCH failed")
+    
+    headers = parse_fetch_response(data)
+    
+    # Group messages by the section holding their text, so each group is one FETCH.
+    # Section "" (whole message prefix) is the fallback when BODYSTRUCTURE is unusable.
+    text_parts = {}
+    groups = {}
+    
+    for uid, fields in headers.items():
+        text_part = find_text_part(fields.get('BODYSTRUCTURE'))
+        
+        if text_part:
+            text_parts[uid] = text_part
+            groups.setdefault(text_part[0], []).append(uid)
+        elif not isinstance(fields.get('BODYSTRUCTURE'), list):
+            groups.setdefault('', []).append(uid)
+    
+    bodies = {}
+    
+    for section, group_uids in groups.items():
+        status, data = _uid_fetch(imap, group_uids, f'(UID BODY.PEEK[{section}]<0.{body_bytes}>)', mailbox)
         
         if status != 'OK':
-            print("❌ Failed to search emails")
-            return []
+            logger.warning("⚠️ Failed to fetch body section %r for %d email(s)", section, len(group_uids))
+            continue
         
-        email_ids = messages[0].split()
+        for uid, fields in parse_fetch_response(data).items():
+            bodies[uid] = fields.get(f'BODY[{section}]')
+    
+    emails = []
+    
+    for uid in uids:
+        fields = headers.get(uid)
         
-        if not email_ids:
-            print(f"📭 No unread emails found")
-            return []
+        if not fields or not isinstance(fields.get('BODY[HEADER]'), bytes):
+            logger.warning("⚠️ Failed to fetch email UID %s", uid)
+            continue
         
-        print(f"📬 Found {len(email_ids)} unread email(s)")
+        try:
+            msg = BytesHeaderParser().parsebytes(fields['BODY[HEADER]'])
+            
+            # Decode subject
+            subject = decode_email_header(msg.get("Subject", ""))
+            
+            # Get sender and recipient
+            sender = msg.get("From", "")
+            recipient = msg.get("To", "")
+            date_str = msg.get("Date", "")
+            message_id = (msg.get("Message-ID") or "").strip()
+            
+            log_sampled(logger, logging.DEBUG, "imap.fetched_email",
+                        "📨 UID %s from %.50s: %.50s", uid, sender, subject)
+            
+            # Extract email body from the partial text
+            raw_body = bodies.get(uid)
+            body = ""
+            
+            if isinstance(raw_body, bytes):
+                if uid in text_parts:
+                    part = text_parts[uid][1]
+                    body = decode_partial_body(raw_body, part['encoding'], part['charset'])
+                    if part['content_type'] == 'text/html':
+                        body = html_to_text(body, BODY_PREVIEW_CHARS)
+                else:
+                    body = extract_email_body(raw_body)
+            
+            emails.append({
+                "sender": sender,
+                "recipient": recipient,
+                "subject": subject,
+                "body": (body or "[Email body could not be extracted]")[:BODY_PREVIEW_CHARS],  # Limit body length
+                "date": date_str,
+                "message_id": message_id[:255] or None,
+                "email_id": str(uid),
+                "uid": uid,
+                "source": "gmail"
+            })
+            
+        except Exception as e:
+            logger.warning("⚠️ Error parsing email UID %s: %s", uid, e)
+            continue
+    
+    return emails
+
+SENT_HEADER_FIELDS = 'HEADER.FIELDS (MESSAGE-ID IN-REPLY-TO REFERENCES DATE)'
+_MESSAGE_ID_RE = re.compile(r'<[^<>\s]+>')
+
+def _imap_date(value: datetime) -> str:
+    """Format a date for IMAP SEARCH (locale independent), e.g. 7-Mar-2026"""
+    return f"{value.day}-{imaplib.Months[value.month]}-{value.year}"
+
+def _sent_at(date_str: str) -> datetime:
+    """Parse a Date header into naive UTC, falling back to now"""
+    try:
+        sent_at = parsedate_to_datetime(date_str)
+    except (TypeError, ValueError, IndexError):
+        return datetime.utcnow()
+    
+    if sent_at.tzinfo is not None:
+        sent_at = sent_at.astimezone(timezone.utc).replace(tzinfo=None)
+    return sent_at
+
+def fetch_sent_replies(
+    imap,
+    last_seen_uid: int = 0,
+    uid_validity: Optional[int] = None,
+    since: Optional[datetime] = None,
+    limit: int = 500,
+    mailbox: str = "[Gmail]/Sent Mail"
+) -> Dict:
+    """
+    Scan the Sent folder past the stored checkpoint for replies
+    
+    Only the Message-ID, In-Reply-To, References and Date headers are
+    fetched, in one batched UID FETCH. Without a valid checkpoint, messages
+    sent since the given date are scanned. Returns {"replies": {inbound
+    Message-ID: earliest reply time (UTC)}, "uid_validity", "last_uid"}.
+    """
+    since = since or datetime.utcnow()
+    
+    uids, current_validity, last_uid = _select_new_uids(
+        imap, mailbox, last_seen_uid, uid_validity, limit, ('SINCE', _imap_date(since))
+    )
+    
+    result = {"replies": {}, "uid_validity": current_validity, "last_uid": last_uid}
+    
+    if not uids:
+        return result
+    
+    status, data = _uid_fetch(imap, uids, f'(UID BODY.PEEK[{SENT_HEADER_FIELDS}])', mailbox, messages=True)
+    
+    if status != 'OK':
+        raise imaplib.IMAP4.error(f"Header FETCH in {mailbox} failed")
+    
+    replies = result["replies"]
+    
+    for uid, fields in parse_fetch_response(data).items():
+        raw_headers = next(
+            (value for key, value in fields.items() if key.startswith('BODY[HEADER.FIELDS')), None
+        )
         
-        # Get the most recent emails (reverse order)
-        email_ids = email_ids[-limit:] if len(email_ids) > limit else email_ids
-        email_ids = list(reversed(email_ids))  # Most recent first
+        if not isinstance(raw_headers, bytes):
+            continue
         
-        emails = []
+        msg = BytesHeaderParser().parsebytes(raw_headers)
+        referenced = _MESSAGE_ID_RE.findall(
+            f"{msg.get('In-Reply-To', '')} {msg.get('References', '')}"
+        )
         
-        for idx, email_id in enumerate(email_ids, 1):
-            try:
-                print(f"\n   📧 Processing email {idx}/{len(email_ids)}...")
-                
-                # Fetch email by ID
-                status, msg_data = imap.fetch(email_id, '(RFC822)')
-                
-                if status != 'OK':
-                    print(f"   ⚠️ Failed to fetch email ID {email_id}")
-                    continue
-                
-                # Parse email
-                for response_part in msg_data:
-                    if isinstance(response_part, tuple):
-                        msg = email.message_from_bytes(response_part[1])
-                        
-                        # Decode subject
-                        subject_header = msg.get("Subject", "")
-                        subject = decode_email_header(subject_header)
-                        
-                        # Get sender and recipient
-                        sender = msg.get("From", "")
-                        recipient = msg.get("To", "")
-                        date_str = msg.get("Date", "")
-                        
-                        print(f"      From: {sender[:50]}")
-                        print(f"      Subject: {subject[:50]}...")
-                        
-                        # Extract email body
-                        body = extract_email_body(msg)
-                        
-                        emails.append({
-                            "sender": sender,
-                            "recipient": recipient,
-                            "subject": subject,
-                            "body": body[:1000],  # Limit body length
-                            "date": date_str,
-                            "email_id": email_id.decode(),
-                            "source": "gmail"
-                        })
-                        
-                        print(f"      ✅ Email parsed successfully")
-                
-            except Exception as e:
-                print(f"   ⚠️ Error parsing email {idx}: {e}")
-                continue
+        if not referenced:
+            continue
         
-        print(f"\n✅ Successfully fetched {len(emails)} email(s)")
-        return emails
+        sent_at = _sent_at(msg.get("Date"))
         
-    except Exception as e:
-        print(f"❌ Error fetching Gmail emails: {e}")
-        import traceback
-        traceback.print_exc()
-        return []
+        # Keep the first reply per inbound message
+        for message_id in referenced:
+            message_id = message_id[:255]
+            if message_id not in replies or sent_at < replies[message_id]:
+                replies[message_id] = sent_at
+    
+    logger.debug("📤 Scanned %d sent email(s), %d referenced message id(s)", len(uids), len(replies))
+    return result
 
 def decode_email_header(header: str) -> str:
     """
@@ -138,51 +381,15 @@ def decode_email_header(header: str) -> str:
     
     return decoded_string
 
-def extract_email_body(msg) -> str:
+def extract_email_body(raw_message: bytes, max_chars: int = BODY_PREVIEW_CHARS) -> str:
     """
-    Extract email body from message
+    Extract a bounded plain-text preview from a raw MIME message
     """
-    body = ""
-    
     try:
-        if msg.is_multipart():
-            # Walk through email parts
-            for part in msg.walk():
-                content_type = part.get_content_type()
-                content_disposition = str(part.get("Content-Disposition", ""))
-                
-                # Get text/plain parts
-                if content_type == "text/plain" and "attachment" not in content_disposition:
-                    try:
-                        payload = part.get_payload(decode=True)
-                        if payload:
-                            charset = part.get_content_charset() or 'utf-8'
-                            body = payload.decode(charset, errors='ignore')
-                            break
-                    except:
-                        pass
-                
-                # Fallback to text/html
-                if not body and content_type == "text/html" and "attachment" not in content_disposition:
-                    try:
-                        payload = part.get_payload(decode=True)
-                        if payload:
-                            charset = part.get_content_charset() or 'utf-8'
-                            body = payload.decode(charset, errors='ignore')
-                    except:
-                        pass
-        else:
-            # Not multipart
-            try:
-                payload = msg.get_payload(decode=True)
-                if payload:
-                    charset = msg.get_content_charset() or 'utf-8'
-                    body = payload.decode(charset, errors='ignore')
-            except:
-                pass
-    
+        body = extract_body_text(raw_message, max_chars=max_chars)
     except Exception as e:
-        print(f"   ⚠️ Error extracting body: {e}")
+        logger.warning("⚠️ Error extracting body: %s", e)
+        body = ""
     
     return body or "[Email body could not be extracted]"
 
@@ -208,182 +415,244 @@ def extract_email_address(email_string: str) -> str:
     
     return cleaned
 
+def _clean_email_data(email_data: Dict) -> Dict:
+    """Normalize a fetched email into a log_emails_received_bulk item"""
+    return {
+        "sender": extract_email_address(email_data["sender"]),
+        "recipient": extract_email_address(email_data["recipient"]),
+        "subject": email_data["subject"],
+        "body": email_data["body"],
+        "message_id": email_data.get("message_id"),
+        "is_client_email": True
+    }
+
 def process_incoming_email(db: Session, email_data: Dict) -> Optional[object]:
     """
-    Process and log incoming email to database
+    Process and log a single incoming email to database
+    
+    The email is assigned to the active team member owning the recipient
+    address; duplicates are detected by (recipient, Message-ID).
     """
-    from services.analytics_service import log_email_received
-    from database.models import TeamMember, Email
+    from services.analytics_service import log_emails_received_bulk
     
     try:
-        # Extract clean email addresses
-        recipient_email = extract_email_address(email_data["recipient"])
-        sender_email = extract_email_address(email_data["sender"])
-        
-        print(f"\n📨 Processing email:")
-        print(f"   From: {sender_email}")
-        print(f"   To: {recipient_email}")
-        print(f"   Subject: {email_data['subject'][:50]}...")
-        
-        # Check if email already exists (avoid duplicates)
-        existing_email = db.query(Email).filter(
-            Email.sender == sender_email,
-            Email.recipient == recipient_email,
-            Email.subject == email_data["subject"]
-        ).first()
-        
-        if existing_email:
-            print(f"⚠️ Email already exists in database (ID: {existing_email.id}), skipping")
-            return None
-        
-        # Find team member by recipient email
-        team_member = db.query(TeamMember).filter(
-            TeamMember.email == recipient_email,
-            TeamMember.is_active == True
-        ).first()
-        
-        if not team_member:
-            print(f"❌ No active team member found for: {recipient_email}")
-            return None
-        
-        print(f"✅ Found team member: {team_member.name} (Dept: {team_member.department_id})")
-        
-        # Log email to database
-        email_record = log_email_received(
-            db=db,
-            sender=sender_email,
-            recipient=recipient_email,
-            subject=email_data["subject"],
-            body=email_data["body"],
-            team_member_id=team_member.id,
-            is_client_email=True
-        )
-        
-        print(f"✅ Email logged to database (ID: {email_record.id})")
-        return email_record
+        stored = log_emails_received_bulk(db, [_clean_email_data(email_data)], require_team_member=True)
+        return stored[0] if stored else None
         
     except Exception as e:
-        print(f"❌ Error processing email: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Error processing email: %s", e)
         db.rollback()
         return None
 
+def get_mailbox_checkpoint(db: Session, team_member_id: int, mailbox: str = "INBOX", refresh: bool = False):
+    """
+    Get the stored UID checkpoint for a team member's mailbox (or None)
+    
+    refresh=True bypasses the identity map and reads the row with a locking
+    read, so a checkpoint committed by another sync is seen even inside an
+    older transaction snapshot.
+    """
+    from database.models import MailboxCheckpoint
+    
+    query = db.query(MailboxCheckpoint).filter(
+        MailboxCheckpoint.team_member_id == team_member_id,
+        MailboxCheckpoint.mailbox == mailbox
+    )
+    
+    if refresh:
+        query = query.populate_existing().with_for_update()
+    
+    return query.first()
+
+def save_mailbox_checkpoint(db: Session, team_member_id: int, uid_validity: int, last_seen_uid: int,
+                            mailbox: str = "INBOX"):
+    """
+    Create or advance the UID checkpoint for a team member's mailbox (caller commits)
+    """
+    from database.models import MailboxCheckpoint
+    
+    checkpoint = get_mailbox_checkpoint(db, team_member_id, mailbox)
+    
+    if checkpoint is None:
+        checkpoint = MailboxCheckpoint(team_member_id=team_member_id, mailbox=mailbox)
+        db.add(checkpoint)
+    
+    checkpoint.uid_validity = uid_validity
+    checkpoint.last_seen_uid = last_seen_uid
+    checkpoint.updated_at = datetime.utcnow()
+    return checkpoint
+
+def _scan_sent_folder(db: Session, imap, team_member, result: Dict) -> Optional[Dict]:
+    """
+    Fetch replies from the member's Sent folder; None when the folder cannot be scanned
+    """
+    from config.settings import settings
+    from database.models import Email
+    
+    sent_checkpoint = get_mailbox_checkpoint(db, team_member.id, settings.imap_sent_folder, refresh=True)
+    
+    # First scan starts at the oldest pending email (SINCE has day granularity)
+    oldest_pending = db.query(func.min(Email.received_at)).filter(
+        Email.recipient == team_member.email,
+        Email.is_replied == False
+    ).scalar()
+    since = min(oldest_pending or datetime.utcnow(), datetime.utcnow()) - timedelta(days=1)
+    
+    try:
+        return fetch_sent_replies(
+            imap,
+            last_seen_uid=sent_checkpoint.last_seen_uid if sent_checkpoint else 0,
+            uid_validity=sent_checkpoint.uid_validity if sent_checkpoint else None,
+            since=since,
+            limit=settings.sent_scan_limit,
+            mailbox=settings.imap_sent_folder
+        )
+    except imaplib.IMAP4.abort:
+        raise
+    except imaplib.IMAP4.error as e:
+        # A missing or renamed Sent folder must not block inbox ingestion
+        error_msg = f"Sent folder scan skipped for {team_member.email}: {str(e)}"
+        logger.warning("⚠️ %s", error_msg)
+        result["errors"].append(error_msg)
+        return None
+
 def sync_team_member_gmail(db: Session, team_member, app_password: str, limit: int = 10) -> Dict:
     """
-    Sync top N unread emails for a single team member from Gmail
+    Sync up to N new emails (since the stored UID checkpoint) for a single team member from Gmail
+    
+    The Sent folder is scanned in the same session and replies are matched
+    to pending inbound emails by In-Reply-To/References.
     """
+    from services.analytics_service import log_emails_received_bulk, mark_emails_replied_bulk
+    
+    from config.settings import settings
+    
     result = {
         "team_member": team_member.email,
         "emails_found": 0,
         "emails_processed": 0,
+        "replies_detected": 0,
         "errors": []
     }
     
-    imap = None
+    fetched_bytes = [0]
+    bytes_token = _sync_fetched_bytes.set(fetched_bytes)
     
     try:
-        # Connect to Gmail IMAP
-        imap = connect_to_gmail_imap(team_member.email, app_password)
-        
-        # Fetch unread emails
-        emails = fetch_gmail_unread_emails(imap, limit=limit)
-        result["emails_found"] = len(emails)
-        
-        # Process each email
-        for email_data in emails:
-            email_record = process_incoming_email(db, email_data)
-            if email_record:
-                result["emails_processed"] += 1
-        
-        db.commit()
+        sent = None
+        
+        # Reuse the persistent IMAP session for this mailbox. Its lock covers
+        # checkpoint read -> fetch -> store -> commit, so a concurrent sync of
+        # the same mailbox (IDLE push vs. schedule) starts from our checkpoint
+        with imap_session_manager.session(team_member.email, app_password) as imap:
+            checkpoint = get_mailbox_checkpoint(db, team_member.id, refresh=True)
+            
+            # Fetch emails received since the last checkpoint
+            fetched = fetch_gmail_new_emails(
+                imap,
+                last_seen_uid=checkpoint.last_seen_uid if checkpoint else 0,
+                uid_validity=checkpoint.uid_validity if checkpoint else None,
+                limit=limit
+            )
+            
+            if settings.enable_sent_reconciliation:
+                sent = _scan_sent_folder(db, imap, team_member, result)
+            
+            emails = fetched["emails"]
+            result["emails_found"] = len(emails)
+            
+            SYNC_MESSAGES.observe(len(emails))
+            SYNC_BYTES.observe(fetched_bytes[0])
+            
+            # One bulk insert for the whole batch (dedup, member lookup, executemany)
+            stored = log_emails_received_bulk(
+                db,
+                [_clean_email_data(email_data) for email_data in emails],
+                require_team_member=True,
+                commit=False
+            )
+            result["emails_processed"] = len(stored)
+            
+            # Replies are matched after the insert so emails from this batch qualify too
+            if sent is not None:
+                result["replies_detected"] = mark_emails_replied_bulk(
+                    db, team_member.email, sent["replies"], commit=False
+                )
+                save_mailbox_checkpoint(
+                    db, team_member.id, sent["uid_validity"], sent["last_uid"], mailbox=settings.imap_sent_folder
+                )
+            
+            # The checkpoints advance in the same transaction that stores the emails
+            save_mailbox_checkpoint(db, team_member.id, fetched["uid_validity"], fetched["last_uid"])
+            db.commit()
+        
+        if stored or result["replies_detected"]:
+            analytics_cache.invalidate()
         
     except Exception as e:
         error_msg = f"Error syncing {team_member.email}: {str(e)}"
-        print(f"❌ {error_msg}")
+        logger.error("❌ %s", error_msg)
         result["errors"].append(error_msg)
+        SYNC_ERRORS.inc()
         db.rollback()
-    
     finally:
-        if imap:
-            try:
-                imap.logout()
-                print(f"🔓 Logged out from Gmail")
-            except:
-                pass
+        _sync_fetched_bytes.reset(bytes_token)
     
     return result
 
-def sync_all_team_members_gmail(db: Session, limit: int = 10) -> Dict:
+def _sync_member_worker(member_id: int, limit: int) -> Dict:
     """
-    Sync unread emails for all active team members with Gmail addresses
+    Sync a single team member inside a worker thread using its own DB session
+    
+    Queries are counted per mailbox, so statements that legitimately run
+    once per member are not reported as N+1 for the whole run.
     """
+    from database.connection import SessionLocal
     from database.models import TeamMember
     
-    results = {
-        "total_members_synced": 0,
-        "total_emails_found": 0,
-        "total_emails_processed": 0,
-        "member_results": [],
-        "errors": []
-    }
-    
-    # Get all active team members with Gmail addresses
-    team_members = db.query(TeamMember).filter(
-        TeamMember.is_active == True,
-        TeamMember.email.like('%@gmail.com')
-    ).all()
-    
-    print(f"\n👥 Found {len(team_members)} active team member(s) with Gmail")
-    
-    for member in team_members:
-        print(f"\n{'='*60}")
-        print(f"🔍 Syncing: {member.name} ({member.email})")
-        print(f"{'='*60}")
-        
-        # ✅ Get app password from team member record
-        app_password = member.app_password  # This is the key line!
-        
-        if not app_password:
-            print(f"⚠️ No app password stored for {member.email}, skipping")
-            results["errors"].append(f"No app password for {member.email}")
-            continue
-        
-        member_result = sync_team_member_gmail(db, member, app_password, limit=limit)
-        
-        results["total_members_synced"] += 1
-        results["total_emails_found"] += member_result["emails_found"]
-        results["total_emails_processed"] += member_result["emails_processed"]
-        results["member_results"].append(member_result)
-        
-        if member_result["errors"]:
-            results["errors"].extend(member_result["errors"])
-        
-        print(f"\n📊 Member Summary:")
-        print(f"   Emails found: {member_result['emails_found']}")
-        print(f"   Emails processed (new): {member_result['emails_processed']}")
-        
-        time.sleep(2)  # Rate limiting between members
-    
-    print(f"\n{'='*60}")
-    print(f"📊 FINAL SYNC SUMMARY")
-    print(f"{'='*60}")
-    print(f"   Members synced: {results['total_members_synced']}")
-    print(f"   Total emails found: {results['total_emails_found']}")
-    print(f"   Total emails processed (new): {results['total_emails_processed']}")
-    print(f"   Errors: {len(results['errors'])}")
-    
-    return results
+    db = SessionLocal()
+    try:
+        with query_scope(f"Gmail sync of team member {member_id}"):
+            member = db.query(TeamMember).filter(TeamMember.id == member_id).first()
+            
+            if not member:
+                return {
+                    "team_member": None,
+                    "emails_found": 0,
+                    "emails_processed": 0,
+                    "replies_detected": 0,
+                    "errors": [f"Team member {member_id} no longer exists"]
+                }
+            
+            return sync_team_member_gmail(db, member, member.app_password, limit=limit)
+    finally:
+        db.close()
 
+def sync_all_team_members_gmail(db: Session, limit: int = 10, max_workers: Optional[int] = None) -> Dict:
     """
     Sync unread emails for all active team members with Gmail addresses
+    
+    Mailboxes are synced concurrently by a bounded thread pool
+    (settings.sync_max_workers), each worker using its own DB session.
+    Log records of the run share one sync-run correlation id.
     """
+    run_id = new_correlation_id("sync-")
+    
+    # Logged under the caller's id (request or scheduler), linking it to the run
+    logger.info("🚀 Gmail sync run %s started (limit: %d)", run_id, limit)
+    
+    with correlation_scope(run_id), SYNC_RUN_SECONDS.time():
+        return _sync_all_team_members(db, limit, max_workers)
+
+def _sync_all_team_members(db: Session, limit: int, max_workers: Optional[int]) -> Dict:
     from database.models import TeamMember
+    from config.settings import settings
     
     results = {
         "total_members_synced": 0,
         "total_emails_found": 0,
         "total_emails_processed": 0,
+        "total_replies_detected": 0,
         "member_results": [],
         "errors": []
     }
@@ -394,45 +663,62 @@ def sync_all_team_members_gmail(db: Session, limit: int = 10) -> Dict:
         TeamMember.email.like('%@gmail.com')
     ).all()
     
-    print(f"\n👥 Found {len(team_members)} active team member(s) with Gmail")
+    logger.debug("👥 Found %d active team member(s) with Gmail", len(team_members))
+    
+    members_to_sync = []
     
     for member in team_members:
-        print(f"\n{'='*60}")
-        print(f"🔍 Syncing: {member.name} ({member.email})")
-        print(f"{'='*60}")
-        
-        # Get app password from team member record
-        # For now, you'll need to store this in the database
-        # Or pass it as a parameter
-        app_password = getattr(member, 'app_password', None)
-        
-        if not app_password:
-            print(f"⚠️ No app password stored for {member.email}, skipping")
+        if not member.app_password:
+            logger.warning("⚠️ No app password stored for %s, skipping", member.email)
             results["errors"].append(f"No app password for {member.email}")
             continue
         
-        member_result = sync_team_member_gmail(db, member, app_password, limit=limit)
-        
-        results["total_members_synced"] += 1
-        results["total_emails_found"] += member_result["emails_found"]
-        results["total_emails_processed"] += member_result["emails_processed"]
-        results["member_results"].append(member_result)
-        
-        if member_result["errors"]:
-            results["errors"].extend(member_result["errors"])
-        
-        print(f"\n📊 Member Summary:")
-        print(f"   Emails found: {member_result['emails_found']}")
-        print(f"   Emails processed (new): {member_result['emails_processed']}")
-        
-        time.sleep(2)  # Rate limiting between members
-    
-    print(f"\n{'='*60}")
-    print(f"📊 FINAL SYNC SUMMARY")
-    print(f"{'='*60}")
-    print(f"   Members synced: {results['total_members_synced']}")
-    print(f"   Total emails found: {results['total_emails_found']}")
-    print(f"   Total emails processed (new): {results['total_emails_processed']}")
-    print(f"   Errors: {len(results['errors'])}")
+        members_to_sync.append((member.id, member.name, member.email))
+    
+    workers = max(1, min(max_workers or settings.sync_max_workers, len(members_to_sync) or 1))
+    logger.debug("🚀 Syncing %d mailbox(es) with %d worker(s)", len(members_to_sync), workers)
+    
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="gmail-sync") as executor:
+        futures = [
+            # Each worker runs in a copy of this context, keeping the run's correlation id
+            executor.submit(contextvars.copy_context().run, _sync_member_worker, member_id, limit)
+            for member_id, _, _ in members_to_sync
+        ]
+        
+        # Aggregate in member order so results are deterministic
+        for (member_id, name, email_address), future in zip(members_to_sync, futures):
+            try:
+                member_result = future.result()
+            except Exception as e:
+                error_msg = f"Error syncing {email_address}: {str(e)}"
+                logger.error("❌ %s", error_msg)
+                member_result = {
+                    "team_member": email_address,
+                    "emails_found": 0,
+                    "emails_processed": 0,
+                    "replies_detected": 0,
+                    "errors": [error_msg]
+                }
+            
+            results["total_members_synced"] += 1
+            results["total_emails_found"] += member_result["emails_found"]
+            results["total_emails_processed"] += member_result["emails_processed"]
+            results["total_replies_detected"] += member_result["replies_detected"]
+            results["member_results"].append(member_result)
+            
+            if member_result["errors"]:
+                results["errors"].extend(member_result["errors"])
+            
+            logger.debug(
+                "📊 %s (%s): found %d, new %d, replies %d",
+                name, email_address, member_result["emails_found"],
+                member_result["emails_processed"], member_result["replies_detected"]
+            )
+    
+    logger.info(
+        "📊 Sync summary: %d member(s), %d email(s) found, %d new, %d repl(ies), %d error(s)",
+        results["total_members_synced"], results["total_emails_found"],
+        results["total_emails_processed"], results["total_replies_detected"], len(results["errors"])
+    )
     
     return results
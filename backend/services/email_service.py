@@ -2,7 +2,9 @@ import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from config.settings import settings
+from services.telemetry_service import SMTP_SEND_SECONDS
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -10,9 +12,7 @@ def send_email(recipient: str, subject: str, body: str, is_html: bool = False) -
     """
     Send an email using SMTP
     """
-    print(f"\n📤 Sending email:")
-    print(f"  To: {recipient}")
-    print(f"  Subject: {subject}")
+    logger.debug("📤 Sending email to %s: %s", recipient, subject)
     
     try:
         # Create message
@@ -26,23 +26,24 @@ def send_email(recipient: str, subject: str, body: str, is_html: bool = False) -
         msg['From'] = settings.email_username
         msg['To'] = recipient
         
-        # Connect and send
-        print(f"  Connecting to {settings.email_server}:{settings.email_port}...")
+        # Connect and send (latency includes connect, STARTTLS and login)
+        started = time.perf_counter()
+        try:
+            with smtplib.SMTP(settings.email_server, settings.email_port) as server:
+                server.starttls()
+                server.login(settings.email_username, settings.email_password)
+                
+                server.send_message(msg)
+        except Exception:
+            SMTP_SEND_SECONDS.labels("error").observe(time.perf_counter() - started)
+            raise
+        SMTP_SEND_SECONDS.labels("ok").observe(time.perf_counter() - started)
         
-        with smtplib.SMTP(settings.email_server, settings.email_port) as server:
-            server.starttls()
-            print(f"  Authenticating as {settings.email_username}...")
-            server.login(settings.email_username, settings.email_password)
-            
-            print(f"  Sending message...")
-            server.send_message(msg)
-            
-        print(f"✅ Email sent successfully")
+        logger.debug("✅ Email sent to %s", recipient)
         return True
         
     except Exception as e:
-        print(f"❌ Error sending email: {e}")
-        logger.error(f"Error sending email to {recipient}: {e}")
+        logger.error("❌ Error sending email to %s: %s", recipient, e)
         return False
 
 def send_sla_breach_alert(recipient: str, breach_info: dict) -> bool:
@@ -0,0 +1,240 @@
+"""
+Minimal IMAP response parsing for the batched FETCH pipeline
+"""
+import base64
+import binascii
+import quopri
+import re
+from typing import Dict, Iterator, List, Optional, Tuple
+
+_WHITESPACE = b' \t\r\n'
+_ATOM_END = b' \t\r\n()'
+_LITERAL_RE = re.compile(rb'\{(\d+)\}\r\n')
+_PARTIAL_SUFFIX_RE = re.compile(r'<\d+>$')
+
+# ============================================================================
+# FETCH RESPONSE PARSING
+# ============================================================================
+
+def join_fetch_response(data: List) -> bytes:
+    """
+    Rebuild the wire form of an imaplib FETCH response with literals inline
+    """
+    out = bytearray()
+    for item in data:
+        if isinstance(item, tuple):
+            head, literal = item
+            head = re.sub(rb'\{\d+\}$', b'', head)
+            out += head + b'{%d}\r\n' % len(literal) + literal
+        elif item:
+            out += item + b' '
+    return bytes(out)
+
+
+class _Parser:
+    def __init__(self, buf: bytes):
+        self.buf = buf
+        self.pos = 0
+
+    def skip_ws(self):
+        while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+            self.pos += 1
+
+    def at_end(self) -> bool:
+        self.skip_ws()
+        return self.pos >= len(self.buf)
+
+    def value(self):
+        self.skip_ws()
+        ch = self.buf[self.pos:self.pos + 1]
+
+        if ch == b'(':
+            self.pos += 1
+            items = []
+            while True:
+                self.skip_ws()
+                if self.pos >= len(self.buf):
+                    raise ValueError("Unterminated list in IMAP response")
+                if self.buf[self.pos:self.pos + 1] == b')':
+                    self.pos += 1
+                    return items
+                items.append(self.value())
+
+        if ch == b'"':
+            self.pos += 1
+            out = bytearray()
+            while self.pos < len(self.buf):
+                c = self.buf[self.pos]
+                self.pos += 1
+                if c == 0x5C:  # backslash escape
+                    out.append(self.buf[self.pos])
+                    self.pos += 1
+                elif c == 0x22:  # closing quote
+                    return out.decode('utf-8', errors='replace')
+                else:
+                    out.append(c)
+            raise ValueError("Unterminated quoted string in IMAP response")
+
+        if ch == b'{':
+            match = _LITERAL_RE.match(self.buf, self.pos)
+            if not match:
+                raise ValueError("Malformed literal in IMAP response")
+            size = int(match.group(1))
+            start = match.end()
+            self.pos = start + size
+            return self.buf[start:self.pos]
+
+        return self.atom()
+
+    def atom(self) -> Optional[str]:
+        start = self.pos
+        depth = 0
+        while self.pos < len(self.buf):
+            c = self.buf[self.pos:self.pos + 1]
+            if c == b'[':
+                depth += 1
+            elif c == b']':
+                depth -= 1
+            elif depth == 0 and c in _ATOM_END:
+                break
+            self.pos += 1
+
+        atom = self.buf[start:self.pos].decode('ascii', errors='replace')
+        if not atom:
+            raise ValueError(f"Unexpected character in IMAP response at {self.pos}")
+        return None if atom.upper() == 'NIL' else atom
+
+
+def parse_fetch_response(data: List) -> Dict[int, Dict[str, object]]:
+    """
+    Parse an imaplib UID FETCH response into {uid: {ITEM: value}}
+
+    Item names are upper-cased and partial-fetch origins are dropped, so
+    BODY[1]<0> is returned as BODY[1].
+    """
+    parser = _Parser(join_fetch_response(data))
+    results = {}
+
+    while not parser.at_end():
+        parser.value()  # message sequence number
+        items = parser.value()
+        if not isinstance(items, list):
+            continue
+
+        fields = {}
+        for key, value in zip(items[0::2], items[1::2]):
+            if isinstance(key, str):
+                fields[_PARTIAL_SUFFIX_RE.sub('', key.upper())] = value
+
+        if fields.get('UID') is not None:
+            results[int(fields['UID'])] = fields
+
+    return results
+
+
+def uid_set(uids: List[int]) -> str:
+    """Compress UIDs into an IMAP sequence set, e.g. 1:3,7,9:10"""
+    ranges = []
+    for uid in sorted(set(uids)):
+        if ranges and uid == ranges[-1][1] + 1:
+            ranges[-1][1] = uid
+        else:
+            ranges.append([uid, uid])
+    return ','.join(str(a) if a == b else f"{a}:{b}" for a, b in ranges)
+
+# ============================================================================
+# BODYSTRUCTURE
+# ============================================================================
+
+def _text(value) -> str:
+    if isinstance(value, bytes):
+        return value.decode('utf-8', errors='replace')
+    return value or ''
+
+
+def _params(value) -> Dict[str, str]:
+    if not isinstance(value, list):
+        return {}
+    return {_text(k).lower(): _text(v) for k, v in zip(value[0::2], value[1::2])}
+
+
+def iter_body_parts(structure, section: str = '') -> Iterator[Tuple[str, Dict]]:
+    """
+    Yield (section, part info) for every leaf part of a BODYSTRUCTURE
+
+    Attached messages (message/rfc822) are reported as leaves and not descended.
+    """
+    if not isinstance(structure, list) or not structure:
+        return
+
+    if isinstance(structure[0], list):
+        children = [child for child in structure if isinstance(child, list)]
+        for index, child in enumerate(children, 1):
+            yield from iter_body_parts(child, f"{section}.{index}" if section else str(index))
+        return
+
+    main_type = _text(structure[0]).lower()
+    sub_type = _text(structure[1]).lower() if len(structure) > 1 else ''
+    params = _params(structure[2] if len(structure) > 2 else None)
+
+    # Disposition sits after the type-specific basic fields
+    if main_type == 'text':
+        disposition_index = 9
+    elif main_type == 'message' and sub_type == 'rfc822':
+        disposition_index = 11
+    else:
+        disposition_index = 8
+
+    disposition = structure[disposition_index] if len(structure) > disposition_index else None
+    disposition_type = _text(disposition[0]).lower() if isinstance(disposition, list) and disposition else ''
+    filename = _params(disposition[1] if isinstance(disposition, list) and len(disposition) > 1 else None).get('filename')
+
+    yield section or '1', {
+        'content_type': f"{main_type}/{sub_type}",
+        'charset': params.get('charset'),
+        'encoding': _text(structure[5]).lower() if len(structure) > 5 else '7bit',
+        'size': int(structure[6]) if len(structure) > 6 and str(structure[6]).isdigit() else 0,
+        'is_attachment': disposition_type == 'attachment' or bool(filename or params.get('name'))
+    }
+
+
+def find_text_part(structure) -> Optional[Tuple[str, Dict]]:
+    """
+    Pick the inline text/plain part of a message, falling back to text/html
+    """
+    html_part = None
+
+    for section, part in iter_body_parts(structure):
+        if part['is_attachment']:
+            continue
+        if part['content_type'] == 'text/plain':
+            return section, part
+        if part['content_type'] == 'text/html' and html_part is None:
+            html_part = (section, part)
+
+    return html_part
+
+
+def decode_partial_body(raw: bytes, encoding: str, charset: Optional[str]) -> str:
+    """
+    Decode a (possibly truncated) body part fetched with BODY.PEEK[n]<0.N>
+    """
+    encoding = (encoding or '').lower()
+
+    if encoding == 'base64':
+        compact = re.sub(rb'[^A-Za-z0-9+/=]', b'', raw)
+        compact = compact[:len(compact) - len(compact) % 4]
+        try:
+            data = base64.b64decode(compact)
+        except (binascii.Error, ValueError):
+            data = b''
+    elif encoding == 'quoted-printable':
+        # Drop an escape sequence cut off by the partial fetch
+        data = quopri.decodestring(re.sub(rb'=[0-9A-Fa-f]?$', b'', raw))
+    else:
+        data = raw
+
+    try:
+        return data.decode(charset or 'utf-8', errors='ignore')
+    except LookupError:
+        return data.decode('utf-8', errors='ignore')
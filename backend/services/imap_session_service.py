@@ -0,0 +1,337 @@
+import imaplib
+import logging
+import select
+import socket
+import ssl
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# PERSISTENT IMAP SESSIONS
+# ============================================================================
+
+def _backoff_seconds(failures: int) -> float:
+    """Exponential reconnect backoff: 2, 4, 8, ... capped by settings"""
+    return min(settings.imap_reconnect_max_backoff_seconds, 2 ** max(failures, 1))
+
+
+class MailboxSession:
+    """
+    A long-lived authenticated IMAP connection for one mailbox
+    """
+
+    def __init__(self, email_address: str, app_password: str):
+        self.email_address = email_address
+        self.app_password = app_password
+        self.imap = None
+        self.lock = threading.Lock()
+        self.failures = 0
+        self.next_attempt_at = 0.0
+        self.connects = 0
+
+    def ensure_connected(self):
+        """
+        Return a healthy connection, reusing the open one when it still answers NOOP
+        """
+        from services.email_integration_service import connect_to_gmail_imap
+
+        if self.imap is not None:
+            try:
+                status, _ = self.imap.noop()
+                if status == 'OK':
+                    return self.imap
+            except Exception:
+                pass
+            self.discard()
+
+        now = time.time()
+        if now < self.next_attempt_at:
+            raise ConnectionError(
+                f"Reconnect to {self.email_address} backing off for "
+                f"{self.next_attempt_at - now:.0f}s"
+            )
+
+        try:
+            self.imap = connect_to_gmail_imap(self.email_address, self.app_password)
+            self.connects += 1
+            self.failures = 0
+            self.next_attempt_at = 0.0
+            return self.imap
+        except Exception:
+            self.failures += 1
+            self.next_attempt_at = now + _backoff_seconds(self.failures)
+            raise
+
+    def discard(self):
+        """Drop the current connection (logging out if still possible)"""
+        if self.imap is not None:
+            try:
+                self.imap.logout()
+            except Exception:
+                pass
+        self.imap = None
+
+
+class ImapSessionManager:
+    """
+    Keeps one authenticated IMAP session per mailbox across sync cycles
+    """
+
+    def __init__(self):
+        self._sessions: Dict[str, MailboxSession] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, email_address: str, app_password: str) -> MailboxSession:
+        with self._lock:
+            session = self._sessions.get(email_address)
+            if session is None:
+                session = MailboxSession(email_address, app_password)
+                self._sessions[email_address] = session
+            return session
+
+    @contextmanager
+    def session(self, email_address: str, app_password: str):
+        """
+        Borrow the mailbox connection exclusively; it is discarded on error
+        """
+        session = self._get(email_address, app_password)
+
+        with session.lock:
+            if session.app_password != app_password:
+                session.discard()
+                session.app_password = app_password
+                session.next_attempt_at = 0.0
+
+            imap = session.ensure_connected()
+            try:
+                yield imap
+            except Exception:
+                session.discard()
+                raise
+
+    def close(self, email_address: str):
+        """Log out and forget a single mailbox session"""
+        with self._lock:
+            session = self._sessions.pop(email_address, None)
+        if session:
+            with session.lock:
+                session.discard()
+
+    def close_all(self):
+        """Log out of every open session"""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            with session.lock:
+                session.discard()
+
+    def get_status(self) -> Dict:
+        with self._lock:
+            sessions = list(self._sessions.values())
+        return {
+            "open_sessions": sum(1 for s in sessions if s.imap is not None),
+            "total_connects": sum(s.connects for s in sessions)
+        }
+
+
+# ============================================================================
+# IMAP IDLE PUSH
+# ============================================================================
+
+def _has_buffered_input(imap) -> bool:
+    """
+    True when imaplib has already read bytes select() cannot see: lines in
+    its file buffer, or decrypted TLS data held by the SSL socket
+    """
+    sock = imap.socket()
+    if getattr(sock, "pending", lambda: 0)():
+        return True
+
+    # peek() only touches the socket when the buffer is empty, so make that read non-blocking
+    timeout = sock.gettimeout()
+    sock.setblocking(False)
+    try:
+        return bool(imap.file.peek(1))
+    except (BlockingIOError, ssl.SSLWantReadError):
+        return False
+    finally:
+        sock.settimeout(timeout)
+
+def imap_idle(imap, timeout: float, stop_event: Optional[threading.Event] = None) -> bool:
+    """
+    Run one IMAP IDLE cycle (RFC 2177)
+
+    Returns True as soon as the server reports new mail (EXISTS), False when
+    the timeout expires first.
+    """
+    tag = imap._new_tag()
+    imap.send(tag + b' IDLE\r\n')
+
+    line = imap.readline()
+    if not line.startswith(b'+'):
+        raise imaplib.IMAP4.error(f"IDLE rejected: {line!r}")
+
+    sock = imap.socket()
+    deadline = time.time() + timeout
+    new_mail = False
+
+    while not (stop_event and stop_event.is_set()):
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            break
+
+        # An EXISTS sent together with the continuation is already buffered
+        if not _has_buffered_input(imap):
+            readable, _, _ = select.select([sock], [], [], remaining)
+            if not readable:
+                break
+
+        line = imap.readline()
+        if not line:
+            raise imaplib.IMAP4.abort("Connection closed during IDLE")
+        if line.startswith(b'*') and b'EXISTS' in line.upper():
+            new_mail = True
+            break
+
+    imap.send(b'DONE\r\n')
+
+    # Drain until the tagged completion of the IDLE command
+    while True:
+        line = imap.readline()
+        if not line:
+            raise imaplib.IMAP4.abort("Connection closed after IDLE")
+        if line.startswith(tag):
+            break
+
+    return new_mail
+
+
+class MailboxIdleWatcher(threading.Thread):
+    """
+    Holds a dedicated IDLE connection on one INBOX and calls back on new mail
+    """
+
+    def __init__(self, team_member_id: int, email_address: str, app_password: str,
+                 on_new_mail: Callable[[int], None]):
+        super().__init__(daemon=True, name=f"imap-idle-{email_address}")
+        self.team_member_id = team_member_id
+        self.email_address = email_address
+        self.app_password = app_password
+        self.on_new_mail = on_new_mail
+        self.stop_event = threading.Event()
+        self.imap = None
+        self.failures = 0
+        self.idle_unsupported = False
+
+    def run(self):
+        from services.email_integration_service import connect_to_gmail_imap
+
+        while not self.stop_event.is_set():
+            try:
+                self.imap = connect_to_gmail_imap(self.email_address, self.app_password)
+
+                if 'IDLE' not in self.imap.capabilities:
+                    self.idle_unsupported = True
+                    logger.warning("⚠️ IMAP server does not support IDLE for %s, relying on periodic sync", self.email_address)
+                    return
+
+                self.imap.select("INBOX", readonly=True)
+                self.failures = 0
+                logger.debug("👂 IDLE watching %s", self.email_address)
+
+                while not self.stop_event.is_set():
+                    if imap_idle(self.imap, settings.imap_idle_timeout_seconds, self.stop_event):
+                        logger.debug("📬 New mail pushed for %s", self.email_address)
+                        self.on_new_mail(self.team_member_id)
+
+            except Exception as e:
+                if self.stop_event.is_set():
+                    break
+                self.failures += 1
+                delay = _backoff_seconds(self.failures)
+                logger.warning("⚠️ IDLE connection for %s failed: %s (retry in %.0fs)", self.email_address, e, delay)
+                self.stop_event.wait(delay)
+            finally:
+                self._logout()
+
+    def _logout(self):
+        imap, self.imap = self.imap, None
+        if imap is not None:
+            try:
+                imap.logout()
+            except Exception:
+                pass
+
+    def stop(self):
+        """Stop watching; unblocks a pending IDLE by shutting the socket down"""
+        self.stop_event.set()
+        imap = self.imap
+        if imap is not None:
+            try:
+                imap.socket().shutdown(socket.SHUT_RDWR)
+            except Exception:
+                pass
+
+
+class ImapIdleService:
+    """
+    Manages one IDLE watcher per active team member mailbox
+    """
+
+    def __init__(self):
+        self._watchers: Dict[int, MailboxIdleWatcher] = {}
+        self._lock = threading.Lock()
+
+    def refresh(self, db, on_new_mail: Callable[[int], None]):
+        """
+        Start watchers for new mailboxes and stop watchers for removed ones
+        """
+        from database.models import TeamMember
+
+        members = db.query(TeamMember).filter(
+            TeamMember.is_active == True,
+            TeamMember.email.like('%@gmail.com'),
+            TeamMember.app_password.isnot(None)
+        ).all()
+
+        wanted = {m.id: m for m in members}
+
+        with self._lock:
+            for member_id in list(self._watchers):
+                watcher = self._watchers[member_id]
+                member = wanted.get(member_id)
+                crashed = not watcher.is_alive() and not watcher.idle_unsupported
+                if (member is None or crashed
+                        or member.email != watcher.email_address
+                        or member.app_password != watcher.app_password):
+                    watcher.stop()
+                    del self._watchers[member_id]
+
+            for member_id, member in wanted.items():
+                if member_id not in self._watchers:
+                    watcher = MailboxIdleWatcher(member.id, member.email, member.app_password, on_new_mail)
+                    self._watchers[member_id] = watcher
+                    watcher.start()
+
+    def stop_all(self):
+        with self._lock:
+            watchers = list(self._watchers.values())
+            self._watchers.clear()
+        for watcher in watchers:
+            watcher.stop()
+
+    def get_status(self) -> Dict:
+        with self._lock:
+            return {"idle_watchers": sum(1 for w in self._watchers.values() if w.is_alive())}
+
+
+# Global instances
+imap_session_manager = ImapSessionManager()
+imap_idle_service = ImapIdleService()
@@ -0,0 +1,198 @@
+"""
+Hourly metrics rollups per department and team member
+
+Counters are bucketed by the hour an email was received. The ingest and
+reply paths add to them in the same transaction as the email write, and
+rebuild_metrics_rollups() recomputes them from the emails table. Replies
+also feed the response-time histograms (response_histogram_service).
+"""
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import func, insert, Integer
+from sqlalchemy.orm import Session
+
+from database.dialect import as_datetime, hour_bucket, lock_tables_for_rebuild, upsert_increment
+from database.models import (
+    DepartmentMetricsHourly, DepartmentResponseHistogram, Email, TeamMemberMetricsHourly, TeamMemberResponseHistogram
+)
+from services.cache_service import analytics_cache
+from services.response_histogram_service import (
+    has_response_histograms, rebuild_response_histograms, record_response_times
+)
+
+logger = logging.getLogger(__name__)
+
+_SCOPES = (
+    (DepartmentMetricsHourly, "department_id"),
+    (TeamMemberMetricsHourly, "team_member_id"),
+)
+
+_COUNTERS = ("received_count", "replied_count", "breach_count", "response_hours_sum", "response_count")
+
+
+def _hour(value: datetime) -> datetime:
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def _apply(db: Session, deltas: Iterable[Dict]):
+    """Aggregate per (scope, hour) and upsert into both rollup tables"""
+    deltas = list(deltas)
+    
+    for model, key in _SCOPES:
+        buckets: Dict[tuple, Dict] = {}
+        
+        for delta in deltas:
+            if delta.get(key) is None:
+                continue
+            
+            bucket_key = (delta[key], _hour(delta["received_at"]))
+            bucket = buckets.get(bucket_key)
+            if bucket is None:
+                bucket = {key: bucket_key[0], "bucket_start": bucket_key[1], **{c: 0 for c in _COUNTERS}}
+                buckets[bucket_key] = bucket
+            
+            for counter in _COUNTERS:
+                bucket[counter] += delta.get(counter, 0)
+        
+        upsert_increment(db, model, [key, "bucket_start"], list(buckets.values()))
+
+
+def record_emails_received(db: Session, emails: List[Dict]):
+    """
+    Count newly stored emails (dicts with received_at, department_id, team_member_id)
+    """
+    _apply(db, ({**email, "received_count": 1} for email in emails))
+
+
+def record_emails_replied(db: Session, emails: List[Dict]):
+    """
+    Count emails that were just marked replied (dicts with received_at,
+    department_id, team_member_id, response_time_hours, is_sla_breach)
+    """
+    _apply(db, (
+        {
+            "received_at": email["received_at"],
+            "department_id": email.get("department_id"),
+            "team_member_id": email.get("team_member_id"),
+            "replied_count": 1,
+            "breach_count": 1 if email.get("is_sla_breach") else 0,
+            "response_hours_sum": email.get("response_time_hours") or 0.0,
+            "response_count": 0 if email.get("response_time_hours") is None else 1
+        }
+        for email in emails
+    ))
+    record_response_times(db, emails)
+
+
+def rebuild_metrics_rollups(db: Session, commit: bool = True) -> Dict[str, int]:
+    """
+    Recompute both rollup tables (and the response-time histograms) from the emails table
+    
+    Aggregation runs in SQL (GROUP BY scope, hour), so only one row per
+    bucket is transferred. The rollup and histogram tables are locked
+    before the emails are read, so ingest and reply increments wait for the
+    rebuild instead of being lost between its read and its rewrite. Returns
+    the number of rows written per table.
+    """
+    logger.info("🧮 Rebuilding metrics rollups...")
+    
+    bucket = hour_bucket(db, Email.received_at)
+    written = {}
+    
+    try:
+        lock_tables_for_rebuild(db, [
+            DepartmentMetricsHourly, TeamMemberMetricsHourly,
+            DepartmentResponseHistogram, TeamMemberResponseHistogram
+        ])
+        
+        for model, key in _SCOPES:
+            key_column = getattr(Email, key)
+            
+            rows = db.query(
+                key_column.label("scope_id"),
+                bucket.label("bucket_start"),
+                func.count(Email.id).label("received_count"),
+                func.sum(func.cast(Email.is_replied, Integer)).label("replied_count"),
+                func.sum(func.cast(Email.is_sla_breach, Integer)).label("breach_count"),
+                func.sum(Email.response_time_hours).label("response_hours_sum"),
+                func.count(Email.response_time_hours).label("response_count")
+            ).filter(
+                key_column.isnot(None)
+            ).group_by(key_column, bucket).all()
+            
+            db.query(model).delete(synchronize_session=False)
+            
+            if rows:
+                db.execute(insert(model), [
+                    {
+                        key: row.scope_id,
+                        "bucket_start": as_datetime(row.bucket_start),
+                        "received_count": row.received_count or 0,
+                        "replied_count": row.replied_count or 0,
+                        "breach_count": row.breach_count or 0,
+                        "response_hours_sum": row.response_hours_sum or 0.0,
+                        "response_count": row.response_count or 0
+                    }
+                    for row in rows
+                ])
+            
+            written[model.__tablename__] = len(rows)
+        
+        written.update(rebuild_response_histograms(db))
+        
+        if commit:
+            db.commit()
+        analytics_cache.invalidate()
+        
+        logger.info("✅ Rollups rebuilt: %s", written)
+        return written
+        
+    except Exception:
+        db.rollback()
+        raise
+
+
+def ensure_metrics_rollups(db: Session) -> bool:
+    """
+    Build the rollups once when emails exist but the rollup (or histogram)
+    tables are empty (first start after upgrading); returns True when a
+    rebuild ran
+    """
+    has_rollups = db.query(DepartmentMetricsHourly.id).first() or db.query(TeamMemberMetricsHourly.id).first()
+    
+    if not has_rollups:
+        if not db.query(Email.id).first():
+            return False
+    elif has_response_histograms(db) or not db.query(Email.id).filter(Email.response_time_hours.isnot(None)).first():
+        return False
+    
+    rebuild_metrics_rollups(db)
+    return True
+
+
+def rollup_totals(db: Session, model, key: str, start: Optional[datetime] = None,
+                  end: Optional[datetime] = None, scope_ids: Optional[Iterable[int]] = None):
+    """
+    Subquery of per-scope totals summed over the hourly buckets (optionally
+    within [start, end) and restricted to scope_ids)
+    """
+    scope = getattr(model, key)
+    query = db.query(
+        scope.label(key),
+        func.sum(model.received_count).label("received_count"),
+        func.sum(model.replied_count).label("replied_count"),
+        func.sum(model.breach_count).label("breach_count"),
+        func.sum(model.response_hours_sum).label("response_hours_sum"),
+        func.sum(model.response_count).label("response_count")
+    )
+    
+    if start is not None:
+        query = query.filter(model.bucket_start >= start)
+    if end is not None:
+        query = query.filter(model.bucket_start < end)
+    if scope_ids is not None:
+        query = query.filter(scope.in_(list(scope_ids)))
+    
+    return query.group_by(scope).subquery()
@@ -0,0 +1,218 @@
+"""
+Bounded, streaming extraction of a plain-text preview from MIME messages
+"""
+import io
+import re
+from email.parser import BytesHeaderParser
+from html.parser import HTMLParser
+from typing import BinaryIO, List, Optional, Tuple, Union
+
+from services.imap_parser import decode_partial_body
+
+BODY_PREVIEW_CHARS = 1000       # Characters stored in emails.body
+MAX_HEADER_BYTES = 64 * 1024    # Per part header block
+MAX_TEXT_BYTES = 16 * 1024      # Encoded text/plain bytes kept per part
+MAX_HTML_BYTES = 64 * 1024      # Encoded text/html bytes kept per part
+READ_CHUNK = 8192               # Longest line read at once
+
+_BLOCK_TAGS = {'p', 'div', 'br', 'tr', 'li', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'table', 'blockquote'}
+_SKIP_TAGS = {'script', 'style', 'head', 'title'}
+_SPACES_RE = re.compile(r'[ \t\r\f\v]+')
+_BLANK_LINES_RE = re.compile(r'\n\s*\n+')
+
+# ============================================================================
+# HTML TO TEXT
+# ============================================================================
+
+class _HTMLTextExtractor(HTMLParser):
+    def __init__(self, max_chars: int):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.parts: List[str] = []
+        self.length = 0
+        self.skip_depth = 0
+
+    @property
+    def full(self) -> bool:
+        return self.length >= self.max_chars
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIP_TAGS:
+            self.skip_depth += 1
+        elif tag in _BLOCK_TAGS:
+            self._append('\n')
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+        elif tag in _BLOCK_TAGS:
+            self._append('\n')
+
+    def handle_data(self, data):
+        if not self.skip_depth:
+            self._append(data)
+
+    def _append(self, text: str):
+        if not self.full:
+            self.parts.append(text)
+            self.length += len(text)
+
+
+def normalize_text(text: str) -> str:
+    """Collapse runs of spaces and blank lines"""
+    text = _SPACES_RE.sub(' ', text)
+    text = _BLANK_LINES_RE.sub('\n\n', text)
+    return '\n'.join(line.strip() for line in text.split('\n')).strip()
+
+
+def html_to_text(html: str, max_chars: int = BODY_PREVIEW_CHARS, max_input_chars: int = MAX_HTML_BYTES) -> str:
+    """
+    Convert HTML to plain text, reading at most max_input_chars of markup
+    and stopping once max_chars of text have been produced
+    """
+    extractor = _HTMLTextExtractor(max_chars * 2)  # Headroom for whitespace collapsing
+    html = html[:max_input_chars]
+
+    for start in range(0, len(html), READ_CHUNK):
+        extractor.feed(html[start:start + READ_CHUNK])
+        if extractor.full:
+            break
+
+    return normalize_text(''.join(extractor.parts))[:max_chars]
+
+# ============================================================================
+# STREAMING MIME WALK
+# ============================================================================
+
+class _State:
+    def __init__(self):
+        self.plain: Optional[str] = None
+        self.html: Optional[str] = None
+
+
+def _read_headers(stream: BinaryIO):
+    """Read one header block (up to the blank line), bounded in size"""
+    lines = []
+    size = 0
+    while True:
+        line = stream.readline(READ_CHUNK)
+        if not line or line in (b'\r\n', b'\n'):
+            break
+        size += len(line)
+        if size <= MAX_HEADER_BYTES:
+            lines.append(line)
+    return BytesHeaderParser().parsebytes(b''.join(lines))
+
+
+def _match_boundary(line: bytes, boundaries: List[bytes]) -> Optional[Tuple[str, int]]:
+    if not line.startswith(b'--'):
+        return None
+    stripped = line.rstrip(b'\r\n \t')
+    for level, boundary in enumerate(boundaries):
+        if stripped == boundary:
+            return 'part', level
+        if stripped == boundary + b'--':
+            return 'end', level
+    return None
+
+
+def _consume(stream: BinaryIO, boundaries: List[bytes], keep: Optional[bytearray] = None,
+             cap: int = 0) -> Tuple[str, int]:
+    """
+    Read lines until one of the enclosing boundaries (or EOF)
+
+    Lines are only retained (up to cap bytes) when a keep buffer is given,
+    so skipped parts such as attachments are never held in memory or decoded.
+    """
+    at_line_start = True
+    while True:
+        line = stream.readline(READ_CHUNK)
+        if not line:
+            return 'eof', -1
+
+        if at_line_start:
+            match = _match_boundary(line, boundaries)
+            if match:
+                if keep is not None and keep.endswith(b'\n'):
+                    # The line break before a boundary belongs to the boundary
+                    del keep[-2 if keep.endswith(b'\r\n') else -1:]
+                return match
+
+        if keep is not None and len(keep) < cap:
+            keep += line[:cap - len(keep)]
+
+        at_line_start = line.endswith(b'\n')
+
+
+def _walk(stream: BinaryIO, headers, boundaries: List[bytes], state: _State) -> Tuple[str, int]:
+    content_type = headers.get_content_type()
+
+    if content_type.startswith('multipart/'):
+        boundary = headers.get_param('boundary')
+        if not boundary:
+            return _consume(stream, boundaries)
+
+        levels = [b'--' + str(boundary).encode('utf-8', errors='ignore')] + boundaries
+
+        # Skip the preamble up to the first part
+        kind, level = _consume(stream, levels)
+        while kind == 'part' and level == 0:
+            kind, level = _walk(stream, _read_headers(stream), levels, state)
+            if state.plain is not None:
+                if state.plain.strip():
+                    return 'eof', -1
+                # An empty plain alternative: keep walking for an HTML (or later plain) part
+                state.plain = None
+
+        if kind == 'end' and level == 0:
+            # Skip the epilogue up to the parent boundary
+            return _consume(stream, boundaries)
+        return kind, level - 1 if level > 0 else level
+
+    disposition = (headers.get('Content-Disposition') or '').lower()
+    is_attachment = 'attachment' in disposition or headers.get_filename() is not None
+
+    wanted = (
+        (content_type == 'text/plain' and state.plain is None)
+        or (content_type == 'text/html' and state.html is None)
+    )
+
+    if is_attachment or not wanted:
+        return _consume(stream, boundaries)
+
+    cap = MAX_TEXT_BYTES if content_type == 'text/plain' else MAX_HTML_BYTES
+    raw = bytearray()
+    result = _consume(stream, boundaries, keep=raw, cap=cap)
+
+    text = decode_partial_body(
+        bytes(raw),
+        (headers.get('Content-Transfer-Encoding') or '7bit').strip(),
+        headers.get_content_charset()
+    )
+
+    if content_type == 'text/plain':
+        state.plain = text
+    else:
+        state.html = text
+    return result
+
+
+def extract_body_text(source: Union[bytes, BinaryIO], max_chars: int = BODY_PREVIEW_CHARS) -> str:
+    """
+    Extract a plain-text preview from a raw (possibly truncated) MIME message
+
+    The message is read line by line: attachment subtrees are skipped
+    without decoding, text parts are kept only up to a byte cap, and
+    reading stops as soon as a text/plain part has been found. HTML is
+    converted to text when no text/plain part exists.
+    """
+    stream = io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+    state = _State()
+
+    _walk(stream, _read_headers(stream), [], state)
+
+    if state.plain is not None and state.plain.strip():
+        return state.plain.strip()[:max_chars]
+    if state.html:
+        return html_to_text(state.html, max_chars)
+    return ""
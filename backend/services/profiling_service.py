@@ -0,0 +1,274 @@
+"""
+Sampling profiler for individual HTTP requests
+
+While at least one request is being profiled, a background thread reads
+every thread's stack (sys._current_frames) each PROFILE_INTERVAL_MS and
+credits the stack of the thread running the request's endpoint (recorded
+by profiled_endpoint) to its profile, so concurrent unprofiled requests to
+the same route are never mixed in. Nothing
+is traced per call, so a profiled request runs at close to normal speed and
+unprofiled requests pay nothing. Profiles are written as collapsed stacks
+("frame;frame;frame count" lines), the input of flamegraph.pl and
+speedscope.
+"""
+import contextvars
+import functools
+import inspect
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_SUFFIX = ".folded"
+
+# <timestamp>_<METHOD>_<route slug>_<request id>_<ms>ms.folded
+_FILENAME_RE = re.compile(
+    r"^(?P<time>\d{8}T\d{6})_(?P<method>[A-Z]+)_(?P<route>[A-Za-z0-9-]+)_(?P<request_id>[A-Za-z0-9-]+)_(?P<ms>\d+)ms\.folded$"
+)
+
+
+# The profile of the request handled in this context (copied into worker threads)
+_active_profile: contextvars.ContextVar[Optional["RequestProfile"]] = contextvars.ContextVar(
+    "active_profile", default=None
+)
+
+
+def _slug(value: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "-", value).strip("-") or "root"
+
+
+class RequestProfile:
+    """Stack samples for one request, rooted at its endpoint function"""
+
+    def __init__(self, scope, request_id: str):
+        self.scope = scope
+        self.code = None
+        self.thread_id: Optional[int] = None  # Set when the endpoint starts running
+        self._token = None
+        self.method = scope["method"]
+        self.route = scope["path"]  # Replaced by the route template when the request ends
+        self.request_id = request_id
+        self.started = time.perf_counter()
+        self.started_at = datetime.utcnow()
+        self.duration_ms = 0
+        self.stacks: Dict[str, int] = {}
+
+    @property
+    def sample_count(self) -> int:
+        return sum(self.stacks.values())
+
+    def filename(self) -> str:
+        return (
+            f"{self.started_at:%Y%m%dT%H%M%S}_{self.method}_{_slug(self.route)}_"
+            f"{_slug(self.request_id)}_{self.duration_ms}ms{PROFILE_SUFFIX}"
+        )
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.stacks.items()))
+
+
+def profiled_endpoint(endpoint):
+    """
+    Wrap a route endpoint so a profiled request records the thread its
+    endpoint runs on (a worker thread for plain def handlers)
+    """
+    def bind_thread():
+        profile = _active_profile.get()
+        if profile is not None:
+            profile.thread_id = threading.get_ident()
+
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            bind_thread()
+            return await endpoint(*args, **kwargs)
+    else:
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            bind_thread()
+            return endpoint(*args, **kwargs)
+
+    return wrapper
+
+
+class RequestProfiler:
+    """One sampler thread shared by all requests currently being profiled"""
+
+    def __init__(self):
+        self._active: List[RequestProfile] = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._labels: Dict[object, str] = {}
+        self.profiles_written = 0
+
+    def start(self, scope, request_id: str) -> RequestProfile:
+        profile = RequestProfile(scope, request_id)
+        profile._token = _active_profile.set(profile)
+
+        with self._lock:
+            self._active.append(profile)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True, name="request-profiler")
+                self._thread.start()
+
+        self._wakeup.set()
+        return profile
+
+    def stop(self, profile: RequestProfile) -> RequestProfile:
+        with self._lock:
+            if profile in self._active:
+                self._active.remove(profile)
+
+        if profile._token is not None:
+            _active_profile.reset(profile._token)
+            profile._token = None
+
+        profile.duration_ms = int((time.perf_counter() - profile.started) * 1000)
+        return profile
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            filename = code.co_filename
+            for prefix in sorted(sys.path, key=len, reverse=True):
+                if prefix and filename.startswith(prefix + os.sep):
+                    filename = filename[len(prefix) + 1:]
+                    break
+            label = self._labels.setdefault(code, f"{code.co_name} ({filename}:{code.co_firstlineno})")
+        return label
+
+    def _sample(self, profiles: List[RequestProfile]):
+        frames = sys._current_frames()
+
+        for profile in profiles:
+            # Only the thread running this request's endpoint; others may be
+            # serving unprofiled requests to the same route
+            frame = frames.get(profile.thread_id)
+            if frame is None:
+                continue
+
+            codes = []
+            while frame is not None:
+                codes.append(frame.f_code)
+                frame = frame.f_back
+
+            if profile.code is None:
+                # The router stores the endpoint in the scope once it has matched
+                endpoint = profile.scope.get("endpoint")
+                if endpoint is None:
+                    continue
+                profile.code = getattr(inspect.unwrap(endpoint), "__code__", None)
+
+            if profile.code not in codes:
+                continue
+
+            # Root the stack at the endpoint; frames above it are server plumbing
+            root = codes.index(profile.code)
+            stack = ";".join(self._label(code) for code in reversed(codes[:root + 1]))
+            profile.stacks[stack] = profile.stacks.get(stack, 0) + 1
+
+    def _run(self):
+        interval = max(settings.profile_interval_ms, 1) / 1000
+
+        while True:
+            # Sampling holds the lock, so stop() never sees a profile mid-update
+            with self._lock:
+                sampling = bool(self._active)
+                if sampling:
+                    self._sample(self._active)
+                else:
+                    self._wakeup.clear()
+
+            if sampling:
+                time.sleep(interval)
+            else:
+                # Park until the next profiled request instead of polling
+                self._wakeup.wait()
+
+    # ------------------------------------------------------------------
+    # Stored profiles
+    # ------------------------------------------------------------------
+
+    def save(self, profile: RequestProfile) -> Optional[str]:
+        """Write a profile to PROFILE_DIR, pruning the oldest beyond PROFILE_MAX_FILES"""
+        if not profile.stacks:
+            return None
+
+        try:
+            os.makedirs(settings.profile_dir, exist_ok=True)
+            name = profile.filename()
+            with open(os.path.join(settings.profile_dir, name), "w", encoding="utf-8") as f:
+                f.write(profile.collapsed())
+            self.profiles_written += 1
+
+            stored = sorted(entry["name"] for entry in self.list_profiles())
+            for old in stored[:max(len(stored) - settings.profile_max_files, 0)]:
+                os.remove(os.path.join(settings.profile_dir, old))
+
+            logger.info("🔬 Profiled %s %s (%d ms, %d samples) -> %s",
+                        profile.method, profile.route, profile.duration_ms, profile.sample_count, name)
+            return name
+
+        except OSError as e:
+            logger.warning("⚠️ Could not write profile for %s %s: %s", profile.method, profile.route, e)
+            return None
+
+    def list_profiles(self, route: Optional[str] = None) -> List[Dict]:
+        """Stored profiles, newest first, optionally for one route template"""
+        if not os.path.isdir(settings.profile_dir):
+            return []
+
+        profiles = []
+        for name in os.listdir(settings.profile_dir):
+            match = _FILENAME_RE.match(name)
+            if not match or (route and match["route"] != _slug(route)):
+                continue
+
+            profiles.append({
+                "name": name,
+                "method": match["method"],
+                "route": match["route"],
+                "request_id": match["request_id"],
+                "duration_ms": int(match["ms"]),
+                "created_at": datetime.strptime(match["time"], "%Y%m%dT%H%M%S"),
+                "size_bytes": os.path.getsize(os.path.join(settings.profile_dir, name))
+            })
+
+        return sorted(profiles, key=lambda p: p["name"], reverse=True)
+
+    def read_profile(self, name: str) -> Optional[str]:
+        """Contents of a stored profile; None for unknown or malformed names"""
+        if not _FILENAME_RE.match(name):
+            return None
+
+        path = os.path.join(settings.profile_dir, name)
+        if not os.path.isfile(path):
+            return None
+
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+
+    def get_status(self) -> Dict:
+        with self._lock:
+            active = len(self._active)
+
+        return {
+            "sample_rate": settings.profile_sample_rate,
+            "interval_ms": settings.profile_interval_ms,
+            "active_profiles": active,
+            "profiles_written": self.profiles_written,
+            "directory": settings.profile_dir
+        }
+
+
+# Global profiler instance
+request_profiler = RequestProfiler()
@@ -0,0 +1,185 @@
+"""
+Response-time percentiles from log-bucketed histograms
+
+Each reply adds 1 to a bin of a per-day histogram for its department and
+team member. Bins grow geometrically (DDSketch-style), so any quantile read
+back from them is within RELATIVE_ACCURACY of the true value, and
+histograms for any set of days or scopes merge by summing counts. A
+percentile query over an arbitrary range is therefore one GROUP BY bin,
+independent of how many emails the range holds.
+"""
+import math
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+
+from database.dialect import upsert_increment
+from database.models import DepartmentResponseHistogram, Email, TeamMemberResponseHistogram
+
+# Quantiles are reported to within 2%; changing these invalidates stored bins
+RELATIVE_ACCURACY = 0.02
+MIN_TRACKED_HOURS = 1 / 3600  # Replies faster than a second land in bin 0
+
+_GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+_LOG_GAMMA = math.log(_GAMMA)
+
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+
+_SCOPES = (
+    (DepartmentResponseHistogram, "department_id"),
+    (TeamMemberResponseHistogram, "team_member_id"),
+)
+
+REBUILD_BATCH_ROWS = 5000
+
+
+def bin_index(hours: float) -> int:
+    """Histogram bin holding a response time"""
+    if hours <= MIN_TRACKED_HOURS:
+        return 0
+    return max(1, math.ceil(math.log(hours / MIN_TRACKED_HOURS) / _LOG_GAMMA))
+
+
+def bin_value(index: int) -> float:
+    """Representative response time of a bin (relative error <= RELATIVE_ACCURACY)"""
+    if index <= 0:
+        return 0.0
+    return MIN_TRACKED_HOURS * 2 * _GAMMA ** index / (_GAMMA + 1)
+
+
+def _day(value: datetime) -> datetime:
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _aggregate(emails: Iterable) -> Dict:
+    """
+    (model, scope_id, day, bin) -> count for (received_at, department_id,
+    team_member_id, response_time_hours) tuples
+    """
+    counts = {}
+    
+    for received_at, department_id, team_member_id, hours in emails:
+        if hours is None:
+            continue
+        
+        day, index = _day(received_at), bin_index(hours)
+        for (model, _), scope_id in zip(_SCOPES, (department_id, team_member_id)):
+            if scope_id is not None:
+                key = (model, scope_id, day, index)
+                counts[key] = counts.get(key, 0) + 1
+    
+    return counts
+
+
+def _rows(counts: Dict, model, key: str) -> List[Dict]:
+    return [
+        {key: scope_id, "bucket_start": day, "bin": index, "count": count}
+        for (row_model, scope_id, day, index), count in counts.items()
+        if row_model is model
+    ]
+
+
+def record_response_times(db: Session, emails: List[Dict]):
+    """
+    Add just-replied emails (dicts with received_at, department_id,
+    team_member_id, response_time_hours) to both histograms
+    """
+    counts = _aggregate(
+        (e["received_at"], e.get("department_id"), e.get("team_member_id"), e.get("response_time_hours"))
+        for e in emails
+    )
+    
+    for model, key in _SCOPES:
+        upsert_increment(db, model, [key, "bucket_start", "bin"], _rows(counts, model, key))
+
+
+def rebuild_response_histograms(db: Session) -> Dict[str, int]:
+    """
+    Recompute both histogram tables from replied emails (caller commits)
+    
+    Bins need a logarithm, which SQLite lacks, so rows are streamed and
+    binned here. Returns the number of rows written per table.
+    """
+    rows = db.query(
+        Email.received_at, Email.department_id, Email.team_member_id, Email.response_time_hours
+    ).filter(
+        Email.response_time_hours.isnot(None)
+    ).execution_options(yield_per=REBUILD_BATCH_ROWS)
+    
+    counts = _aggregate(rows)
+    written = {}
+    
+    for model, key in _SCOPES:
+        db.query(model).delete(synchronize_session=False)
+        
+        table_rows = _rows(counts, model, key)
+        if table_rows:
+            db.execute(insert(model), table_rows)
+        written[model.__tablename__] = len(table_rows)
+    
+    return written
+
+
+def has_response_histograms(db: Session) -> bool:
+    return bool(
+        db.query(DepartmentResponseHistogram.id).first()
+        or db.query(TeamMemberResponseHistogram.id).first()
+    )
+
+
+def _quantile(bins: List[tuple], total: int, q: float) -> float:
+    """Value at quantile q from (bin, count) pairs sorted by bin"""
+    rank = q * (total - 1)
+    seen = 0
+    for index, count in bins:
+        seen += count
+        if seen > rank:
+            return bin_value(index)
+    return bin_value(bins[-1][0])
+
+
+def response_time_percentiles(
+    db: Session,
+    scope: str,
+    scope_ids: Optional[Sequence[int]] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    quantiles: Sequence[float] = DEFAULT_QUANTILES
+) -> Dict[int, Dict]:
+    """
+    Merge the daily histograms of each scope id over [start, end)
+    
+    scope is 'department' or 'team_member'; the range resolves to whole
+    days (the histogram granularity). Returns
+    {scope_id: {"count": n, "percentiles": {q: hours}}} for ids with replies.
+    """
+    model, key = _SCOPES[0] if scope == "department" else _SCOPES[1]
+    scope_column = getattr(model, key)
+    
+    query = db.query(
+        scope_column, model.bin, func.sum(model.count)
+    )
+    
+    if scope_ids is not None:
+        query = query.filter(scope_column.in_(list(scope_ids)))
+    if start is not None:
+        query = query.filter(model.bucket_start >= _day(start))
+    if end is not None:
+        query = query.filter(model.bucket_start < end)
+    
+    merged: Dict[int, List[tuple]] = {}
+    for scope_id, index, count in query.group_by(scope_column, model.bin).order_by(scope_column, model.bin):
+        if count:
+            merged.setdefault(scope_id, []).append((index, int(count)))
+    
+    results = {}
+    for scope_id, bins in merged.items():
+        total = sum(count for _, count in bins)
+        results[scope_id] = {
+            "count": total,
+            "percentiles": {q: round(_quantile(bins, total, q), 2) for q in quantiles}
+        }
+    
+    return results
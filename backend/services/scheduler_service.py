@@ -1,11 +1,16 @@
 from apscheduler.schedulers.background import BackgroundScheduler
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
 import logging
+import threading
 
 from database.connection import SessionLocal
-from services.analytics_service import check_and_alert_sla_breaches
+from services.analytics_service import check_and_alert_sla_breaches, get_next_sla_deadline
 from services.email_service import send_sla_breach_alert
+from services.metrics_rollup_service import rebuild_metrics_rollups
 from config.settings import settings
+from config.logging_config import correlation_scope, log_sampled
+from database.query_counter import query_scope
 
 logger = logging.getLogger(__name__)
 
@@ -13,69 +18,251 @@ def check_sla_job():
     """
     Scheduled job to check SLA breaches
     """
-    print(f"\n{'='*60}")
-    print(f"⏰ [SCHEDULED JOB] Running SLA breach check at {datetime.now()}")
-    print(f"{'='*60}")
-    
-    db = SessionLocal()
-    try:
-        # Check for SLA breaches
-        alerts = check_and_alert_sla_breaches(db)
+    with correlation_scope(prefix="sla-"), query_scope("SLA check job"):
+        logger.debug("⏰ [SCHEDULED JOB] Running SLA breach check")
         
-        # Send email alerts if enabled
-        if settings.enable_alerts and alerts:
-            print(f"\n📧 Sending {len(alerts)} alert email(s)...")
-            for alert in alerts:
-                success = send_sla_breach_alert(settings.alert_email, alert)
-                if success:
-                    print(f"  ✅ Alert sent for email ID {alert['email_id']}")
-                else:
-                    print(f"  ❌ Failed to send alert for email ID {alert['email_id']}")
+        db = SessionLocal()
+        try:
+            # Check for SLA breaches
+            alerts = check_and_alert_sla_breaches(db)
+            
+            # Send email alerts if enabled
+            if settings.enable_alerts and alerts:
+                logger.info("📧 Sending %d alert email(s)...", len(alerts))
+                for alert in alerts:
+                    success = send_sla_breach_alert(settings.alert_email, alert)
+                    if success:
+                        log_sampled(logger, logging.DEBUG, "sla.alert_sent",
+                                    "✅ Alert sent for email ID %s", alert['email_id'])
+                    else:
+                        logger.warning("❌ Failed to send alert for email ID %s", alert['email_id'])
+            
+            logger.debug("✅ SLA check completed. Found %d breach(es)", len(alerts))
+            
+        except Exception as e:
+            logger.exception("Error in SLA check job: %s", e)
+        finally:
+            db.close()
+
+def rebuild_metrics_job():
+    """
+    Scheduled job reconciling the hourly metrics rollups with the emails table
+    """
+    with correlation_scope(prefix="rollup-"), query_scope("metrics rollup job"):
+        logger.info("⏰ [SCHEDULED JOB] Rebuilding metrics rollups")
+        
+        db = SessionLocal()
+        try:
+            rebuild_metrics_rollups(db)
+        except Exception as e:
+            logger.exception("Error in metrics rollup job: %s", e)
+        finally:
+            db.close()
+
+# ============================================================================
+# DEADLINE-DRIVEN SLA SCHEDULER
+# ============================================================================
+
+class SlaDeadlineScheduler:
+    """
+    Runs the SLA check at the next stored sla_deadline_at instead of on a fixed timer
+    
+    After each check the job is re-armed for the earliest upcoming deadline
+    (or the fallback interval, whichever comes first). Ingest and threshold
+    changes call notify_deadline() so earlier deadlines pull the next run in.
+    """
+    
+    JOB_ID = 'sla_check_job'
+    
+    def __init__(self):
+        self.scheduler: Optional[BackgroundScheduler] = None
+        self.next_run_at: Optional[datetime] = None
+        self.checks_run = 0
+        self._lock = threading.Lock()
+        self._running = threading.Lock()  # Held for the duration of a check
+        self._rerun = False
+    
+    @property
+    def is_running(self) -> bool:
+        return self.scheduler is not None and self.scheduler.running
+    
+    def start(self) -> BackgroundScheduler:
+        with self._lock:
+            if self.is_running:
+                return self.scheduler
+            self.scheduler = BackgroundScheduler(timezone=timezone.utc)
+            self.scheduler.start()
+        
+        # Run immediately on startup, then follow the deadlines
+        self._arm(datetime.utcnow())
+        
+        print("\n" + "="*60)
+        print("⏰ Scheduler started successfully")
+        print("="*60)
+        print("📅 Scheduled Jobs:")
+        print(f"  - SLA Breach Check: at each SLA deadline "
+              f"(at least every {settings.sla_check_fallback_minutes} minutes)")
+        print("="*60 + "\n")
+        
+        return self.scheduler
+    
+    def stop(self):
+        with self._lock:
+            scheduler, self.scheduler = self.scheduler, None
+            self.next_run_at = None
+        if scheduler is not None and scheduler.running:
+            scheduler.shutdown(wait=False)
+    
+    def notify_deadline(self, deadline: datetime):
+        """Pull the next check in when a new deadline is earlier than the armed one"""
+        if not self.is_running:
+            return
+        
+        with self._lock:
+            if self.next_run_at is not None and deadline >= self.next_run_at:
+                return
+        
+        self._arm(max(deadline, datetime.utcnow()))
+    
+    def _arm(self, run_at: datetime):
+        with self._lock:
+            if not self.is_running:
+                return
+            self.next_run_at = run_at
+            self.scheduler.add_job(
+                self._run,
+                'date',
+                run_date=run_at.replace(tzinfo=timezone.utc),
+                id=self.JOB_ID,
+                name='Check SLA Breaches',
+                replace_existing=True,
+                misfire_grace_time=None,
+                # A run armed during a check (notify_deadline with a past
+                # deadline) must not be dropped as a max_instances miss
+                max_instances=2
+            )
+    
+    def _run(self):
+        with self._lock:
+            if not self._running.acquire(blocking=False):
+                # A check is in progress: it repeats itself when it finishes
+                self._rerun = True
+                return
+            self._rerun = False
+            self.next_run_at = None
         
-        print(f"\n✅ SLA check completed. Found {len(alerts)} breach(es)")
+        try:
+            self._check_and_rearm()
+        finally:
+            with self._lock:
+                self._running.release()
+                rerun = self._rerun
         
-    except Exception as e:
-        print(f"❌ Error in SLA check job: {e}")
-        logger.error(f"Error in SLA check job: {e}")
-    finally:
-        db.close()
-        print(f"{'='*60}\n")
+        if rerun:
+            self._arm(datetime.utcnow())
+    
+    def _check_and_rearm(self):
+        check_sla_job()
+        self.checks_run += 1
+        
+        # Re-arm for the next deadline; the fallback covers rows written elsewhere
+        now = datetime.utcnow()
+        run_at = now + timedelta(minutes=settings.sla_check_fallback_minutes)
+        
+        db = SessionLocal()
+        try:
+            next_deadline = get_next_sla_deadline(db, now)
+            if next_deadline is not None:
+                # Deadlines are strict (elapsed > threshold), so check just after
+                run_at = min(run_at, next_deadline + timedelta(seconds=1))
+        except Exception as e:
+            logger.error("❌ Failed to find the next SLA deadline: %s", e)
+        finally:
+            db.close()
+        
+        with self._lock:
+            # A notify_deadline() during the check may already have armed an earlier run
+            if (self.next_run_at is not None and self.next_run_at <= run_at
+                    and self.scheduler is not None and self.scheduler.get_job(self.JOB_ID) is not None):
+                return
+        
+        self._arm(run_at)
+        logger.debug("⏰ Next SLA check at %s UTC", run_at)
+    
+    def get_status(self) -> Dict:
+        return {
+            "is_running": self.is_running,
+            "next_run_at": self.next_run_at.isoformat() if self.next_run_at else None,
+            "checks_run": self.checks_run,
+            "fallback_minutes": settings.sla_check_fallback_minutes
+        }
+
+
+# ============================================================================
+# METRICS ROLLUP RECONCILIATION
+# ============================================================================
+
+class RollupRebuildScheduler:
+    """
+    Rebuilds the metrics rollups every settings.metrics_rollup_rebuild_hours
+    
+    Runs on its own scheduler, so reconciliation does not depend on
+    ENABLE_SLA_SCHEDULER.
+    """
+    
+    JOB_ID = 'metrics_rollup_job'
+    
+    def __init__(self):
+        self.scheduler: Optional[BackgroundScheduler] = None
+        self._lock = threading.Lock()
+    
+    @property
+    def is_running(self) -> bool:
+        return self.scheduler is not None and self.scheduler.running
+    
+    def start(self) -> Optional[BackgroundScheduler]:
+        with self._lock:
+            if self.is_running or settings.metrics_rollup_rebuild_hours <= 0:
+                return self.scheduler
+            self.scheduler = BackgroundScheduler(timezone=timezone.utc)
+            self.scheduler.add_job(
+                rebuild_metrics_job,
+                'interval',
+                hours=settings.metrics_rollup_rebuild_hours,
+                id=self.JOB_ID,
+                name='Rebuild Metrics Rollups',
+                replace_existing=True,
+                coalesce=True
+            )
+            self.scheduler.start()
+        
+        print(f"🧮 Metrics rollup rebuild scheduled every {settings.metrics_rollup_rebuild_hours} hour(s)")
+        return self.scheduler
+    
+    def stop(self):
+        with self._lock:
+            scheduler, self.scheduler = self.scheduler, None
+        if scheduler is not None and scheduler.running:
+            scheduler.shutdown(wait=False)
+    
+    def get_status(self) -> Dict:
+        job = self.scheduler.get_job(self.JOB_ID) if self.is_running else None
+        return {
+            "is_running": self.is_running,
+            "interval_hours": settings.metrics_rollup_rebuild_hours,
+            "next_run_at": job.next_run_time.isoformat() if job and job.next_run_time else None
+        }
+
+
+# Global scheduler instances
+sla_scheduler = SlaDeadlineScheduler()
+rollup_scheduler = RollupRebuildScheduler()
 
 def start_scheduler():
     """
     Start the background scheduler
     """
-    scheduler = BackgroundScheduler()
-    
-    # Run SLA check every 30 minutes
-    scheduler.add_job(
-        check_sla_job,
-        'interval',
-        minutes=30,
-        id='sla_check_job',
-        name='Check SLA Breaches',
-        replace_existing=True
-    )
-    
-    # Run immediately on startup
-    scheduler.add_job(
-        check_sla_job,
-        'date',
-        run_date=datetime.now(),
-        id='sla_check_startup',
-        name='Initial SLA Check'
-    )
-    
-    scheduler.start()
-    
-    print("\n" + "="*60)
-    print("⏰ Scheduler started successfully")
-    print("="*60)
-    print("📅 Scheduled Jobs:")
-    print("  - SLA Breach Check: Every 30 minutes")
-    print("="*60 + "\n")
-    
-    return scheduler
+    return sla_scheduler.start()
 
 # For manual testing
 if __name__ == "__main__":
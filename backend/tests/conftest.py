@@ -0,0 +1,61 @@
+"""
+Shared fixtures: the app on a throwaway SQLite database seeded with the
+benchmark data generator, served through TestClient
+
+The environment is set before any application module is imported, since
+config.settings reads it at import time.
+"""
+import os
+import sys
+import tempfile
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_DB_DIR = tempfile.mkdtemp(prefix="email_monitoring_tests_")
+
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{os.path.join(_DB_DIR, 'test.db')}",
+    DEBUG_MODE="false",
+    LOG_LEVEL="WARNING",
+    ENABLE_SLA_SCHEDULER="false",
+    ENABLE_AUTO_SYNC="false",
+    METRICS_ROLLUP_REBUILD_HOURS="0",
+    PROFILE_SAMPLE_RATE="0",
+)
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def client():
+    """TestClient with the lifespan run (database initialised, thread pool sized)"""
+    from fastapi.testclient import TestClient
+    from main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(scope="session")
+def seeded_db(client):
+    """A small synthetic dataset: 3 departments x 4 team members, 600 emails over 30 days"""
+    from benchmarks.generate_data import generate
+    from database.connection import SessionLocal
+
+    db = SessionLocal()
+    try:
+        generate(db, emails=600, departments=3, members_per_department=4, days=30)
+        yield db
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def cold_cache():
+    """Clear the analytics cache so the uncached path is exercised"""
+    from services.cache_service import analytics_cache
+
+    analytics_cache.invalidate()
+    yield
+    analytics_cache.invalidate()
@@ -0,0 +1,51 @@
+"""
+Route handlers run in worker threads, so one blocked request does not hold
+up the others
+"""
+import threading
+import time
+
+from config.settings import settings
+
+
+def test_blocked_handler_does_not_serialize_requests(client, seeded_db, monkeypatch):
+    import api.routes as routes
+    
+    real_summary = routes.get_dashboard_summary
+    entered = threading.Event()
+    release = threading.Event()
+    
+    def blocked_summary(db, *args, **kwargs):
+        # Stands in for a slow query or IMAP call inside a handler
+        entered.set()
+        release.wait(10)
+        return real_summary(db, *args, **kwargs)
+    
+    monkeypatch.setattr(routes, "get_dashboard_summary", blocked_summary)
+    
+    first = {}
+    worker = threading.Thread(target=lambda: first.update(response=client.get("/api/dashboard/summary")))
+    worker.start()
+    
+    try:
+        assert entered.wait(5), "the first request never reached its handler"
+        
+        started = time.perf_counter()
+        second = client.get("/api/departments/")
+        elapsed = time.perf_counter() - started
+        
+        assert second.status_code == 200
+        assert worker.is_alive(), "the first request should still be blocked"
+        assert elapsed < 5
+    finally:
+        release.set()
+        worker.join(10)
+    
+    assert first["response"].status_code == 200
+
+
+def test_thread_pool_is_sized_from_settings(client):
+    import anyio.to_thread
+    
+    limiter = client.portal.call(anyio.to_thread.current_default_thread_limiter)
+    assert limiter.total_tokens == settings.api_threadpool_size
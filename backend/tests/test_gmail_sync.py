@@ -0,0 +1,121 @@
+"""
+Gmail sync against the local fake IMAP server
+"""
+import threading
+
+import pytest
+
+from benchmarks.fake_imap_server import FakeImapServer
+
+
+@pytest.fixture
+def imap_server(monkeypatch):
+    from config.settings import settings
+    from services.imap_session_service import imap_session_manager
+    
+    with FakeImapServer() as server:
+        monkeypatch.setattr(settings, "imap_host", server.host)
+        monkeypatch.setattr(settings, "imap_port", server.port)
+        monkeypatch.setattr(settings, "imap_use_ssl", False)
+        monkeypatch.setattr(settings, "enable_sent_reconciliation", False)
+        yield server
+        imap_session_manager.close_all()
+
+
+def _member(db, account):
+    from database.models import Department, TeamMember
+    from services.directory_cache import directory_cache
+    
+    department = Department(name=f"Sync {account.email_address}", sla_threshold_hours=4.0)
+    db.add(department)
+    db.flush()
+    member = TeamMember(name=account.email_address, email=account.email_address,
+                        app_password=account.password, department_id=department.id, is_active=True)
+    db.add(member)
+    db.commit()
+    directory_cache.invalidate(db)  # As the team member endpoints do
+    return member
+
+
+def _stored(db, member) -> int:
+    from database.models import Email
+    
+    return db.query(Email).filter(Email.recipient == member.email).count()
+
+
+def test_bootstrap_drains_the_unread_backlog_oldest_first(client, imap_server):
+    from database.connection import SessionLocal
+    from database.models import Email
+    from services.email_integration_service import sync_team_member_gmail
+    
+    account = imap_server.seed(mailboxes=1, messages=25, unread_ratio=1.0, reply_ratio=0.0,
+                               attachment_ratio=0.0, domain="backlog.gmail.com")[0]
+    
+    db = SessionLocal()
+    try:
+        member = _member(db, account)
+        
+        processed = [sync_team_member_gmail(db, member, account.password, limit=10)["emails_processed"]
+                     for _ in range(4)]
+        
+        assert processed == [10, 10, 5, 0]
+        
+        subjects = {row.subject for row in db.query(Email.subject).filter(Email.recipient == member.email)}
+        assert subjects == {f"Request {i} for mailbox 1" for i in range(25)}
+    finally:
+        db.close()
+
+
+def test_bootstrap_skips_read_mail_when_the_backlog_fits(client, imap_server):
+    from database.connection import SessionLocal
+    from services.email_integration_service import sync_team_member_gmail
+    
+    account = imap_server.seed(mailboxes=1, messages=20, unread_ratio=0.5, reply_ratio=0.0,
+                               attachment_ratio=0.0, domain="fits.gmail.com")[0]
+    unread = sum(1 for m in account.folders["INBOX"].messages if "\\Seen" not in m.flags)
+    
+    db = SessionLocal()
+    try:
+        member = _member(db, account)
+        
+        first = sync_team_member_gmail(db, member, account.password, limit=50)
+        second = sync_team_member_gmail(db, member, account.password, limit=50)
+        
+        assert first["emails_processed"] == unread
+        assert second["emails_processed"] == 0
+        assert _stored(db, member) == unread
+    finally:
+        db.close()
+
+
+def test_concurrent_syncs_of_one_mailbox_share_the_checkpoint(client, imap_server):
+    from database.connection import SessionLocal
+    from database.models import MailboxCheckpoint
+    from services.email_integration_service import _sync_member_worker
+    
+    account = imap_server.seed(mailboxes=1, messages=20, unread_ratio=1.0, reply_ratio=0.0,
+                               attachment_ratio=0.0, domain="race.gmail.com")[0]
+    imap_server.latency_ms = 20  # Keep both syncs in flight at the same time
+    
+    db = SessionLocal()
+    try:
+        member = _member(db, account)
+        
+        # An IDLE push and the scheduled sync bootstrapping the same mailbox
+        results = [None, None]
+        
+        def run(i):
+            results[i] = _sync_member_worker(member.id, limit=10)
+        
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert [r["errors"] for r in results] == [[], []]
+        assert sorted(r["emails_processed"] for r in results) == [10, 10]
+        assert _stored(db, member) == 20
+        assert db.query(MailboxCheckpoint).filter(MailboxCheckpoint.team_member_id == member.id).count() == 1
+    finally:
+        db.close()
@@ -0,0 +1,33 @@
+"""
+Body preview extraction from raw MIME messages
+"""
+from services.mime_text import extract_body_text
+
+
+def _alternative(plain: str, html: str) -> bytes:
+    return (
+        "MIME-Version: 1.0\r\n"
+        'Content-Type: multipart/alternative; boundary="alt"\r\n'
+        "\r\n"
+        "--alt\r\n"
+        "Content-Type: text/plain; charset=utf-8\r\n"
+        "\r\n"
+        f"{plain}\r\n"
+        "--alt\r\n"
+        "Content-Type: text/html; charset=utf-8\r\n"
+        "\r\n"
+        f"{html}\r\n"
+        "--alt--\r\n"
+    ).encode()
+
+
+def test_plain_part_is_preferred():
+    assert extract_body_text(_alternative("Plain body", "<p>HTML body</p>")) == "Plain body"
+
+
+def test_empty_plain_part_falls_back_to_html():
+    assert extract_body_text(_alternative("", "<p>Hello there</p>")) == "Hello there"
+
+
+def test_whitespace_plain_part_falls_back_to_html():
+    assert extract_body_text(_alternative("  \r\n  ", "<p>Hello there</p>")) == "Hello there"
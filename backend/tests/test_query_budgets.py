@@ -0,0 +1,42 @@
+"""
+Pinned SQL query budgets for the key read endpoints
+
+Each endpoint is called once to warm the directory cache, then measured
+with a cold analytics cache. The budgets are the current query counts; an
+N+1 regression (one query per department, member or email) exceeds them
+even on this small dataset.
+"""
+import pytest
+
+from database.query_counter import assert_query_budget
+
+BUDGETS = [
+    ("/api/emails/", 1),
+    ("/api/sla/breaches/", 5),
+    ("/api/metrics/departments/", 2),
+    ("/api/dashboard/summary", 4),
+]
+
+
+@pytest.mark.parametrize("url, budget", BUDGETS)
+def test_endpoint_query_budget(client, seeded_db, cold_cache, url, budget):
+    client.get(url)  # Warm-up: directory cache, SQLite page cache
+    
+    from services.cache_service import analytics_cache
+    analytics_cache.invalidate()
+    
+    with assert_query_budget(budget, name=url) as stats:
+        response = client.get(url)
+    
+    assert response.status_code == 200, response.text
+    assert stats.count > 0, "the request's queries were not observed"
+
+
+def test_budget_overrun_reports_the_statements(client, seeded_db, cold_cache):
+    with pytest.raises(AssertionError) as excinfo:
+        with assert_query_budget(0, name="GET /api/emails/"):
+            client.get("/api/emails/")
+    
+    message = str(excinfo.value)
+    assert "GET /api/emails/ ran 1 queries, budget is 0" in message
+    assert "SELECT emails.id" in message
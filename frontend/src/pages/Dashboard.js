@@ -26,7 +26,7 @@ import {
   Cell
 } from 'recharts';
 import StatCard from '../components/StatCard';
-import { getDashboardStats, getSLABreaches } from '../services/api';
+import { getDashboardStats } from '../services/api';
 import { formatHours } from '../utils/helpers';
 
 const Dashboard = () => {
@@ -48,14 +48,10 @@ const Dashboard = () => {
     try {
       setLoading(true);
       
-      // Load dashboard stats
+      // Load dashboard stats (includes the newest SLA breaches)
       const statsResponse = await getDashboardStats();
       setStats(statsResponse.data);
-      
-      // Load SLA breaches
-      const breachesResponse = await getSLABreaches();
-      const breachData = breachesResponse.data.sla_breaches || [];
-      setBreaches(breachData.slice(0, 5));
+      setBreaches(statsResponse.data.recentBreaches || []);
       
     } catch (error) {
       console.error('Error loading dashboard:', error);
@@ -240,7 +236,7 @@ const Dashboard = () => {
       <div className="card">
         <div className="card-header">
           <h3 className="card-title">Recent SLA Breaches</h3>
-          <span className="badge danger">{breaches.length} Active</span>
+          <span className="badge danger">{stats.slaBreaches} Active</span>
         </div>
         <div className="card-body">
           {breaches.length === 0 ? (
@@ -266,7 +262,7 @@ const Dashboard = () => {
                 </thead>
                 <tbody>
                   {breaches.map((breach) => (
-                    <tr key={breach.id}>
+                    <tr key={breach.email_id}>
                       <td>{breach.subject || 'No subject'}</td>
                       <td>{breach.sender}</td>
                       <td>{breach.recipient}</td>
@@ -4,8 +4,7 @@ import {
   getDepartments, 
   createDepartment, 
   updateDepartment, 
-  deleteDepartment,
-  getDepartmentMetrics 
+  deleteDepartment
 } from '../services/api';
 import { formatHours } from '../utils/helpers';
 
@@ -26,21 +25,10 @@ const Departments = () => {
   const loadDepartments = async () => {
     try {
       setLoading(true);
-      const response = await getDepartments();
+      // Metrics are embedded server-side from one grouped query
+      const response = await getDepartments({ include_metrics: true });
       
-      // Load metrics for each department
-      const deptsWithMetrics = await Promise.all(
-        response.data.map(async (dept) => {
-          try {
-            const metricsResponse = await getDepartmentMetrics(dept.id);
-            return { ...dept, metrics: metricsResponse.data };
-          } catch {
-            return { ...dept, metrics: null };
-          }
-        })
-      );
-      
-      setDepartments(deptsWithMetrics);
+      setDepartments(response.data);
     } catch (error) {
       console.error('Error loading departments:', error);
     } finally {
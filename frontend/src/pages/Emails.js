@@ -1,14 +1,19 @@
 import React, { useState, useEffect } from 'react';
 import { Mail, Clock, CheckCircle, AlertTriangle, Filter, Search, ArrowUpDown, TrendingUp } from 'lucide-react';
-import { getEmails, logReceivedEmail } from '../services/api';
+import { getEmailsPage, getDepartmentMetrics, logReceivedEmail } from '../services/api';
 import { formatDate, formatHours, truncateText } from '../utils/helpers';
 import GmailSyncButton from '../components/GmailSyncButton';
 
+const PAGE_SIZE = 100;
+
 const Emails = () => {
-  // Separate state for all emails vs filtered emails
-  const [allEmails, setAllEmails] = useState([]); // All emails from database (for stats)
-  const [filteredEmails, setFilteredEmails] = useState([]); // Filtered emails (for table)
+  // Loaded pages vs search-filtered emails
+  const [emails, setEmails] = useState([]); // Pages loaded so far (server-side filters applied)
+  const [filteredEmails, setFilteredEmails] = useState([]); // Search-filtered emails (for table)
+  const [nextCursor, setNextCursor] = useState(null);
+  const [stats, setStats] = useState({ total: 0, replied: 0, pending: 0, breaches: 0 });
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [filters, setFilters] = useState({
     is_replied: null,
     is_sla_breach: null,
@@ -24,27 +29,40 @@ const Emails = () => {
     team_member_id: null
   });
 
-  // Load all emails on component mount
+  // Load stats on component mount
   useEffect(() => {
-    loadEmails();
+    loadStats();
   }, []);
 
-  // Apply filters whenever filters or allEmails change
+  // Reload the first page whenever a server-side filter changes
+  useEffect(() => {
+    loadEmails();
+  }, [filters.is_replied, filters.is_sla_breach]);
+
+  // Apply search whenever it or the loaded emails change
   useEffect(() => {
     applyFilters();
-  }, [filters, allEmails]);
+  }, [filters.search, emails]);
+
+  // Status and SLA filters are applied by the API
+  const serverFilters = () => {
+    const params = { limit: PAGE_SIZE };
+    if (filters.is_replied !== null) params.is_replied = filters.is_replied;
+    if (filters.is_sla_breach !== null) params.is_sla_breach = filters.is_sla_breach;
+    return params;
+  };
 
-  // Load ALL emails from database with high limit (same as Dashboard)
+  // Load the first page of emails
   const loadEmails = async () => {
     try {
       setLoading(true);
-      console.log('📧 Loading ALL emails from database...');
+      console.log('📧 Loading first page of emails...');
       
-      // Use high limit to ensure we get ALL emails (same as Dashboard does)
-      const response = await getEmails({ limit: 10000 });
+      const page = await getEmailsPage(serverFilters());
       
-      console.log('✅ Loaded emails from API:', response.data.length);
-      setAllEmails(response.data);
+      console.log('✅ Loaded emails from API:', page.emails.length);
+      setEmails(page.emails);
+      setNextCursor(page.nextCursor);
     } catch (error) {
       console.error('❌ Error loading emails:', error);
     } finally {
@@ -52,19 +70,45 @@ const Emails = () => {
     }
   };
 
-  // Apply filters to allEmails for table display
-  const applyFilters = () => {
-    let filtered = [...allEmails];
-    
-    // Apply reply status filter
-    if (filters.is_replied !== null) {
-      filtered = filtered.filter(email => email.is_replied === filters.is_replied);
+  // Append the next page (keyset cursor from the previous response)
+  const loadMoreEmails = async () => {
+    if (!nextCursor) return;
+    try {
+      setLoadingMore(true);
+      const page = await getEmailsPage(serverFilters(), nextCursor);
+      setEmails(prev => [...prev, ...page.emails]);
+      setNextCursor(page.nextCursor);
+    } catch (error) {
+      console.error('❌ Error loading more emails:', error);
+    } finally {
+      setLoadingMore(false);
     }
-    
-    // Apply SLA breach filter
-    if (filters.is_sla_breach !== null) {
-      filtered = filtered.filter(email => email.is_sla_breach === filters.is_sla_breach);
+  };
+
+  // Totals come from the aggregated metrics, not from loaded rows
+  const loadStats = async () => {
+    try {
+      const response = await getDepartmentMetrics();
+      const totals = response.data.reduce((acc, dept) => ({
+        total: acc.total + dept.total_emails,
+        replied: acc.replied + dept.replied_emails,
+        pending: acc.pending + dept.pending_emails,
+        breaches: acc.breaches + dept.sla_breaches
+      }), { total: 0, replied: 0, pending: 0, breaches: 0 });
+      setStats(totals);
+    } catch (error) {
+      console.error('❌ Error loading email stats:', error);
     }
+  };
+
+  const reloadAll = () => {
+    loadEmails();
+    loadStats();
+  };
+
+  // Apply search to the loaded emails for table display
+  const applyFilters = () => {
+    let filtered = [...emails];
     
     // Apply search filter
     if (filters.search) {
@@ -127,7 +171,7 @@ const Emails = () => {
         body: '',
         team_member_id: null
       });
-      loadEmails(); // Reload all emails
+      reloadAll(); // Reload first page and stats
     } catch (error) {
       console.error('Error logging email:', error);
       alert('Failed to log email. Please try again.');
@@ -161,11 +205,11 @@ const Emails = () => {
     return <div className="loading"><div className="spinner"></div></div>;
   }
 
-  // Calculate stats from ALL emails (not filtered) - DYNAMIC FROM DATABASE
-  const totalEmails = allEmails.length;
-  const repliedEmails = allEmails.filter(e => e.is_replied).length;
-  const pendingEmails = allEmails.filter(e => !e.is_replied).length;
-  const slaBreaches = allEmails.filter(e => e.is_sla_breach).length;
+  // Stats cover ALL emails (not just loaded pages) - DYNAMIC FROM DATABASE
+  const totalEmails = stats.total;
+  const repliedEmails = stats.replied;
+  const pendingEmails = stats.pending;
+  const slaBreaches = stats.breaches;
 
   // Calculate percentages for trend display
   const replyRate = totalEmails > 0 ? ((repliedEmails / totalEmails) * 100).toFixed(1) : 0;
@@ -190,7 +234,7 @@ const Emails = () => {
             Monitor all incoming and outgoing emails
           </p>
         </div>
-        <GmailSyncButton onSyncComplete={loadEmails} />
+        <GmailSyncButton onSyncComplete={reloadAll} />
       </div>
 
       {/* Filters and Search */}
@@ -347,7 +391,7 @@ const Emails = () => {
       <div className="card">
         <div className="card-header">
           <h3 className="card-title">
-            All Emails ({sortedEmails.length})
+            All Emails ({sortedEmails.length}{nextCursor ? '+' : ''})
           </h3>
           <div style={{ fontSize: '0.875rem', color: '#6b7280' }}>
             Click column headers to sort
@@ -465,6 +509,18 @@ const Emails = () => {
             </tbody>
           </table>
         </div>
+        
+        {nextCursor && (
+          <div style={{ textAlign: 'center', padding: '1rem' }}>
+            <button 
+              className="btn btn-secondary"
+              onClick={loadMoreEmails}
+              disabled={loadingMore}
+            >
+              {loadingMore ? 'Loading...' : 'Load More'}
+            </button>
+          </div>
+        )}
       </div>
 
       {/* New Email Modal */}
@@ -12,40 +12,54 @@ import {
   Legend, 
   ResponsiveContainer 
 } from 'recharts';
-import { getOverallMetrics, getDepartments, getEmails } from '../services/api';
+import { getReportTrends } from '../services/api';
 import { exportToCSV } from '../utils/helpers';
 
+// Each range is aggregated server-side into a handful of points
+const REPORT_RANGES = {
+  week: { days: 7, bucket: 'day' },
+  month: { days: 30, bucket: 'week' },
+  quarter: { days: 90, bucket: 'week' }
+};
+
+const formatBucket = (bucketStart, bucket) => {
+  const date = new Date(bucketStart);
+  if (bucket === 'month') {
+    return date.toLocaleDateString(undefined, { month: 'short', year: 'numeric' });
+  }
+  const label = date.toLocaleDateString(undefined, { month: 'short', day: 'numeric' });
+  return bucket === 'week' ? `Week of ${label}` : label;
+};
+
 const Reports = () => {
   const [loading, setLoading] = useState(true);
-  const [metrics, setMetrics] = useState(null);
-  const [departments, setDepartments] = useState([]);
-  const [allEmails, setAllEmails] = useState([]);
+  const [report, setReport] = useState(null);
   const [dateRange, setDateRange] = useState('week'); // week, month, quarter
 
   useEffect(() => {
     loadReportData();
-  }, []);
+  }, [dateRange]);
 
   const loadReportData = async () => {
     try {
       setLoading(true);
       console.log('📊 Loading report data...');
       
-      const [metricsRes, deptsRes, emailsRes] = await Promise.all([
-        getOverallMetrics(),
-        getDepartments(),
-        getEmails({ limit: 10000 }) // ← Load ALL emails with high limit
-      ]);
+      const { days, bucket } = REPORT_RANGES[dateRange];
+      const start = new Date(Date.now() - (days - 1) * 24 * 60 * 60 * 1000);
+      
+      const reportRes = await getReportTrends({
+        start: start.toISOString().slice(0, 10), // whole UTC days, ending today
+        bucket
+      });
       
-      console.log('✅ Loaded data:', {
-        metrics: metricsRes.data,
-        departments: deptsRes.data.length,
-        emails: emailsRes.data.length
+      console.log('✅ Loaded report:', {
+        buckets: reportRes.data.buckets.length,
+        departments: reportRes.data.departments.length,
+        emails: reportRes.data.totals.total_emails
       });
       
-      setMetrics(metricsRes.data);
-      setDepartments(deptsRes.data);
-      setAllEmails(emailsRes.data);
+      setReport(reportRes.data);
     } catch (error) {
       console.error('❌ Error loading reports:', error);
     } finally {
@@ -54,76 +68,36 @@ const Reports = () => {
   };
 
   const handleExport = () => {
-    // Calculate real department stats from actual emails
-    const departmentStats = departments.map(dept => {
-      const deptEmails = allEmails.filter(email => email.department_id === dept.id);
-      const repliedEmails = deptEmails.filter(e => e.is_replied);
-      const breaches = deptEmails.filter(e => e.is_sla_breach);
-      const compliance = deptEmails.length > 0 
-        ? (((deptEmails.length - breaches.length) / deptEmails.length) * 100).toFixed(1)
-        : 100;
-      
-      const avgResponseTime = repliedEmails.length > 0
-        ? (repliedEmails.reduce((sum, e) => sum + (e.response_time_hours || 0), 0) / repliedEmails.length).toFixed(2)
-        : 0;
-
-      return {
-        Department: dept.name,
-        'SLA Threshold': `${dept.sla_threshold_hours}h`,
-        'Total Emails': deptEmails.length,
-        'Replied': repliedEmails.length,
-        'Pending': deptEmails.length - repliedEmails.length,
-        'Avg Response Time': `${avgResponseTime}h`,
-        'SLA Compliance': `${compliance}%`,
-        'Breaches': breaches.length
-      };
-    });
+    const departmentStats = (report?.departments || []).map(dept => ({
+      Department: dept.department_name,
+      'SLA Threshold': `${dept.sla_threshold_hours}h`,
+      'Total Emails': dept.total_emails,
+      'Replied': dept.replied_emails,
+      'Pending': dept.total_emails - dept.replied_emails,
+      'Avg Response Time': `${(dept.average_response_time || 0).toFixed(2)}h`,
+      'SLA Compliance': `${dept.sla_compliance_rate.toFixed(1)}%`,
+      'Breaches': dept.sla_breaches
+    }));
     
     exportToCSV(departmentStats, `email-monitoring-report-${Date.now()}.csv`);
   };
 
-  // Calculate real trend data from emails
   const getTrendData = () => {
-    const weeks = ['Week 1', 'Week 2', 'Week 3', 'Week 4'];
-    const now = new Date();
-    
-    return weeks.map((week, index) => {
-      // Get emails from this week (simplified - in production use actual date ranges)
-      const weekEmails = allEmails.slice(index * 25, (index + 1) * 25);
-      const repliedEmails = weekEmails.filter(e => e.is_replied && e.response_time_hours);
-      const avgTime = repliedEmails.length > 0
-        ? repliedEmails.reduce((sum, e) => sum + e.response_time_hours, 0) / repliedEmails.length
-        : 0;
-      const breaches = weekEmails.filter(e => e.is_sla_breach);
-      const compliance = weekEmails.length > 0
-        ? ((weekEmails.length - breaches.length) / weekEmails.length) * 100
-        : 100;
-
-      return {
-        week,
-        emails: weekEmails.length,
-        avgTime: parseFloat(avgTime.toFixed(1)),
-        compliance: parseFloat(compliance.toFixed(0))
-      };
-    });
+    return (report?.buckets || []).map(point => ({
+      period: formatBucket(point.bucket_start, report.bucket),
+      emails: point.total_emails,
+      avgTime: parseFloat((point.average_response_time || 0).toFixed(1)),
+      compliance: parseFloat(point.sla_compliance_rate.toFixed(0))
+    }));
   };
 
-  // Calculate real department comparison from emails
   const getDepartmentComparison = () => {
-    return departments.map(dept => {
-      const deptEmails = allEmails.filter(email => email.department_id === dept.id);
-      const breaches = deptEmails.filter(e => e.is_sla_breach);
-      const compliance = deptEmails.length > 0
-        ? (((deptEmails.length - breaches.length) / deptEmails.length) * 100).toFixed(0)
-        : 100;
-
-      return {
-        name: dept.name,
-        threshold: dept.sla_threshold_hours,
-        emails: deptEmails.length,
-        compliance: parseFloat(compliance)
-      };
-    });
+    return (report?.departments || []).map(dept => ({
+      name: dept.department_name,
+      threshold: dept.sla_threshold_hours,
+      emails: dept.total_emails,
+      compliance: parseFloat(dept.sla_compliance_rate.toFixed(0))
+    }));
   };
 
   if (loading) {
@@ -132,6 +106,7 @@ const Reports = () => {
 
   const trendData = getTrendData();
   const departmentComparison = getDepartmentComparison();
+  const totals = report?.totals;
 
   return (
     <div>
@@ -179,7 +154,7 @@ const Reports = () => {
           <div className="stat-card-icon primary">
             <BarChart3 />
           </div>
-          <div className="stat-card-value">{allEmails.length}</div>
+          <div className="stat-card-value">{totals?.total_emails || 0}</div>
           <div className="stat-card-label">Total Emails Processed</div>
           <div style={{ 
             display: 'flex', 
@@ -200,7 +175,7 @@ const Reports = () => {
             <TrendingUp />
           </div>
           <div className="stat-card-value">
-            {metrics?.average_response_time?.toFixed(1) || 0}h
+            {totals?.average_response_time?.toFixed(1) || 0}h
           </div>
           <div className="stat-card-label">Avg Response Time</div>
           <div style={{ 
@@ -222,7 +197,7 @@ const Reports = () => {
             <Calendar />
           </div>
           <div className="stat-card-value">
-            {metrics?.sla_compliance_rate || 0}%
+            {totals?.sla_compliance_rate || 0}%
           </div>
           <div className="stat-card-label">Overall SLA Compliance</div>
           <div style={{ 
@@ -245,14 +220,14 @@ const Reports = () => {
         <div className="card-header">
           <h3 className="card-title">Email Volume & Response Time Trend</h3>
           <div style={{ fontSize: '0.875rem', color: '#6b7280' }}>
-            Based on {allEmails.length} total emails
+            Based on {totals?.total_emails || 0} emails
           </div>
         </div>
         <div className="card-body">
           <ResponsiveContainer width="100%" height={350}>
             <LineChart data={trendData}>
               <CartesianGrid strokeDasharray="3 3" stroke="#e5e7eb" />
-              <XAxis dataKey="week" stroke="#6b7280" />
+              <XAxis dataKey="period" stroke="#6b7280" />
               <YAxis yAxisId="left" stroke="#6b7280" />
               <YAxis yAxisId="right" orientation="right" stroke="#6b7280" />
               <Tooltip />
@@ -283,7 +258,7 @@ const Reports = () => {
         <div className="card-header">
           <h3 className="card-title">Department Performance Comparison</h3>
           <div style={{ fontSize: '0.875rem', color: '#6b7280' }}>
-            Real-time data from {departments.length} departments
+            Real-time data from {departmentComparison.length} departments
           </div>
         </div>
         <div className="card-body">
@@ -5,8 +5,7 @@ import {
   createTeamMember, 
   updateTeamMember, 
   deleteTeamMember,
-  getDepartments,
-  getTeamMemberMetrics
+  getDepartments
 } from '../services/api';
 import { formatHours } from '../utils/helpers';
 
@@ -32,24 +31,13 @@ const TeamMembers = () => {
     try {
       setLoading(true);
       
+      // Metrics are embedded server-side from one grouped query
       const [membersRes, deptsRes] = await Promise.all([
-        getTeamMembers(),
+        getTeamMembers({ include_metrics: true }),
         getDepartments()
       ]);
       
-      // Load metrics for each member
-      const membersWithMetrics = await Promise.all(
-        membersRes.data.map(async (member) => {
-          try {
-            const metricsRes = await getTeamMemberMetrics(member.id);
-            return { ...member, metrics: metricsRes.data };
-          } catch {
-            return { ...member, metrics: null };
-          }
-        })
-      );
-      
-      setMembers(membersWithMetrics);
+      setMembers(membersRes.data);
       setDepartments(deptsRes.data);
     } catch (error) {
       console.error('Error loading data:', error);
@@ -50,7 +50,7 @@ api.interceptors.response.use(
 );
 
 // ========== DEPARTMENTS ==========
-export const getDepartments = () => api.get('/departments/');
+export const getDepartments = (params) => api.get('/departments/', { params });
 export const getDepartment = (id) => api.get(`/departments/${id}`);
 export const createDepartment = (data) => api.post('/departments/', data);
 export const updateDepartment = (id, data) => api.put(`/departments/${id}`, data);
@@ -65,6 +65,17 @@ export const deleteTeamMember = (id) => api.delete(`/team-members/${id}`);
 
 // ========== EMAILS ==========
 export const getEmails = (params) => api.get('/emails/', { params });
+
+// Keyset-paginated page of emails: pass back nextCursor to get the following page
+export const getEmailsPage = async (params = {}, cursor = null) => {
+  const response = await api.get('/emails/', {
+    params: cursor ? { ...params, cursor } : params
+  });
+  return {
+    emails: response.data,
+    nextCursor: response.headers['x-next-cursor'] || null
+  };
+};
 export const getEmail = (id) => api.get(`/emails/${id}`);
 export const logReceivedEmail = (data) => api.post('/emails/receive/', data);
 export const logEmailReply = (data) => api.post('/emails/reply/', data);
@@ -80,6 +91,20 @@ export const getTeamMemberMetrics = (teamMemberId = null) => {
   return api.get('/metrics/team-members/', { params });
 };
 
+// Metrics for a batch of ids in one request (sent as ?ids=1&ids=2)
+export const getDepartmentMetricsBatch = (ids) => {
+  return api.get('/metrics/departments/', { params: { ids }, paramsSerializer: { indexes: null } });
+};
+
+export const getTeamMemberMetricsBatch = (ids) => {
+  return api.get('/metrics/team-members/', { params: { ids }, paramsSerializer: { indexes: null } });
+};
+
+// p50/p90/p99 response times; scope is 'department' | 'team_member'
+export const getResponsePercentiles = (params = {}) => {
+  return api.get('/metrics/response-percentiles/', { params, paramsSerializer: { indexes: null } });
+};
+
 // ========== SLA & ALERTS ==========
 export const getSLABreaches = (includePending = true) => {
   return api.get('/sla/breaches/', { params: { include_pending: includePending } });
@@ -107,44 +132,34 @@ export const getAdminStats = () => api.get('/admin/database-stats');
 export const initSampleData = (secret) => api.post(`/admin/init-sample-data?secret=${secret}`);
 
 // ========== DASHBOARD (Aggregate Data) ==========
+export const getDashboardSummary = (recentBreaches = 5) => {
+  return api.get('/dashboard/summary', { params: { recent_breaches: recentBreaches } });
+};
+
+// Per-bucket and per-department report totals; bucket is 'day' | 'week' | 'month'
+export const getReportTrends = (params = {}) => {
+  return api.get('/reports/trends', { params });
+};
+
 export const getDashboardStats = async () => {
   try {
-    // Fetch all necessary data for dashboard
-    const [emailsRes, breachesRes, deptMetricsRes] = await Promise.all([
-      api.get('/emails/', { params: { limit: 1000 } }),
-      api.get('/sla/breaches/'),
+    // Headline numbers are aggregated server-side; only department metrics come alongside
+    const [summaryRes, deptMetricsRes] = await Promise.all([
+      getDashboardSummary(),
       api.get('/metrics/departments/')
     ]);
 
-    const emails = emailsRes.data;
-    const breaches = breachesRes.data.sla_breaches || [];
-    const deptMetrics = deptMetricsRes.data;
-
-    // Calculate overall stats
-    const totalEmails = emails.length;
-    const repliedEmails = emails.filter(e => e.is_replied).length;
-    const slaBreaches = breaches.length;
-    
-    // Calculate average response time
-    const repliedWithTime = emails.filter(e => e.response_time_hours !== null);
-    const avgResponseTime = repliedWithTime.length > 0
-      ? repliedWithTime.reduce((sum, e) => sum + e.response_time_hours, 0) / repliedWithTime.length
-      : 0;
-
-    // Calculate compliance rate
-    const clientEmails = emails.filter(e => e.is_client_email);
-    const complianceRate = clientEmails.length > 0
-      ? ((clientEmails.length - slaBreaches) / clientEmails.length * 100).toFixed(1)
-      : 100;
+    const summary = summaryRes.data;
 
     return {
       data: {
-        totalEmails,
-        repliedEmails,
-        avgResponseTime: parseFloat(avgResponseTime.toFixed(2)),
-        slaBreaches,
-        complianceRate: parseFloat(complianceRate),
-        departmentMetrics: deptMetrics
+        totalEmails: summary.total_emails,
+        repliedEmails: summary.replied_emails,
+        avgResponseTime: summary.average_response_time || 0,
+        slaBreaches: summary.sla_breaches,
+        complianceRate: summary.sla_compliance_rate,
+        recentBreaches: summary.recent_breaches,
+        departmentMetrics: deptMetricsRes.data
       }
     };
   } catch (error) {
@@ -155,28 +170,22 @@ export const getDashboardStats = async () => {
 
 export const getOverallMetrics = async () => {
   try {
-    const [emailsRes, deptMetricsRes] = await Promise.all([
-      api.get('/emails/'),
+    const [summaryRes, deptMetricsRes] = await Promise.all([
+      getDashboardSummary(0),
       api.get('/metrics/departments/')
     ]);
 
-    const emails = emailsRes.data;
-    const repliedWithTime = emails.filter(e => e.response_time_hours !== null);
-    
-    const avgResponseTime = repliedWithTime.length > 0
-      ? repliedWithTime.reduce((sum, e) => sum + e.response_time_hours, 0) / repliedWithTime.length
-      : 0;
-
-    const slaBreaches = emails.filter(e => e.is_sla_breach).length;
-    const complianceRate = emails.length > 0
-      ? ((emails.length - slaBreaches) / emails.length * 100).toFixed(1)
+    const summary = summaryRes.data;
+    const total = summary.total_emails;
+    const complianceRate = total > 0
+      ? ((total - summary.confirmed_breaches) / total * 100).toFixed(1)
       : 100;
 
     return {
       data: {
-        total_emails: emails.length,
-        average_response_time: parseFloat(avgResponseTime.toFixed(2)),
-        sla_breaches: slaBreaches,
+        total_emails: total,
+        average_response_time: summary.average_response_time || 0,
+        sla_breaches: summary.confirmed_breaches,
         sla_compliance_rate: parseFloat(complianceRate),
         department_metrics: deptMetricsRes.data
       }